@@ -15,7 +15,13 @@ from qobuz_proxy.auth import (
     AuthenticationError,
     auto_fetch_credentials,
 )
-from qobuz_proxy.connect import DiscoveryService, WsManager, ConnectTokens
+from qobuz_proxy.connect import (
+    DiscoveryService,
+    WsManager,
+    ConnectTokens,
+    close_shared_zeroconf,
+    get_shared_zeroconf,
+)
 from qobuz_proxy.playback import (
     MetadataService,
     QobuzQueue,
@@ -204,6 +210,7 @@ class QobuzProxy:
             app_id=self._app_id,
             on_connect=self._on_app_connected,
             quality_getter=self._get_effective_quality,
+            zeroconf=get_shared_zeroconf(),
         )
         await self._discovery.start()
         logger.info(f"Discovery service started on port {self._config.server.http_port}")
@@ -266,26 +273,17 @@ class QobuzProxy:
             # Register handlers for their message types
             for msg_type in self._queue_handler.get_message_types():
                 self._ws_manager.register_handler(
-                    msg_type,
-                    lambda mt, msg, h=self._queue_handler: asyncio.create_task(
-                        h.handle_message(mt, msg)
-                    ),
+                    msg_type, self._queue_handler.handle_message, is_async=True
                 )
 
             for msg_type in self._playback_handler.get_message_types():
                 self._ws_manager.register_handler(
-                    msg_type,
-                    lambda mt, msg, h=self._playback_handler: asyncio.create_task(
-                        h.handle_message(mt, msg)
-                    ),
+                    msg_type, self._playback_handler.handle_message, is_async=True
                 )
 
             for msg_type in self._volume_handler.get_message_types():
                 self._ws_manager.register_handler(
-                    msg_type,
-                    lambda mt, msg, h=self._volume_handler: asyncio.create_task(
-                        h.handle_message(mt, msg)
-                    ),
+                    msg_type, self._volume_handler.handle_message, is_async=True
                 )
 
             # Register error handler (message type 1)
@@ -399,7 +397,7 @@ class QobuzProxy:
         1. Stop state reporter
         2. Stop player
         3. Disconnect WebSocket
-        4. Stop discovery service
+        4. Stop discovery service and close zeroconf
         5. Stop audio proxy
         6. Disconnect backend
         """
@@ -436,6 +434,10 @@ class QobuzProxy:
                 await self._discovery.stop()
             except Exception as e:
                 logger.warning(f"Error stopping discovery service: {e}")
+        try:
+            await close_shared_zeroconf()
+        except Exception as e:
+            logger.warning(f"Error closing zeroconf: {e}")
 
         # 5. Stop audio proxy
         if self._proxy_server:
@@ -116,7 +116,7 @@ class QobuzAPIClient:
             for key in sorted(params.keys()):
                 sig_string += key + str(params[key])
             sig_string += request_ts + self.app_secret
-            signature = hashlib.md5(sig_string.encode()).hexdigest()
+            signature = hashlib.md5(sig_string.encode(), usedforsecurity=False).hexdigest()
 
             body = f"profile=qbz-1&request_ts={request_ts}&request_sig={signature}"
             url = f"{self.API_BASE}/session/start"
@@ -177,7 +177,7 @@ class QobuzAPIClient:
             for key in sorted(sign_params.keys()):
                 sig_string += key + str(sign_params[key])
             sig_string += request_ts + self.app_secret
-            signature = hashlib.md5(sig_string.encode()).hexdigest()
+            signature = hashlib.md5(sig_string.encode(), usedforsecurity=False).hexdigest()
 
             params = {
                 **sign_params,
@@ -282,7 +282,8 @@ class QobuzAPIClient:
         for key in sorted(params.keys()):
             sig_string += key + str(params[key])
         sig_string += request_ts + self.app_secret
-        signature = hashlib.md5(sig_string.encode()).hexdigest()
+        # Params may carry user input (e.g. login email/password), so keep UTF-8 here
+        signature = hashlib.md5(sig_string.encode(), usedforsecurity=False).hexdigest()
 
         params["request_ts"] = request_ts
         params["request_sig"] = signature
@@ -5,24 +5,68 @@ Extracts app_id and app_secret from play.qobuz.com JavaScript bundles.
 Based on StreamCore32's QobuzConfig.cpp.
 """
 
+import asyncio
 import base64
+import codecs
 import hashlib
 import json
 import logging
+import os
 import re
 import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Optional
 from urllib.parse import urljoin
 
 import aiohttp
-from bs4 import BeautifulSoup
+
+try:
+    import orjson
+except ImportError:  # orjson not installed, fall back to the stdlib json module
+    orjson = None  # type: ignore[assignment]
 
 logger = logging.getLogger(__name__)
 
 # Cache location
 CACHE_DIR = Path.home() / ".qobuz-proxy"
 CACHE_FILE = CACHE_DIR / "credentials.json"
+CACHE_TTL_SECONDS = 7 * 24 * 3600  # re-scrape in the background after a week
+
+# Background refresh of stale cached credentials (reference kept so it isn't GC'd)
+_refresh_task: Optional["asyncio.Task[None]"] = None
+
+# Bundle scan patterns
+# Quoted src/href attribute values that look like JavaScript files; good
+# enough for the entry page, without building a DOM tree
+_SCRIPT_URL_RE = re.compile(r'(?:src|href)\s*=\s*"([^"]+?\.js[^"]*)"', re.IGNORECASE)
+
+# Bundle scan pattern: app_id and seeds in one alternation, so a bundle is
+# walked once and each match is dispatched on the group that matched
+_BUNDLE_RE = re.compile(
+    r'(?P<app_id>production:\{api:\{appId:"(?P<app_id_value>\d{9})")'
+    r'|(?P<seed>\.initialSeed\("(?P<seed_value>[^"]+)",window\.utimezone\.(?P<timezone>\w+)\))'
+)
+
+
+@lru_cache(maxsize=32)
+def _secret_pattern(timezone: str) -> re.Pattern[str]:
+    """Compile the info/extras pattern for a timezone (cached per timezone)."""
+    return re.compile(
+        rf"/{timezone}[^{{}}]*?"
+        rf'info:\s*["\']([^"\']+)["\'][^{{}}]*?'
+        rf'extras:\s*["\']([^"\']+)["\']',
+        re.IGNORECASE,
+    )
+
+
+# Any timezone's info/extras pair, with the timezone name (the last "/name"
+# before "info:"); collected while streaming so a seed that turns up later
+# in the bundle can still be matched without keeping the bundle in memory
+_SECRET_PARTS_RE = re.compile(
+    r'/(\w+)[^{}/]*?info:\s*["\']([^"\']+)["\'][^{}]*?extras:\s*["\']([^"\']+)["\']',
+    re.IGNORECASE,
+)
 
 
 class CredentialScraper:
@@ -33,26 +77,37 @@ class CredentialScraper:
         "https://play.qobuz.com/",
     ]
     MAX_BUNDLES = 12
+    MAX_CONCURRENT_BUNDLES = 6
+    CHUNK_SIZE = 64 * 1024
+    CHUNK_OVERLAP = 4 * 1024  # chars kept between chunks for boundary matches
     TIMEOUT = 15
 
-    async def fetch_credentials(self) -> Optional[dict[str, Any]]:
+    async def fetch_credentials(
+        self, session: Optional[aiohttp.ClientSession] = None
+    ) -> Optional[dict[str, Any]]:
         """
         Fetch app_id and app_secret from Qobuz web player.
 
+        Args:
+            session: Optional shared HTTP session (a private one is created if omitted)
+
         Returns:
             Dict with 'app_id' and 'app_secrets', or None if failed
         """
+        if session is None:
+            async with aiohttp.ClientSession() as own_session:
+                return await self.fetch_credentials(own_session)
+
         logger.info("Fetching Qobuz credentials from web player...")
 
-        async with aiohttp.ClientSession() as session:
-            for entry_url in self.ENTRY_URLS:
-                try:
-                    result = await self._try_scrape(session, entry_url)
-                    if result:
-                        return result
-                except Exception as e:
-                    logger.warning(f"Failed to scrape {entry_url}: {e}")
-                    continue
+        for entry_url in self.ENTRY_URLS:
+            try:
+                result = await self._try_scrape(session, entry_url)
+                if result:
+                    return result
+            except Exception as e:
+                logger.warning("Failed to scrape %s: %s", entry_url, e)
+                continue
 
         logger.error("Failed to fetch credentials from all entry points")
         return None
@@ -61,7 +116,7 @@ class CredentialScraper:
         self, session: aiohttp.ClientSession, entry_url: str
     ) -> Optional[dict[str, Any]]:
         """Try to scrape credentials from a single entry URL."""
-        logger.debug(f"Fetching {entry_url}")
+        logger.debug("Fetching %s", entry_url)
 
         timeout = aiohttp.ClientTimeout(total=self.TIMEOUT)
         async with session.get(entry_url, timeout=timeout) as response:
@@ -71,41 +126,22 @@ class CredentialScraper:
 
         # Extract script URLs
         script_urls = self._extract_scripts(html, entry_url)
-        logger.debug(f"Found {len(script_urls)} JavaScript bundles")
+        logger.debug("Found %d JavaScript bundles", len(script_urls))
 
         if not script_urls:
             return None
 
         result: dict[str, Any] = {"app_id": "", "seeds": {}, "secrets": {}}
 
-        for js_url in script_urls[: self.MAX_BUNDLES]:
-            try:
-                async with session.get(js_url, timeout=timeout) as response:
-                    if response.status != 200:
-                        continue
-                    js_content = await response.text()
-
-                # Scan for app_id
-                if not result["app_id"]:
-                    app_id = self._scan_app_id(js_content)
-                    if app_id:
-                        result["app_id"] = app_id
-                        logger.debug(f"Found app_id: {app_id}")
-
-                # Scan for seeds
-                seeds = self._scan_seeds(js_content)
-                if seeds:
-                    result["seeds"].update(seeds)
-
-                # Derive secrets from seeds
-                if result["seeds"]:
-                    secrets = self._derive_secrets(js_content, result["seeds"])
-                    if secrets:
-                        result["secrets"].update(secrets)
-
-            except Exception as e:
-                logger.debug(f"Error scanning {js_url}: {e}")
-                continue
+        # Bundles are independent, so stream them concurrently (bounded) into
+        # the shared result; downloads stop once every seed has its secret.
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_BUNDLES)
+        await asyncio.gather(
+            *(
+                self._scan_bundle_stream(session, js_url, timeout, semaphore, result)
+                for js_url in script_urls[: self.MAX_BUNDLES]
+            )
+        )
 
         # If we have app_id and secrets, return them
         if result["app_id"] and result["secrets"]:
@@ -116,22 +152,80 @@ class CredentialScraper:
 
         return None
 
-    def _extract_scripts(self, html: str, base_url: str) -> list[str]:
-        """Extract JavaScript bundle URLs from HTML."""
-        soup = BeautifulSoup(html, "html.parser")
-        scripts: list[str] = []
+    @staticmethod
+    def _is_complete(result: dict[str, Any]) -> bool:
+        """Check if the app_id and a secret for every seed found so far are known."""
+        seeds = result["seeds"]
+        return bool(result["app_id"] and seeds and seeds.keys() <= result["secrets"].keys())
+
+    async def _scan_bundle_stream(
+        self,
+        session: aiohttp.ClientSession,
+        js_url: str,
+        timeout: aiohttp.ClientTimeout,
+        semaphore: asyncio.Semaphore,
+        result: dict[str, Any],
+    ) -> None:
+        """
+        Download a JavaScript bundle in chunks, scanning as data arrives.
+
+        Each chunk is scanned together with the tail of the previous one so
+        patterns straddling a chunk boundary still match. The download is
+        aborted as soon as result holds an app_id and a secret for every seed.
+        """
+        async with semaphore:
+            if self._is_complete(result):
+                return
+            try:
+                async with session.get(js_url, timeout=timeout) as response:
+                    if response.status != 200:
+                        return
+
+                    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+                    secret_parts: dict[str, tuple[str, str]] = {}
+                    tail = ""
+                    async for chunk in response.content.iter_chunked(self.CHUNK_SIZE):
+                        window = tail + decoder.decode(chunk)
+                        self._scan_into(result, window)
+                        if self._is_complete(result):
+                            response.close()
+                            return
+                        for match in _SECRET_PARTS_RE.finditer(window):
+                            timezone, info, extras = match.groups()
+                            secret_parts.setdefault(timezone.capitalize(), (info, extras))
+                        tail = window[-self.CHUNK_OVERLAP :]
+
+                    # Seeds may have turned up after their info/extras strings
+                    for timezone, seed in result["seeds"].items():
+                        if timezone not in result["secrets"] and timezone in secret_parts:
+                            secret = self._secret_from_parts(seed, *secret_parts[timezone])
+                            if secret:
+                                result["secrets"][timezone] = secret
+            except Exception as e:
+                logger.debug("Error scanning %s: %s", js_url, e)
+
+    def _scan_into(self, result: dict[str, Any], js_content: str) -> None:
+        """Scan a piece of JavaScript for app_id, seeds and secrets."""
+        app_id, seeds = self._scan_bundle(js_content)
+        if app_id and not result["app_id"]:
+            result["app_id"] = app_id
+            logger.debug("Found app_id: %s", app_id)
 
-        for script in soup.find_all("script", src=True):
-            src = str(script["src"])
-            if self._is_player_asset(src):
-                scripts.append(self._absolutize(base_url, src))
+        if seeds:
+            result["seeds"].update(seeds)
 
-        for link in soup.find_all("link", rel="preload", attrs={"as": "script"}):
-            if "href" in link.attrs:
-                href = str(link["href"])
-                if self._is_player_asset(href):
-                    scripts.append(self._absolutize(base_url, href))
+        if result["seeds"]:
+            secrets = self._derive_secrets(js_content, result["seeds"])
+            if secrets:
+                result["secrets"].update(secrets)
 
+    def _extract_scripts(self, html: str, base_url: str) -> list[str]:
+        """Extract JavaScript bundle URLs from HTML."""
+        scripts = [
+            self._absolutize(base_url, url)
+            for url in _SCRIPT_URL_RE.findall(html)
+            if self._is_player_asset(url)
+        ]
         return list(dict.fromkeys(scripts))  # Remove duplicates
 
     def _is_player_asset(self, url: str) -> bool:
@@ -148,44 +242,44 @@ class CredentialScraper:
             return url
         return urljoin(base, url)
 
-    def _scan_app_id(self, js_content: str) -> Optional[str]:
-        """Scan for app_id pattern."""
-        match = re.search(r'production:\{api:\{appId:"(\d{9})"', js_content)
-        return match.group(1) if match else None
+    def _scan_bundle(self, js_content: str) -> tuple[Optional[str], dict[str, str]]:
+        """
+        Scan for app_id and seed patterns in a single pass.
 
-    def _scan_seeds(self, js_content: str) -> dict[str, str]:
-        """Scan for seed patterns."""
+        Returns:
+            (app_id or None, seeds keyed by capitalized timezone)
+        """
+        app_id: Optional[str] = None
         seeds: dict[str, str] = {}
-        pattern = r'\.initialSeed\("([^"]+)",window\.utimezone\.(\w+)\)'
-        for match in re.finditer(pattern, js_content):
-            seed = match.group(1)
-            timezone = match.group(2).capitalize()
-            seeds[timezone] = seed
-        return seeds
+        for match in _BUNDLE_RE.finditer(js_content):
+            if match.lastgroup == "app_id":
+                if app_id is None:
+                    app_id = match.group("app_id_value")
+            else:
+                seeds[match.group("timezone").capitalize()] = match.group("seed_value")
+        return app_id, seeds
 
     def _derive_secrets(self, js_content: str, seeds: dict[str, str]) -> dict[str, str]:
         """Derive secrets from seeds and info/extras."""
         secrets: dict[str, str] = {}
         for timezone, seed in seeds.items():
-            pattern = (
-                rf"/{timezone}[^{{}}]*?"
-                rf'info:\s*["\']([^"\']+)["\'][^{{}}]*?'
-                rf'extras:\s*["\']([^"\']+)["\']'
-            )
-            match = re.search(pattern, js_content, re.IGNORECASE)
+            match = _secret_pattern(timezone).search(js_content)
             if match:
-                info = match.group(1)
-                extras = match.group(2)
-                combined = seed + info + extras
-                if len(combined) > 44:
-                    to_decode = combined[:-44]
-                    try:
-                        secret = self._base64url_decode(to_decode)
-                        secrets[timezone] = secret
-                    except Exception:
-                        pass
+                secret = self._secret_from_parts(seed, match.group(1), match.group(2))
+                if secret:
+                    secrets[timezone] = secret
         return secrets
 
+    def _secret_from_parts(self, seed: str, info: str, extras: str) -> Optional[str]:
+        """Decode a secret from its seed and info/extras strings."""
+        combined = seed + info + extras
+        if len(combined) > 44:
+            try:
+                return self._base64url_decode(combined[:-44])
+            except Exception:
+                pass
+        return None
+
     def _base64url_decode(self, s: str) -> str:
         """Decode base64url string."""
         padding = 4 - (len(s) % 4)
@@ -195,41 +289,72 @@ class CredentialScraper:
         return base64.b64decode(s).decode("utf-8", errors="replace")
 
 
+def _json_dumps(data: dict[str, Any]) -> bytes:
+    """Serialize to indented JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode()
+
+
+def _json_loads(raw: bytes) -> Any:
+    """Parse JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
 def load_cached_credentials() -> Optional[dict[str, str]]:
     """Load credentials from cache file."""
+    entry = _load_cache_entry()
+    return entry[0] if entry else None
+
+
+def _load_cache_entry() -> Optional[tuple[dict[str, str], float]]:
+    """
+    Load credentials and their cache timestamp from the cache file.
+
+    Returns:
+        (credentials, cached_at) tuple, or None if there is no usable cache.
+        Entries written before timestamps were stored report cached_at 0.
+    """
     try:
         if CACHE_FILE.exists():
-            with open(CACHE_FILE) as f:
-                creds: dict[str, str] = json.load(f)
-                if creds.get("app_id") and creds.get("app_secret"):
-                    logger.info(f"Loaded credentials from cache: {CACHE_FILE}")
-                    return creds
+            data: dict[str, Any] = _json_loads(CACHE_FILE.read_bytes())
+            if data.get("app_id") and data.get("app_secret"):
+                logger.info("Loaded credentials from cache: %s", CACHE_FILE)
+                creds = {"app_id": data["app_id"], "app_secret": data["app_secret"]}
+                return creds, float(data.get("cached_at", 0))
     except Exception as e:
-        logger.warning(f"Failed to load cached credentials: {e}")
+        logger.warning("Failed to load cached credentials: %s", e)
     return None
 
 
 def save_credentials_to_cache(credentials: dict[str, str]) -> bool:
     """Save credentials to cache file."""
     try:
-        CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        with open(CACHE_FILE, "w") as f:
-            json.dump(credentials, f, indent=2)
-        logger.info(f"Cached credentials to {CACHE_FILE}")
+        if not CACHE_DIR.exists():
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and swap it in, so a crash mid-write can't
+        # leave a corrupt cache behind (which would force a full re-scrape)
+        tmp_file = CACHE_FILE.with_suffix(".json.tmp")
+        data = {**credentials, "cached_at": time.time()}
+        tmp_file.write_bytes(_json_dumps(data))
+        os.replace(tmp_file, CACHE_FILE)
+        logger.info("Cached credentials to %s", CACHE_FILE)
         return True
     except Exception as e:
-        logger.error(f"Failed to cache credentials: {e}")
+        logger.error("Failed to cache credentials: %s", e)
         return False
 
 
-async def test_secret(app_id: str, app_secret: str) -> bool:
+async def test_secret(app_id: str, app_secret: str, session: aiohttp.ClientSession) -> bool:
     """Test if app_id/app_secret pair works."""
     test_track_id = "64868955"
     ts = f"{time.time():.6f}"
 
     params_str = f"format_id5intentstreamtrack_id{test_track_id}"
     sig_str = f"trackgetFileUrl{params_str}{ts}{app_secret}"
-    sig = hashlib.md5(sig_str.encode()).hexdigest()
+    sig = hashlib.md5(sig_str.encode(), usedforsecurity=False).hexdigest()
 
     url = (
         f"https://www.qobuz.com/api.json/0.2/track/getFileUrl?"
@@ -239,15 +364,14 @@ async def test_secret(app_id: str, app_secret: str) -> bool:
 
     try:
         timeout = aiohttp.ClientTimeout(total=10)
-        async with aiohttp.ClientSession() as session:
-            headers = {
-                "User-Agent": "Mozilla/5.0",
-                "X-App-Id": app_id,
-                "Referer": "https://play.qobuz.com/",
-            }
-            async with session.get(url, headers=headers, timeout=timeout) as resp:
-                # 200, 401, 403 all indicate valid credentials
-                return resp.status in (200, 401, 403)
+        headers = {
+            "User-Agent": "Mozilla/5.0",
+            "X-App-Id": app_id,
+            "Referer": "https://play.qobuz.com/",
+        }
+        async with session.get(url, headers=headers, timeout=timeout) as resp:
+            # 200, 401, 403 all indicate valid credentials
+            return resp.status in (200, 401, 403)
     except Exception:
         return False
 
@@ -263,32 +387,93 @@ async def auto_fetch_credentials(use_cache: bool = True) -> Optional[dict[str, s
         Dict with 'app_id' and 'app_secret', or None
     """
     if use_cache:
-        cached = load_cached_credentials()
-        if cached:
+        entry = _load_cache_entry()
+        if entry:
+            cached, cached_at = entry
+            if time.time() - cached_at > CACHE_TTL_SECONDS:
+                # Start fast with the old credentials; the fresh ones are
+                # cached for the next run
+                logger.info("Cached credentials are stale, refreshing in background")
+                _schedule_background_refresh()
             return cached
 
     logger.info("Fetching credentials from web player...")
-    scraper = CredentialScraper()
-    result = await scraper.fetch_credentials()
-
-    if not result or "app_id" not in result:
-        return None
+    # One session for the scrape and the secret probes, so they share pooled
+    # connections and DNS lookups instead of paying a handshake per request.
+    connector = aiohttp.TCPConnector(limit=10, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        scraper = CredentialScraper()
+        result = await scraper.fetch_credentials(session=session)
+
+        if not result or "app_id" not in result:
+            return None
 
-    app_id = result["app_id"]
-    secrets = result.get("app_secrets", {})
+        app_id = result["app_id"]
+        secrets = result.get("app_secrets", {})
 
-    if not secrets:
-        return None
+        if not secrets:
+            return None
 
-    # Test each secret until one works
-    logger.info(f"Testing {len(secrets)} secret(s)...")
-    for timezone, secret in secrets.items():
-        logger.debug(f"Testing {timezone} secret...")
-        if await test_secret(app_id, secret):
-            logger.info(f"Secret for {timezone} works!")
+        # Probe all secrets concurrently; the first working one in seed order wins
+        logger.info("Testing %d secret(s)...", len(secrets))
+        working = await _find_working_secret(app_id, secrets, session)
+        if working:
+            timezone, secret = working
+            logger.info("Secret for %s works!", timezone)
             credentials = {"app_id": app_id, "app_secret": secret}
             save_credentials_to_cache(credentials)
             return credentials
 
     logger.error("No working secret found")
     return None
+
+
+def _schedule_background_refresh() -> None:
+    """Re-scrape credentials in the background unless a refresh is already running."""
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_refresh_credentials())
+
+
+async def _refresh_credentials() -> None:
+    """Fetch fresh credentials, bypassing the cache (which they then replace)."""
+    try:
+        if await auto_fetch_credentials(use_cache=False):
+            logger.info("Background credential refresh complete")
+        else:
+            logger.warning("Background credential refresh failed, keeping cached credentials")
+    except Exception as e:
+        logger.warning("Background credential refresh failed: %s", e)
+
+
+async def _find_working_secret(
+    app_id: str, secrets: dict[str, str], session: aiohttp.ClientSession
+) -> Optional[tuple[str, str]]:
+    """
+    Test candidate secrets concurrently and return the first that works.
+
+    Probes run in parallel, but the winner is the first working secret in
+    seed order, so the same scrape always caches the same secret. Remaining
+    probes are cancelled once that secret is known.
+
+    Returns:
+        (timezone, secret) tuple, or None if no secret works
+    """
+
+    async def probe(timezone: str, secret: str) -> Optional[tuple[str, str]]:
+        logger.debug("Testing %s secret...", timezone)
+        if await test_secret(app_id, secret, session):
+            return timezone, secret
+        return None
+
+    tasks = [asyncio.create_task(probe(tz, secret)) for tz, secret in secrets.items()]
+    try:
+        # Every earlier candidate has failed by the time a later one is awaited
+        for task in tasks:
+            result = await task
+            if result:
+                return result
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
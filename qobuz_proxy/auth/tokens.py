@@ -4,24 +4,31 @@ Token management for Qobuz authentication.
 
 import time
 from dataclasses import dataclass
+from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class QobuzToken:
     """API token with expiration."""
 
     token: str = ""
     expires_at: int = 0  # Milliseconds
 
-    def is_expired(self, buffer_ms: int = 60000) -> bool:
-        """Check if token is expired or will expire within buffer."""
+    def is_expired(self, buffer_ms: int = 60000, now_ms: Optional[int] = None) -> bool:
+        """
+        Check if token is expired or will expire within buffer.
+
+        Expiry is a server-issued wall-clock time, so now_ms is wall-clock
+        milliseconds; pass it in to reuse a snapshot across several checks.
+        """
         if not self.token or not self.expires_at:
             return True
-        now_ms = int(time.time() * 1000)
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
         return now_ms + buffer_ms >= self.expires_at
 
 
-@dataclass
+@dataclass(slots=True)
 class WSToken:
     """WebSocket authentication token (received from Qobuz app)."""
 
@@ -29,11 +36,17 @@ class WSToken:
     exp_s: int = 0  # Expiration in seconds (UTC)
     endpoint: str = ""  # WebSocket endpoint URL
 
-    def is_expired(self, buffer_s: int = 60) -> bool:
-        """Check if token is expired or will expire within buffer."""
+    def is_expired(self, buffer_s: int = 60, now_s: Optional[float] = None) -> bool:
+        """
+        Check if token is expired or will expire within buffer.
+
+        exp_s is the JWT's wall-clock expiry, so now_s is wall-clock seconds;
+        pass it in to reuse a snapshot across several checks.
+        """
         if not self.jwt or not self.exp_s:
             return True
-        now_s = int(time.time())
+        if now_s is None:
+            now_s = time.time()
         return now_s + buffer_s >= self.exp_s
 
     def is_valid(self) -> bool:
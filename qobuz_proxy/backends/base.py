@@ -6,7 +6,7 @@ Defines the contract that all audio backends must implement.
 
 import logging
 from abc import ABC, abstractmethod
-from typing import Callable, Optional
+from typing import Any, Callable, Optional
 
 from .types import (
     BackendInfo,
@@ -171,47 +171,38 @@ class AudioBackend(ABC):
     # Event Notification Helpers
     # =========================================================================
 
+    @staticmethod
+    def _safe_call(callback: Optional[Callable[..., None]], *args: Any, name: str) -> None:
+        """Invoke a listener callback, logging (not raising) its errors."""
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error("%s callback error: %s", name, e)
+
     def _notify_state_change(self, state: PlaybackState) -> None:
         """Notify listeners of state change."""
         old_state = self._state
         self._state = state
-        if old_state != state and self._on_state_change:
-            try:
-                self._on_state_change(state)
-            except Exception as e:
-                logger.error(f"State change callback error: {e}")
+        if old_state != state:
+            self._safe_call(self._on_state_change, state, name="State change")
 
     def _notify_position_update(self, position_ms: int) -> None:
         """Notify listeners of position update."""
-        if self._on_position_update:
-            try:
-                self._on_position_update(position_ms)
-            except Exception as e:
-                logger.error(f"Position update callback error: {e}")
+        self._safe_call(self._on_position_update, position_ms, name="Position update")
 
     def _notify_buffer_status(self, status: BufferStatus) -> None:
         """Notify listeners of buffer status change."""
-        if self._on_buffer_status:
-            try:
-                self._on_buffer_status(status)
-            except Exception as e:
-                logger.error(f"Buffer status callback error: {e}")
+        self._safe_call(self._on_buffer_status, status, name="Buffer status")
 
     def _notify_track_ended(self) -> None:
         """Notify listeners that track ended naturally."""
-        if self._on_track_ended:
-            try:
-                self._on_track_ended()
-            except Exception as e:
-                logger.error(f"Track ended callback error: {e}")
+        self._safe_call(self._on_track_ended, name="Track ended")
 
     def _notify_playback_error(self, message: str) -> None:
         """Notify listeners of playback error."""
-        if self._on_playback_error:
-            try:
-                self._on_playback_error(message)
-            except Exception as e:
-                logger.error(f"Playback error callback error: {e}")
+        self._safe_call(self._on_playback_error, message, name="Playback error")
 
     # =========================================================================
     # Info
@@ -6,8 +6,9 @@ Implements AudioBackend interface for DLNA/UPnP renderers.
 
 import asyncio
 import logging
+import re
 import time
-from typing import Optional, TYPE_CHECKING
+from typing import Any, Awaitable, Callable, Optional, TypeVar, TYPE_CHECKING
 
 from qobuz_proxy.backends.base import AudioBackend
 from qobuz_proxy.backends.types import (
@@ -16,8 +17,9 @@ from qobuz_proxy.backends.types import (
     BufferStatus,
     PlaybackState,
 )
-from .client import DLNAClient, DLNAClientError
+from .client import DLNAClient, DLNAClientError, parse_transport_event
 from .capabilities import (
+    CAPABILITY_CACHE_FILE,
     DLNACapabilities,
     CapabilityCache,
     parse_protocol_info_sink,
@@ -30,15 +32,69 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
-# State polling interval
+T = TypeVar("T")
+
+# State polling interval (fallback for states not listed below)
 STATE_POLL_INTERVAL_SECONDS = 2.0
 
+# Poll fast while the device is changing state, back off when nothing is
+# expected to change (user commands wake the loop immediately anyway)
+STATE_POLL_INTERVALS = {
+    PlaybackState.LOADING: 0.5,
+    PlaybackState.PLAYING: 2.0,
+    PlaybackState.PAUSED: 5.0,
+    PlaybackState.STOPPED: 15.0,
+}
+
+# While subscribed to AVTransport events the pushed state is used instead of
+# querying the device, which is still checked this often in case events are lost
+EVENT_STATE_CHECK_INTERVAL_SECONDS = 30.0
+
+# Renew event subscriptions this far into their granted lifetime
+EVENT_RENEW_FRACTION = 0.8
+
+# Max pending callback events before positions are dropped / oldest evicted
+EVENT_QUEUE_SIZE = 128
+
+# Polled positions are only reported when they moved this much, or when this
+# long has passed since the last report
+POSITION_EMIT_MIN_DELTA_MS = 500
+POSITION_EMIT_MIN_INTERVAL_SECONDS = 1.0
+
+# While playing, position is extrapolated on the monotonic clock from the last
+# GetPositionInfo result, and only re-read from the device this often
+POSITION_RESYNC_INTERVAL_SECONDS = 10.0
+
 # Grace period after starting playback to ignore STOPPED state (seconds)
 # This prevents false track-ended events while the device is loading
 PLAYBACK_START_GRACE_PERIOD_SECONDS = 5.0
 
-# Class-level capability cache (shared across instances)
-_capability_cache = CapabilityCache()
+# UPnP CurrentTransportState values; anything else (STOPPED, NO_MEDIA_PRESENT, ...)
+# is treated as stopped
+_TRANSPORT_STATE_MAP = {
+    "PLAYING": PlaybackState.PLAYING,
+    "PAUSED_PLAYBACK": PlaybackState.PAUSED,
+    "TRANSITIONING": PlaybackState.LOADING,
+}
+
+# MP3 streams: .mp3 files or Qobuz format_id 5 (everything else is FLAC)
+_MP3_RE = re.compile(r"\.mp3(?:$|[?&#])|[?&]format=5(?:$|&)", re.IGNORECASE)
+
+# Escapes text and attribute values for DIDL-Lite in a single pass
+_DIDL_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+
+def _xml_escape(text: str) -> str:
+    """Escape &, <, > and " for DIDL-Lite text and attribute values."""
+    return text.translate(_DIDL_ESCAPE)
+
+
+_DIDL_HEADER = """<DIDL-Lite xmlns="urn:schemas-upnp-org:metadata-1-0/DIDL-Lite/"
+                   xmlns:dc="http://purl.org/dc/elements/1.1/"
+                   xmlns:upnp="urn:schemas-upnp-org:metadata-1-0/upnp/">"""
+
+# Class-level capability cache (shared across instances, persisted across restarts)
+_capability_cache = CapabilityCache(path=CAPABILITY_CACHE_FILE)
 
 
 class DLNABackend(AudioBackend):
@@ -75,6 +131,15 @@ class DLNABackend(AudioBackend):
 
         self._client: Optional[DLNAClient] = None
         self._poll_task: Optional[asyncio.Task] = None
+        self._poll_wakeup = asyncio.Event()
+
+        # Callbacks run on a dispatcher task so slow listeners can't stall polling
+        self._events: asyncio.Queue[tuple[str, Any]] = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self._dispatcher_task: Optional[asyncio.Task] = None
+
+        # Last polled position reported to listeners (value, monotonic time)
+        self._last_pos_emit_ms: int = -POSITION_EMIT_MIN_DELTA_MS
+        self._last_pos_emit_time: float = 0.0
 
         self._current_metadata: Optional[BackendTrackMetadata] = None
         self._position_ms: int = 0
@@ -86,10 +151,35 @@ class DLNABackend(AudioBackend):
         # Device capabilities
         self._capabilities: Optional[DLNACapabilities] = None
 
+        # protocolInfo strings per content type, derived from the capabilities
+        self._protocol_info_cache: dict[str, str] = {}
+
+        # Last DIDL-Lite document built, keyed by (track_id, url, protocol_info)
+        self._didl_cache: Optional[tuple[tuple[str, str, str], str]] = None
+
         # Track when playback was started to avoid false track-ended events
         # during device loading/transition period
         self._playback_started_at: float = 0.0
 
+        # Position the device is expected to report once it has ramped up
+        # (0 after play, the target after a seek); many renderers report 0
+        # while still buffering
+        self._buffered_position_ms: int = 0
+
+        # Last position read from the device and when (None: must re-read)
+        self._pos_anchor_ms: int = 0
+        self._pos_anchor_ts: Optional[float] = None
+
+        # In-flight device queries, shared by concurrent callers (see _single_flight)
+        self._inflight: dict[str, asyncio.Future[Any]] = {}
+
+        # AVTransport event subscription (GENA): ID, renewal task, last pushed
+        # transport state and when the device was last queried directly
+        self._event_sid: Optional[str] = None
+        self._event_renew_task: Optional[asyncio.Task] = None
+        self._event_state: Optional[str] = None
+        self._state_checked_at: float = float("-inf")
+
     # =========================================================================
     # Lifecycle
     # =========================================================================
@@ -119,29 +209,129 @@ class DLNABackend(AudioBackend):
 
             # Query device capabilities
             await self._discover_capabilities(device_info)
+            self._protocol_info_cache = {
+                content_type: self._protocol_info_for(content_type)
+                for content_type in ("audio/flac", "audio/mpeg")
+            }
 
             self._is_connected = True
 
-            # Start state polling
+            # Start event dispatch and state polling
+            self._dispatcher_task = asyncio.create_task(self._dispatch_events_loop())
             self._poll_task = asyncio.create_task(self._poll_state_loop())
 
-            logger.info(f"Connected to DLNA device: {self.name}")
+            # Have state changes pushed when possible; polling covers the rest
+            await self._subscribe_events()
+
+            logger.info("Connected to DLNA device: %s", self.name)
             return True
 
         except DLNAClientError as e:
-            logger.error(f"Failed to connect to DLNA device: {e}")
+            logger.error("Failed to connect to DLNA device: %s", e)
             return False
         except Exception as e:
-            logger.error(f"Unexpected error connecting to DLNA: {e}", exc_info=True)
+            logger.error("Unexpected error connecting to DLNA: %s", e, exc_info=True)
             return False
 
+    async def _subscribe_events(self) -> None:
+        """Subscribe to AVTransport events, delivered through the proxy server."""
+        if not self._proxy_server or not self._client:
+            return
+        device_info = self._client.device_info
+        if not device_info or not device_info.av_transport_event_url:
+            return
+
+        self._proxy_server.set_event_handler(self._handle_upnp_event)
+        result = await self._client.subscribe_transport_events(
+            self._proxy_server.event_callback_url
+        )
+        if not result:
+            logger.debug("AVTransport event subscription failed, polling state")
+            self._proxy_server.set_event_handler(None)
+            return
+
+        self._event_sid, timeout = result
+        self._event_renew_task = asyncio.create_task(self._renew_events_loop(timeout))
+        logger.debug("Subscribed to AVTransport events (%s, %ds)", self._event_sid, timeout)
+
+    async def _renew_events_loop(self, timeout: int) -> None:
+        """Keep the event subscription alive, falling back to polling if it lapses."""
+        while self._is_connected and self._client and self._proxy_server:
+            await asyncio.sleep(timeout * EVENT_RENEW_FRACTION)
+            result = await self._client.subscribe_transport_events(
+                self._proxy_server.event_callback_url, sid=self._event_sid
+            )
+            if not result:
+                # The device may have dropped the subscription: start a new one
+                result = await self._client.subscribe_transport_events(
+                    self._proxy_server.event_callback_url
+                )
+            if not result:
+                logger.debug("AVTransport event subscription lost, polling state")
+                self._event_sid = None
+                self._event_state = None
+                return
+            self._event_sid, timeout = result
+
+    async def _unsubscribe_events(self) -> None:
+        """Cancel the event subscription, if any."""
+        if self._event_renew_task:
+            self._event_renew_task.cancel()
+            try:
+                await self._event_renew_task
+            except asyncio.CancelledError:
+                pass
+            self._event_renew_task = None
+        if self._proxy_server:
+            self._proxy_server.set_event_handler(None)
+        if self._event_sid and self._client:
+            await self._client.unsubscribe_transport_events(self._event_sid)
+        self._event_sid = None
+        self._event_state = None
+
+    def _handle_upnp_event(self, sid: str, body: bytes) -> None:
+        """Record a pushed transport state and wake the poll loop to act on it."""
+        if not sid or sid != self._event_sid:
+            return
+        state = parse_transport_event(body)
+        if state:
+            logger.debug("AVTransport event: %s", state)
+            self._event_state = state
+            self._poll_wakeup.set()
+
+    def _confirm_state(self) -> None:
+        """Wake the poll loop to read the device state after a command."""
+        # Any pushed state may predate the command, so query the device
+        self._state_checked_at = float("-inf")
+        self._poll_wakeup.set()
+
+    async def _query_transport_state(self) -> Optional[str]:
+        """
+        Get the transport state for a poll tick.
+
+        Uses the last pushed event state while subscribed, querying the device
+        only every EVENT_STATE_CHECK_INTERVAL_SECONDS as a safety net.
+        """
+        if (
+            self._event_state is not None
+            and time.monotonic() - self._state_checked_at < EVENT_STATE_CHECK_INTERVAL_SECONDS
+        ):
+            return self._event_state
+
+        assert self._client is not None
+        state = await self._single_flight("transport", self._client.get_transport_info)
+        self._state_checked_at = time.monotonic()
+        if self._event_state is not None and state:
+            self._event_state = state
+        return state
+
     async def _discover_capabilities(self, device_info) -> None:
         """Query and parse device capabilities."""
         # Check cache first
         device_id = device_info.udn or self._ip
         cached = _capability_cache.get(device_id)
         if cached:
-            logger.debug(f"Using cached capabilities for {device_id}")
+            logger.debug("Using cached capabilities for %s", device_id)
             self._capabilities = cached
             return
 
@@ -164,19 +354,22 @@ class DLNABackend(AudioBackend):
                 logger.debug("GetProtocolInfo not supported, using defaults")
                 self._capabilities = None
         except Exception as e:
-            logger.warning(f"Failed to discover capabilities: {e}")
+            logger.warning("Failed to discover capabilities: %s", e)
             self._capabilities = None
 
     async def disconnect(self) -> None:
         """Disconnect from DLNA device."""
         self._is_connected = False
 
-        if self._poll_task:
-            self._poll_task.cancel()
-            try:
-                await self._poll_task
-            except asyncio.CancelledError:
-                pass
+        await self._unsubscribe_events()
+
+        for task in (self._poll_task, self._dispatcher_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
 
         if self._client:
             # Stop playback before disconnecting
@@ -186,7 +379,7 @@ class DLNABackend(AudioBackend):
                 pass
             await self._client.disconnect()
 
-        logger.info(f"Disconnected from DLNA device: {self.name}")
+        logger.info("Disconnected from DLNA device: %s", self.name)
 
     # =========================================================================
     # Playback Control
@@ -200,10 +393,11 @@ class DLNABackend(AudioBackend):
         self._current_metadata = metadata
         self._duration_ms = metadata.duration_ms
 
-        # Determine content type from URL or default to FLAC
-        content_type = "audio/flac"
-        if ".mp3" in url.lower() or "format=5" in url.lower():
-            content_type = "audio/mpeg"
+        # Use the known stream format; fall back to sniffing the URL
+        content_type = metadata.content_type
+        if not content_type:
+            content_type = "audio/mpeg" if _MP3_RE.search(url) else "audio/flac"
+            logger.debug("No content type in metadata, detected %s from URL", content_type)
 
         # Register with proxy server if available
         actual_url = url
@@ -213,7 +407,7 @@ class DLNABackend(AudioBackend):
                 qobuz_url=url,
                 content_type=content_type,
             )
-            logger.debug(f"Using proxy URL: {actual_url}")
+            logger.debug("Using proxy URL: %s", actual_url)
 
         # Build DIDL-Lite metadata
         didl = self._build_didl(actual_url, metadata, content_type)
@@ -222,9 +416,12 @@ class DLNABackend(AudioBackend):
         if await self._client.set_av_transport_uri(actual_url, didl):
             if await self._client.play():
                 self._position_ms = 0
+                self._buffered_position_ms = 0
+                self._pos_anchor_ts = None
                 self._playback_started_at = time.monotonic()
                 self._notify_state_change(PlaybackState.PLAYING)
-                logger.info(f"Playing: {metadata.artist} - {metadata.title}")
+                self._confirm_state()
+                logger.info("Playing: %s - %s", metadata.artist, metadata.title)
             else:
                 self._notify_playback_error("Failed to start playback")
         else:
@@ -233,19 +430,25 @@ class DLNABackend(AudioBackend):
     async def pause(self) -> None:
         """Pause playback."""
         if self._client and await self._client.pause():
+            self._pos_anchor_ts = None
             self._notify_state_change(PlaybackState.PAUSED)
+            self._confirm_state()
 
     async def resume(self) -> None:
         """Resume playback."""
         if self._client and await self._client.play():
+            self._pos_anchor_ts = None
             self._notify_state_change(PlaybackState.PLAYING)
+            self._confirm_state()
 
     async def stop(self) -> None:
         """Stop playback."""
         if self._client and await self._client.stop():
             self._position_ms = 0
+            self._pos_anchor_ts = None
             self._playback_started_at = 0.0  # Clear grace period
             self._notify_state_change(PlaybackState.STOPPED)
+            self._confirm_state()
 
     # =========================================================================
     # Position Control
@@ -255,15 +458,24 @@ class DLNABackend(AudioBackend):
         """Seek to position."""
         if self._client and await self._client.seek(position_ms):
             self._position_ms = position_ms
+            self._buffered_position_ms = position_ms
+            self._pos_anchor_ts = None
             self._notify_position_update(position_ms)
+            self._confirm_state()
 
     async def get_position(self) -> int:
-        """Get current position."""
+        """Get current position (extrapolated while playing, re-read when stale)."""
+        if not self._position_resync_due():
+            return self._extrapolated_position()
+
         if self._client:
-            pos = await self._client.get_position_info()
+            pos = await self._single_flight("position", self._client.get_position_info)
+            if pos == 0 and self._in_start_grace_period():
+                # Still buffering: report where playback is about to be
+                return self._buffered_position_ms
             if pos is not None:
-                self._position_ms = pos
-                logger.debug(f"DLNA position: {pos}ms")
+                self._set_position_anchor(pos)
+                logger.debug("DLNA position: %dms", pos)
             else:
                 logger.debug("DLNA position: None returned")
         return self._position_ms
@@ -289,7 +501,7 @@ class DLNABackend(AudioBackend):
             return 100
 
         if self._client:
-            vol = await self._client.get_volume()
+            vol = await self._single_flight("volume", self._client.get_volume)
             if vol is not None:
                 self._volume = vol
         return self._volume
@@ -303,16 +515,15 @@ class DLNABackend(AudioBackend):
         if not self._client:
             return PlaybackState.STOPPED
 
-        state_str = await self._client.get_transport_info()
-        if state_str:
-            if state_str == "PLAYING":
-                return PlaybackState.PLAYING
-            elif state_str == "PAUSED_PLAYBACK":
-                return PlaybackState.PAUSED
-            elif state_str == "TRANSITIONING":
-                return PlaybackState.LOADING
+        state_str = await self._single_flight("transport", self._client.get_transport_info)
+        return self._parse_state(state_str)
 
-        return PlaybackState.STOPPED
+    @staticmethod
+    def _parse_state(state_str: Optional[str]) -> PlaybackState:
+        """Map a UPnP CurrentTransportState value to a PlaybackState."""
+        if not state_str:
+            return PlaybackState.STOPPED
+        return _TRANSPORT_STATE_MAP.get(state_str, PlaybackState.STOPPED)
 
     async def get_buffer_status(self) -> BufferStatus:
         """Get buffer status (always OK for DLNA)."""
@@ -362,31 +573,171 @@ class DLNABackend(AudioBackend):
             return self._capabilities.max_quality
         return None
 
+    # =========================================================================
+    # Event Dispatch
+    # =========================================================================
+
+    def _notify_state_change(self, state: PlaybackState) -> None:
+        """Update state now; the listener is called from the dispatcher task."""
+        if state != self._state:
+            self._state = state
+            self._enqueue_event("state", state)
+
+    def _notify_position_update(self, position_ms: int) -> None:
+        """Queue a position update for the dispatcher task."""
+        self._enqueue_event("position", position_ms)
+
+    def _notify_track_ended(self) -> None:
+        """Queue a track-ended event for the dispatcher task."""
+        self._enqueue_event("track_ended", None)
+
+    def _notify_playback_error(self, message: str) -> None:
+        """Queue a playback error for the dispatcher task."""
+        self._enqueue_event("error", message)
+
+    async def _single_flight(self, key: str, query: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a read-only device query, sharing one request among concurrent callers.
+
+        The poll loop and API requests often ask for the same transport or
+        position info at once; many renderers handle overlapping SOAP calls
+        poorly, so a duplicate call awaits the request already in flight.
+        The shared request is shielded so one caller's cancellation does not
+        fail the others.
+        """
+        task: Optional[asyncio.Future[T]] = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(query())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def _set_position_anchor(self, position_ms: int) -> None:
+        """Record a position read from the device as the extrapolation anchor."""
+        self._position_ms = position_ms
+        self._pos_anchor_ms = position_ms
+        self._pos_anchor_ts = time.monotonic()
+
+    def _position_resync_due(self) -> bool:
+        """Check if the position must be read from the device rather than extrapolated."""
+        return (
+            self._state != PlaybackState.PLAYING
+            or self._pos_anchor_ts is None
+            or time.monotonic() - self._pos_anchor_ts >= POSITION_RESYNC_INTERVAL_SECONDS
+        )
+
+    def _extrapolated_position(self) -> int:
+        """Estimate the current position from the last position read from the device."""
+        if self._pos_anchor_ts is None:
+            return self._position_ms
+        pos = self._pos_anchor_ms + int((time.monotonic() - self._pos_anchor_ts) * 1000)
+        if self._duration_ms > 0:
+            pos = min(pos, self._duration_ms)
+        self._position_ms = pos
+        return pos
+
+    def _in_start_grace_period(self) -> bool:
+        """Check if playback was started too recently to trust STOPPED / zero positions."""
+        return time.monotonic() - self._playback_started_at < PLAYBACK_START_GRACE_PERIOD_SECONDS
+
+    def _report_polled_position(self, position_ms: int) -> None:
+        """Report a polled position unless it is a redundant repeat of the last one."""
+        now = time.monotonic()
+        if (
+            abs(position_ms - self._last_pos_emit_ms) < POSITION_EMIT_MIN_DELTA_MS
+            and now - self._last_pos_emit_time < POSITION_EMIT_MIN_INTERVAL_SECONDS
+        ):
+            return
+        self._last_pos_emit_ms = position_ms
+        self._last_pos_emit_time = now
+        self._notify_position_update(position_ms)
+
+    def _enqueue_event(self, kind: str, payload: Any) -> None:
+        """
+        Queue an event without blocking the caller.
+
+        When the queue is full, a new position update is dropped (a fresher
+        one follows on the next poll); any other event evicts the oldest.
+        """
+        try:
+            self._events.put_nowait((kind, payload))
+        except asyncio.QueueFull:
+            if kind == "position":
+                logger.debug("Event queue full, dropping position update")
+                return
+            dropped = self._events.get_nowait()
+            logger.warning("Event queue full, dropped %s event", dropped[0])
+            self._events.put_nowait((kind, payload))
+
+    async def _dispatch_events_loop(self) -> None:
+        """Deliver queued events to the registered callbacks, in order."""
+        while True:
+            kind, payload = await self._events.get()
+            if kind == "state":
+                self._safe_call(self._on_state_change, payload, name="State change")
+            elif kind == "position":
+                self._safe_call(self._on_position_update, payload, name="Position update")
+            elif kind == "track_ended":
+                self._safe_call(self._on_track_ended, name="Track ended")
+            elif kind == "error":
+                self._safe_call(self._on_playback_error, payload, name="Playback error")
+
     # =========================================================================
     # Internal
     # =========================================================================
 
     async def _poll_state_loop(self) -> None:
-        """Poll device state periodically."""
+        """
+        Poll device state periodically.
+
+        The interval adapts to the current state (see STATE_POLL_INTERVALS);
+        playback commands set _poll_wakeup so their effect is confirmed
+        without waiting out a long idle interval.
+        """
         while self._is_connected:
             try:
-                await asyncio.sleep(STATE_POLL_INTERVAL_SECONDS)
-
-                if not self._is_connected:
+                interval = STATE_POLL_INTERVALS.get(self._state, STATE_POLL_INTERVAL_SECONDS)
+                try:
+                    await asyncio.wait_for(self._poll_wakeup.wait(), timeout=interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._poll_wakeup.clear()
+
+                if not self._is_connected or not self._client:
                     break
 
-                # Get state from device
-                new_state = await self.get_state()
+                # Get state from device. While (likely) playing and the
+                # extrapolated position is due a resync, fetch the position
+                # concurrently so a tick costs one round-trip, not two.
+                # Position is only polled while someone listens for it.
+                track_position = self._on_position_update is not None
+                pos: Optional[int] = None
+                if (
+                    track_position
+                    and self._state in (PlaybackState.PLAYING, PlaybackState.LOADING)
+                    and self._position_resync_due()
+                ):
+                    state_str, pos_result = await asyncio.gather(
+                        self._query_transport_state(),
+                        self._single_flight("position", self._client.get_position_info),
+                        return_exceptions=True,
+                    )
+                    if isinstance(state_str, BaseException):
+                        raise state_str
+                    if isinstance(pos_result, int):
+                        pos = pos_result
+                else:
+                    state_str = await self._query_transport_state()
+                new_state = self._parse_state(state_str)
 
                 # Check if we're in the grace period after starting playback
-                in_grace_period = (
-                    time.monotonic() - self._playback_started_at
-                    < PLAYBACK_START_GRACE_PERIOD_SECONDS
-                )
+                # (one clock read per tick, taken once the device has answered)
+                since_start = time.monotonic() - self._playback_started_at
+                in_grace_period = since_start < PLAYBACK_START_GRACE_PERIOD_SECONDS
 
                 # Detect state changes
                 if new_state != self._state:
-                    logger.debug(f"State changed: {self._state} -> {new_state}")
+                    logger.debug("State changed: %s -> %s", self._state, new_state)
 
                     # Check for track end before updating state
                     if self._state == PlaybackState.PLAYING and new_state == PlaybackState.STOPPED:
@@ -394,24 +745,46 @@ class DLNABackend(AudioBackend):
                             # During grace period, ignore STOPPED state entirely
                             # This prevents false track-ended events while device is loading
                             logger.debug(
-                                f"Ignoring STOPPED state during grace period "
-                                f"(started {time.monotonic() - self._playback_started_at:.1f}s ago)"
+                                "Ignoring STOPPED state during grace period (started %.1fs ago)",
+                                since_start,
                             )
                             continue  # Skip state update entirely
                         else:
                             self._notify_track_ended()
 
+                    if new_state != PlaybackState.PLAYING:
+                        self._pos_anchor_ts = None
                     self._notify_state_change(new_state)
 
-                # Update position while playing
-                if new_state == PlaybackState.PLAYING:
-                    pos = await self.get_position()
-                    self._notify_position_update(pos)
+                # Update position while playing (never while LOADING, and not
+                # the spurious 0 many devices report right after starting)
+                if track_position and new_state == PlaybackState.PLAYING:
+                    from_device = pos is not None or self._position_resync_due()
+                    if pos is None:
+                        if from_device:
+                            pos = await self._single_flight(
+                                "position", self._client.get_position_info
+                            )
+                        else:
+                            pos = self._extrapolated_position()
+
+                    if pos == 0 and in_grace_period:
+                        logger.debug("Ignoring zero position while device starts playback")
+                    elif pos is not None:
+                        if from_device:
+                            self._set_position_anchor(pos)
+                        self._report_polled_position(pos)
 
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.debug(f"State poll error: {e}")
+                logger.debug("State poll error: %s", e)
+
+    def _protocol_info_for(self, content_type: str) -> str:
+        """Build the protocolInfo string for a content type from the device capabilities."""
+        if self._capabilities:
+            return build_protocol_info(self._capabilities, content_type)
+        return f"http-get:*:{content_type}:*"
 
     def _build_didl(
         self,
@@ -419,38 +792,32 @@ class DLNABackend(AudioBackend):
         metadata: BackendTrackMetadata,
         content_type: str = "audio/flac",
     ) -> str:
-        """Build DIDL-Lite metadata XML."""
-
-        def escape(s: str) -> str:
-            return (
-                s.replace("&", "&amp;")
-                .replace("<", "&lt;")
-                .replace(">", "&gt;")
-                .replace('"', "&quot;")
-            )
+        """Build DIDL-Lite metadata XML (the last result is reused for the same track/URL)."""
+        protocol_info = self._protocol_info_cache.get(content_type)
+        if protocol_info is None:
+            protocol_info = self._protocol_info_for(content_type)
+            self._protocol_info_cache[content_type] = protocol_info
 
-        # Build protocol info string based on capabilities
-        if self._capabilities:
-            protocol_info = build_protocol_info(self._capabilities, content_type)
-        else:
-            protocol_info = f"http-get:*:{content_type}:*"
+        key = (metadata.track_id, url, protocol_info)
+        if self._didl_cache and self._didl_cache[0] == key:
+            return self._didl_cache[1]
 
-        didl = f"""<DIDL-Lite xmlns="urn:schemas-upnp-org:metadata-1-0/DIDL-Lite/"
-                   xmlns:dc="http://purl.org/dc/elements/1.1/"
-                   xmlns:upnp="urn:schemas-upnp-org:metadata-1-0/upnp/">
+        didl = f"""{_DIDL_HEADER}
     <item id="1" parentID="0" restricted="1">
-        <dc:title>{escape(metadata.title)}</dc:title>
-        <dc:creator>{escape(metadata.artist)}</dc:creator>
-        <upnp:artist>{escape(metadata.artist)}</upnp:artist>
-        <upnp:album>{escape(metadata.album)}</upnp:album>
+        <dc:title>{_xml_escape(metadata.title)}</dc:title>
+        <dc:creator>{_xml_escape(metadata.artist)}</dc:creator>
+        <upnp:artist>{_xml_escape(metadata.artist)}</upnp:artist>
+        <upnp:album>{_xml_escape(metadata.album)}</upnp:album>
         <upnp:class>object.item.audioItem.musicTrack</upnp:class>"""
 
         if metadata.artwork_url:
-            didl += f"\n        <upnp:albumArtURI>{escape(metadata.artwork_url)}</upnp:albumArtURI>"
+            artwork_url = _xml_escape(metadata.artwork_url)
+            didl += f"\n        <upnp:albumArtURI>{artwork_url}</upnp:albumArtURI>"
 
         didl += f"""
-        <res protocolInfo="{escape(protocol_info)}">{escape(url)}</res>
+        <res protocolInfo="{_xml_escape(protocol_info)}">{_xml_escape(url)}</res>
     </item>
 </DIDL-Lite>"""
 
+        self._didl_cache = (key, didl)
         return didl
@@ -7,11 +7,18 @@ and maps capabilities to Qobuz quality levels.
 
 from __future__ import annotations
 
+import copy
+import heapq
+import json
 import logging
+import os
 import re
 import time
-from dataclasses import dataclass, field
-from typing import Optional
+from dataclasses import asdict, dataclass, field, fields
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Mapping, NamedTuple, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -21,8 +28,11 @@ QOBUZ_QUALITY_CD = 6
 QOBUZ_QUALITY_96K = 7
 QOBUZ_QUALITY_192K = 27
 
+# On-disk capability cache, so known renderers skip GetProtocolInfo on startup
+CAPABILITY_CACHE_FILE = Path.home() / ".qobuz-proxy" / "dlna_capabilities.json"
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class DlnaProtocolInfoEntry:
     """Single parsed protocolInfo entry from GetProtocolInfo Sink."""
 
@@ -37,9 +47,10 @@ class DlnaProtocolInfoEntry:
     sample_rate: Optional[int] = None
     bit_depth: Optional[int] = None
     channels: Optional[int] = None
+    raw_additional: str = ""  # additional-info field as received
 
 
-@dataclass
+@dataclass(slots=True)
 class DLNACapabilities:
     """Parsed device capabilities from GetProtocolInfo."""
 
@@ -48,21 +59,52 @@ class DLNACapabilities:
     supports_mp3: bool = True  # Assume baseline MP3 support
     max_sample_rate: int = 44100
     max_bit_depth: int = 16
+    # Derived in __post_init__ (not constructor arguments, left out of to_dict())
+    max_quality: int = field(init=False, compare=False, default=QOBUZ_QUALITY_MP3)
+    _by_mime: dict[str, tuple[DlnaProtocolInfoEntry, ...]] = field(
+        init=False, compare=False, repr=False, default_factory=dict
+    )
+
+    def __post_init__(self) -> None:
+        # Entries indexed by mime type
+        by_mime: dict[str, list[DlnaProtocolInfoEntry]] = {}
+        for entry in self.entries:
+            by_mime.setdefault(entry.mime, []).append(entry)
+        self._by_mime = {mime: tuple(entries) for mime, entries in by_mime.items()}
+        self._recompute_quality()
+
+    def _recompute_quality(self) -> None:
+        """
+        Map capabilities to Qobuz quality level (conservative).
 
-    @property
-    def max_quality(self) -> int:
-        """Map capabilities to Qobuz quality level (conservative)."""
+        Stored in max_quality; call again after changing the capability fields.
+        """
         if not self.supports_flac:
-            return QOBUZ_QUALITY_MP3
-        if self.max_bit_depth >= 24 and self.max_sample_rate >= 192000:
-            return QOBUZ_QUALITY_192K
-        if self.max_bit_depth >= 24 and self.max_sample_rate >= 96000:
-            return QOBUZ_QUALITY_96K
-        return QOBUZ_QUALITY_CD
-
-    def by_mime(self, mime: str) -> list[DlnaProtocolInfoEntry]:
+            quality = QOBUZ_QUALITY_MP3
+        elif self.max_bit_depth >= 24 and self.max_sample_rate >= 192000:
+            quality = QOBUZ_QUALITY_192K
+        elif self.max_bit_depth >= 24 and self.max_sample_rate >= 96000:
+            quality = QOBUZ_QUALITY_96K
+        else:
+            quality = QOBUZ_QUALITY_CD
+        self.max_quality = quality
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to a JSON-serializable dict."""
+        data = {f.name: getattr(self, f.name) for f in fields(self) if f.init}
+        data["entries"] = [asdict(e) for e in self.entries]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> DLNACapabilities:
+        """Create from a dict produced by to_dict()."""
+        kwargs = dict(data)
+        kwargs["entries"] = [DlnaProtocolInfoEntry(**e) for e in data.get("entries", [])]
+        return cls(**kwargs)
+
+    def by_mime(self, mime: str) -> tuple[DlnaProtocolInfoEntry, ...]:
         """Get all entries matching a mime type."""
-        return [e for e in self.entries if e.mime == mime]
+        return self._by_mime.get(mime, ())
 
     def best_entry_for_media(
         self,
@@ -71,27 +113,38 @@ class DLNACapabilities:
         bit_depth: Optional[int] = None,
     ) -> Optional[DlnaProtocolInfoEntry]:
         """Find best matching Sink entry for the media to serve."""
-        candidates = []
-        for e in self.by_mime(mime):
+        best: Optional[DlnaProtocolInfoEntry] = None
+        best_key = (-1, -1)
+        for e in self._by_mime.get(mime, ()):
             if sample_rate and e.sample_rate and e.sample_rate < sample_rate:
                 continue
             if bit_depth and e.bit_depth and e.bit_depth < bit_depth:
                 continue
-            candidates.append(e)
-        if not candidates:
-            return None
-        # Prefer entries with profile annotation
-        return max(candidates, key=lambda e: (1 if e.profile else 0, e.sample_rate or 0))
+            # Prefer entries with profile annotation, then higher sample rate
+            key = (1 if e.profile else 0, e.sample_rate or 0)
+            if key > best_key:
+                best_key, best = key, e
+        return best
+
 
+class ProfileQuality(NamedTuple):
+    """Quality implied by a DLNA.ORG_PN profile."""
 
-# DLNA profile quality mapping (conservative)
-DLNA_PROFILE_QUALITY = {
-    "FLAC": (QOBUZ_QUALITY_CD, 16, 44100),
-    "FLAC_24": (QOBUZ_QUALITY_96K, 24, 96000),
-    "FLAC_96": (QOBUZ_QUALITY_96K, 24, 96000),
-    "FLAC_192": (QOBUZ_QUALITY_192K, 24, 192000),
-    "MP3": (QOBUZ_QUALITY_MP3, 16, 44100),
-}
+    quality: int
+    bit_depth: int
+    sample_rate: int
+
+
+# DLNA profile quality mapping (conservative, read-only)
+DLNA_PROFILE_QUALITY: Mapping[str, ProfileQuality] = MappingProxyType(
+    {
+        "FLAC": ProfileQuality(QOBUZ_QUALITY_CD, 16, 44100),
+        "FLAC_24": ProfileQuality(QOBUZ_QUALITY_96K, 24, 96000),
+        "FLAC_96": ProfileQuality(QOBUZ_QUALITY_96K, 24, 96000),
+        "FLAC_192": ProfileQuality(QOBUZ_QUALITY_192K, 24, 192000),
+        "MP3": ProfileQuality(QOBUZ_QUALITY_MP3, 16, 44100),
+    }
+)
 
 
 def parse_protocol_info_sink(sink: str) -> DLNACapabilities:
@@ -104,27 +157,54 @@ def parse_protocol_info_sink(sink: str) -> DLNACapabilities:
     Example entry:
     http-get:*:audio/flac:DLNA.ORG_PN=FLAC;DLNA.ORG_OP=01;DLNA.ORG_FLAGS=01700000000000000000000000000000
 
+    Parsing is memoized per Sink string: each call returns a shallow copy of
+    the interned result (device overrides mutate it), with its own entries
+    list but sharing the frozen entries and the mime index.
+
     Args:
         sink: The Sink string from GetProtocolInfo response
 
     Returns:
         Parsed DLNACapabilities object
     """
-    caps = DLNACapabilities()
     if not sink:
-        return caps
+        return DLNACapabilities()
+
+    template = _KNOWN_SINKS.get(sink) or _parse_sink(sink)
+    caps = copy.copy(template)
+    caps.entries = list(caps.entries)
+
+    logger.info(
+        "Parsed capabilities: FLAC=%s, max_sr=%dHz, max_bd=%dbit, quality=%d",
+        caps.supports_flac,
+        caps.max_sample_rate,
+        caps.max_bit_depth,
+        caps.max_quality,
+    )
+    return caps
+
+
+@lru_cache(maxsize=256)
+def _parse_sink(sink: str) -> DLNACapabilities:
+    """Parse a Sink string; the result is interned and must not be modified."""
+    defaults = DLNACapabilities()
+    entries: list[DlnaProtocolInfoEntry] = []
+    supports_flac = defaults.supports_flac
+    supports_mp3 = defaults.supports_mp3
+    max_sample_rate = defaults.max_sample_rate
+    max_bit_depth = defaults.max_bit_depth
 
     for raw_entry in sink.split(","):
         raw_entry = raw_entry.strip()
         if not raw_entry:
             continue
 
-        parts = raw_entry.split(":")
+        # The additional-info field may itself contain ':', so split at most 3 times
+        parts = raw_entry.split(":", 3)
         if len(parts) < 4:
             continue
 
-        protocol, network, content_format = parts[0], parts[1], parts[2]
-        additional_str = ":".join(parts[3:])
+        protocol, network, content_format, additional_str = parts
         additional = _parse_additional(additional_str)
 
         profile = additional.get("DLNA.ORG_PN")
@@ -132,69 +212,86 @@ def parse_protocol_info_sink(sink: str) -> DLNACapabilities:
         flags_str = additional.get("DLNA.ORG_FLAGS")
         flags = int(flags_str, 16) if flags_str else None
 
-        mime = content_format.split(";")[0].strip().lower()
-        sr, bd, ch = _parse_format_params(content_format, additional)
+        content_format_lc = content_format.lower()
+        mime = content_format_lc.partition(";")[0].strip()
+        # Only L16 formats and entries with hint tokens carry format parameters
+        is_l16 = content_format_lc.startswith("audio/l16")
+        if is_l16 or not _FORMAT_HINT_KEYS.isdisjoint(additional):
+            sr, bd, ch = _parse_format_params(content_format_lc, additional)
+        else:
+            sr = bd = ch = None
 
         # Apply profile hints if no explicit params
-        if profile and profile in DLNA_PROFILE_QUALITY:
-            _, profile_bd, profile_sr = DLNA_PROFILE_QUALITY[profile]
-            sr = sr or profile_sr
-            bd = bd or profile_bd
-
-        entry = DlnaProtocolInfoEntry(
-            protocol=protocol,
-            network=network,
-            content_format=content_format,
-            additional=additional,
-            profile=profile,
-            op=op,
-            flags=flags,
-            mime=mime,
-            sample_rate=sr,
-            bit_depth=bd,
-            channels=ch,
+        profile_quality = DLNA_PROFILE_QUALITY.get(profile) if profile else None
+        if profile_quality:
+            sr = sr or profile_quality.sample_rate
+            bd = bd or profile_quality.bit_depth
+
+        entries.append(
+            DlnaProtocolInfoEntry(
+                protocol=protocol,
+                network=network,
+                content_format=content_format,
+                additional=additional,
+                profile=profile,
+                op=op,
+                flags=flags,
+                mime=mime,
+                sample_rate=sr,
+                bit_depth=bd,
+                channels=ch,
+                raw_additional=additional_str.strip(),
+            )
         )
-        caps.entries.append(entry)
 
         # Update capability flags
         if mime == "audio/flac":
-            caps.supports_flac = True
-            caps.max_sample_rate = max(caps.max_sample_rate, sr or 44100)
-            caps.max_bit_depth = max(caps.max_bit_depth, bd or 16)
+            supports_flac = True
+            max_sample_rate = max(max_sample_rate, sr or 44100)
+            max_bit_depth = max(max_bit_depth, bd or 16)
         elif mime == "audio/mpeg":
-            caps.supports_mp3 = True
-
-    logger.info(
-        f"Parsed capabilities: FLAC={caps.supports_flac}, "
-        f"max_sr={caps.max_sample_rate}Hz, max_bd={caps.max_bit_depth}bit, "
-        f"quality={caps.max_quality}"
+            supports_mp3 = True
+
+    return DLNACapabilities(
+        entries=entries,
+        supports_flac=supports_flac,
+        supports_mp3=supports_mp3,
+        max_sample_rate=max_sample_rate,
+        max_bit_depth=max_bit_depth,
     )
-    return caps
 
 
 def _parse_additional(s: str) -> dict[str, str]:
     """Parse DLNA additional info tokens."""
     tokens: dict[str, str] = {}
-    for match in re.finditer(r"(?P<k>[^=;]+)=(?P<v>[^;]*)", s):
-        tokens[match.group("k").strip()] = match.group("v").strip()
+    for token in s.split(";"):
+        key, sep, value = token.partition("=")
+        key = key.strip()
+        if sep and key:
+            tokens[key] = value.strip()
     return tokens
 
 
+# Additional-info tokens that carry sample rate / bit depth hints
+_FORMAT_HINT_KEYS = frozenset({"sampleRate", "samplerate", "bitsPerSample", "bitdepth"})
+
+
 def _parse_format_params(
-    content_format: str, additional: dict[str, str]
+    content_format_lc: str, additional: dict[str, str]
 ) -> tuple[Optional[int], Optional[int], Optional[int]]:
-    """Extract sample rate, bit depth, channels from format string or tokens."""
+    """Extract sample rate, bit depth, channels from lower-cased format string or tokens."""
     sr: Optional[int] = None
     bd: Optional[int] = None
     ch: Optional[int] = None
 
     # Check L16 params: audio/L16;rate=44100;channels=2
-    if "audio/l16" in content_format.lower():
+    if content_format_lc.startswith("audio/l16"):
         bd = 16
-        for part in content_format.split(";")[1:]:
-            if "=" in part:
-                k, v = part.split("=", 1)
-                k = k.strip().lower()
+        params = content_format_lc.partition(";")[2]
+        for part in params.split(";"):
+            k, sep, v = part.partition("=")
+            if sep:
+                k = k.strip()
                 if k == "rate":
                     sr = int(v.strip())
                 elif k == "channels":
@@ -217,6 +314,18 @@ def _try_int(v: Optional[str]) -> Optional[int]:
         return None
 
 
+# Baseline Sink strings reported verbatim by many simple renderers; parsed
+# once at import so they never depend on the LRU cache
+_COMMON_SINKS = (
+    "http-get:*:audio/mpeg:*",
+    "http-get:*:audio/flac:*",
+    "http-get:*:audio/mpeg:*,http-get:*:audio/flac:*",
+    "http-get:*:audio/flac:*,http-get:*:audio/mpeg:*",
+    "http-get:*:audio/mpeg:*,http-get:*:audio/flac:*,http-get:*:audio/wav:*",
+)
+_KNOWN_SINKS = {sink: _parse_sink.__wrapped__(sink) for sink in _COMMON_SINKS}
+
+
 def build_protocol_info(
     caps: DLNACapabilities,
     mime: str,
@@ -237,19 +346,31 @@ def build_protocol_info(
     """
     entry = caps.best_entry_for_media(mime, sr, bd)
     if entry:
-        # Re-emit exact Sink entry for compatibility
-        add_str = (
-            ";".join(f"{k}={v}" for k, v in entry.additional.items()) if entry.additional else "*"
-        )
+        # Re-emit exact Sink entry for compatibility (entries restored from an
+        # older capability cache have no raw field and are re-joined)
+        add_str = entry.raw_additional
+        if not add_str:
+            add_str = (
+                ";".join(f"{k}={v}" for k, v in entry.additional.items())
+                if entry.additional
+                else "*"
+            )
         return f"{entry.protocol}:{entry.network}:{entry.content_format}:{add_str}"
     # Generic fallback
     return f"http-get:*:{mime}:DLNA.ORG_OP=01"
 
 
-# Known device limitations
-DEVICE_OVERRIDES: dict[str, dict[str, int]] = {
-    "Sonos": {"max_sample_rate": 48000, "max_bit_depth": 16},
-}
+# Known device limitations (read-only)
+DEVICE_OVERRIDES: Mapping[str, Mapping[str, int]] = MappingProxyType(
+    {
+        "Sonos": MappingProxyType({"max_sample_rate": 48000, "max_bit_depth": 16}),
+    }
+)
+
+# All override patterns folded into one search over the lower-cased
+# "manufacturer model" string (the earliest match applies)
+_OVERRIDE_PATTERNS = {pattern.lower(): pattern for pattern in DEVICE_OVERRIDES}
+_OVERRIDE_RE = re.compile("|".join(re.escape(p) for p in _OVERRIDE_PATTERNS))
 
 
 def apply_device_overrides(caps: DLNACapabilities, manufacturer: str, model: str) -> None:
@@ -264,22 +385,24 @@ def apply_device_overrides(caps: DLNACapabilities, manufacturer: str, model: str
         manufacturer: Device manufacturer string
         model: Device model string
     """
-    device_str = f"{manufacturer} {model}".lower()
-    for pattern, overrides in DEVICE_OVERRIDES.items():
-        if pattern.lower() in device_str:
-            logger.info(f"Applying {pattern} overrides: {overrides}")
-            for k, v in overrides.items():
-                setattr(caps, k, v)
-            break
+    match = _OVERRIDE_RE.search(f"{manufacturer} {model}".lower())
+    if not match:
+        return
+    pattern = _OVERRIDE_PATTERNS[match.group(0)]
+    overrides = DEVICE_OVERRIDES[pattern]
+    logger.info("Applying %s overrides: %s", pattern, dict(overrides))
+    for k, v in overrides.items():
+        setattr(caps, k, v)
+    caps._recompute_quality()
 
 
 # Capability cache
-@dataclass
+@dataclass(slots=True)
 class CapabilityCacheEntry:
     """Cache entry for device capabilities."""
 
     capabilities: DLNACapabilities
-    fetched_at: float
+    expires_at: float  # time.monotonic() deadline
     device_id: str
 
 
@@ -287,18 +410,27 @@ class CapabilityCache:
     """
     Cache for DLNA device capabilities.
 
-    Capabilities are cached by device UUID for 24 hours by default.
+    Capabilities are cached by device UUID for 24 hours by default. With a
+    path, entries are also persisted to disk and loaded on first use, so they
+    survive restarts; a loaded entry keeps only what is left of its TTL.
     """
 
-    def __init__(self, ttl_seconds: int = 86400):
+    def __init__(self, ttl_seconds: int = 86400, path: Optional[Path] = None):
         """
         Initialize cache.
 
         Args:
             ttl_seconds: Time-to-live for cache entries (default 24 hours)
+            path: Optional JSON file to persist entries to
         """
         self._ttl = ttl_seconds
         self._entries: dict[str, CapabilityCacheEntry] = {}
+        # (expires_at, device_id) min-heap, swept on set() to evict stale entries
+        self._expiry: list[tuple[float, str]] = []
+        self._path = path
+        self._loaded = path is None
+        # Wall-clock time each entry was fetched from the device, for on-disk expiry
+        self._saved_at: dict[str, float] = {}
 
     def get(self, device_id: str) -> Optional[DLNACapabilities]:
         """
@@ -310,10 +442,11 @@ class CapabilityCache:
         Returns:
             Capabilities if cached and not expired, None otherwise
         """
+        self._ensure_loaded()
         entry = self._entries.get(device_id)
         if not entry:
             return None
-        if time.time() - entry.fetched_at > self._ttl:
+        if entry.expires_at < time.monotonic():
             self._entries.pop(device_id, None)
             return None
         return entry.capabilities
@@ -326,9 +459,11 @@ class CapabilityCache:
             device_id: Device UUID or IP
             caps: Capabilities to cache
         """
-        self._entries[device_id] = CapabilityCacheEntry(
-            capabilities=caps, fetched_at=time.time(), device_id=device_id
-        )
+        self._ensure_loaded()
+        self._sweep()
+        self._add_entry(device_id, caps)
+        self._saved_at[device_id] = time.time()
+        self._save()
 
     def invalidate(self, device_id: str) -> None:
         """
@@ -337,4 +472,72 @@ class CapabilityCache:
         Args:
             device_id: Device UUID or IP
         """
-        self._entries.pop(device_id, None)
+        self._ensure_loaded()
+        self._saved_at.pop(device_id, None)
+        if self._entries.pop(device_id, None):
+            self._save()
+
+    def _add_entry(
+        self, device_id: str, caps: DLNACapabilities, ttl: Optional[float] = None
+    ) -> None:
+        """Insert an entry expiring ttl (default: one full TTL) from now."""
+        expires_at = time.monotonic() + (self._ttl if ttl is None else ttl)
+        self._entries[device_id] = CapabilityCacheEntry(
+            capabilities=caps, expires_at=expires_at, device_id=device_id
+        )
+        heapq.heappush(self._expiry, (expires_at, device_id))
+
+    def _sweep(self) -> None:
+        """Evict expired entries (heap items for since-replaced entries are skipped)."""
+        now = time.monotonic()
+        while self._expiry and self._expiry[0][0] < now:
+            expires_at, device_id = heapq.heappop(self._expiry)
+            entry = self._entries.get(device_id)
+            if entry and entry.expires_at == expires_at:
+                del self._entries[device_id]
+                self._saved_at.pop(device_id, None)
+
+    def _ensure_loaded(self) -> None:
+        """Load persisted entries on first use."""
+        if self._loaded or self._path is None:
+            return
+        self._loaded = True
+        try:
+            if not self._path.exists():
+                return
+            data: dict[str, Any] = json.loads(self._path.read_text())
+            now = time.time()
+            for device_id, item in data.items():
+                saved_at = float(item["saved_at"])
+                remaining = self._ttl - (now - saved_at)
+                if remaining <= 0:
+                    continue
+                self._saved_at[device_id] = saved_at
+                caps = DLNACapabilities.from_dict(item["capabilities"])
+                self._add_entry(device_id, caps, remaining)
+            logger.debug("Loaded %d cached device capabilities", len(self._entries))
+        except Exception as e:
+            logger.warning("Failed to load cached device capabilities: %s", e)
+
+    def _save(self) -> None:
+        """Persist entries atomically (temp file, fsync, rename)."""
+        if self._path is None:
+            return
+        data = {
+            device_id: {
+                "saved_at": self._saved_at.get(device_id, time.time()),
+                "capabilities": entry.capabilities.to_dict(),
+            }
+            for device_id, entry in self._entries.items()
+        }
+        try:
+            if not self._path.parent.exists():
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(".json.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._path)
+        except Exception as e:
+            logger.warning("Failed to persist device capabilities: %s", e)
@@ -5,19 +5,27 @@ Low-level client for sending UPnP commands to DLNA devices.
 """
 
 import asyncio
+import json
 import logging
+import os
+import random
+import re
 import time
-import xml.etree.ElementTree as ET
 from dataclasses import dataclass
-from typing import Dict, Optional
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Union
+from xml.sax.saxutils import escape
 
 import aiohttp
 from aiohttp import ClientTimeout
 
+from .xml_parser import XML_PARSE_ERRORS, child_text, find_text, iter_elements, parse_xml
+
 logger = logging.getLogger(__name__)
 
-# Minimum interval between volume commands (ms) to avoid overwhelming device
-VOLUME_MIN_INTERVAL_MS = 200
+# Minimum interval between volume commands (seconds) to avoid overwhelming device
+VOLUME_MIN_INTERVAL_SECONDS = 0.2
 
 # SOAP constants
 SOAP_ENVELOPE_NS = "http://schemas.xmlsoap.org/soap/envelope/"
@@ -25,10 +33,171 @@ UPNP_AV_TRANSPORT = "urn:schemas-upnp-org:service:AVTransport:1"
 UPNP_RENDERING_CONTROL = "urn:schemas-upnp-org:service:RenderingControl:1"
 UPNP_CONNECTION_MANAGER = "urn:schemas-upnp-org:service:ConnectionManager:1"
 
-# Retry configuration
+# Quotes escaped in SOAP argument values on top of &, < and >
+_QUOTE_ENTITIES = {'"': "&quot;", "'": "&apos;"}
+
+# Retry configuration: exponential backoff from RETRY_DELAY_SECONDS, jittered
+# so callers don't retry in lockstep and capped at RETRY_MAX_DELAY_SECONDS; a
+# SOAP call never takes longer than SOAP_TIME_BUDGET_SECONDS overall
 MAX_RETRIES = 3
 RETRY_DELAY_SECONDS = 2.0
+RETRY_MAX_DELAY_SECONDS = 5.0
 REQUEST_TIMEOUT_SECONDS = 10.0
+SOAP_TIME_BUDGET_SECONDS = 20.0
+
+# UPnP error codes that will not succeed on retry: invalid actions or
+# arguments and unplayable content. Transient ones such as 701 (transition not
+# available while the renderer is still loading) are still retried.
+NON_RETRYABLE_UPNP_ERRORS = frozenset(
+    {
+        "401",  # Invalid Action
+        "402",  # Invalid Args
+        "600",  # Argument Value Invalid
+        "702",  # No contents
+        "706",  # Write error
+        "710",  # Seek mode not supported
+        "711",  # Illegal seek target
+        "712",  # Play mode not supported
+        "714",  # Illegal MIME-type
+        "716",  # Resource not found
+        "718",  # Invalid InstanceID
+    }
+)
+
+# UPnP fault bodies are tiny and fixed-schema; pull the details out with a
+# regex rather than parsing the whole document
+_ERROR_CODE_RE = re.compile(rb"<(?:\w+:)?errorCode[^>]*>\s*(\d+)\s*<")
+_ERROR_DESC_RE = re.compile(rb"<(?:\w+:)?errorDescription[^>]*>([^<]*)<")
+
+# Requested lifetime of GENA event subscriptions (renewed before expiry)
+EVENT_SUBSCRIPTION_TIMEOUT_SECONDS = 1800
+
+# Connection pool for the device: SOAP calls reuse keep-alive connections
+# instead of opening a new TCP connection per request
+MAX_CONNECTIONS = 4
+KEEPALIVE_TIMEOUT_SECONDS = 30.0
+
+# Device description locations used by common renderers
+DESCRIPTION_PATHS = (
+    "/xml/device_description.xml",  # Sonos
+    "/description.xml",
+    "/DeviceDescription.xml",
+    "/upnp/desc/aios_device/aios_device.xml",  # Denon/Marantz
+    "/dmr/SamsungMRDesc.xml",  # Samsung
+    "/rootDesc.xml",
+)
+
+# Description path that answered last time, per "ip:port", tried first on
+# the next connect (persisted across restarts)
+DESCRIPTION_PATH_CACHE_FILE = Path.home() / ".qobuz-proxy" / "dlna_description_paths.json"
+_description_paths: Optional[dict[str, str]] = None
+
+
+def _known_description_paths() -> dict[str, str]:
+    """Get the known description paths, loading them on first use."""
+    global _description_paths
+    if _description_paths is None:
+        _description_paths = {}
+        try:
+            if DESCRIPTION_PATH_CACHE_FILE.exists():
+                data = json.loads(DESCRIPTION_PATH_CACHE_FILE.read_text())
+                _description_paths.update(
+                    (str(k), str(v)) for k, v in data.items() if v in DESCRIPTION_PATHS
+                )
+        except Exception as e:
+            logger.warning(f"Failed to load cached description paths: {e}")
+    return _description_paths
+
+
+def _remember_description_path(device: str, path: str) -> None:
+    """Record the description path a device answered on and persist it."""
+    paths = _known_description_paths()
+    if paths.get(device) == path:
+        return
+    paths[device] = path
+    try:
+        DESCRIPTION_PATH_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = DESCRIPTION_PATH_CACHE_FILE.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(paths, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, DESCRIPTION_PATH_CACHE_FILE)
+    except Exception as e:
+        logger.warning(f"Failed to persist description paths: {e}")
+
+
+# Descriptions fetched by discovery are reused by connect() for a while,
+# keyed by (ip, port)
+DESCRIPTION_CACHE_TTL_SECONDS = 300.0
+_description_cache: dict[tuple[str, int], tuple[bytes, float]] = {}
+
+
+def cache_device_description(ip: str, port: int, xml_data: bytes) -> None:
+    """
+    Remember a device description so connecting to the device can skip fetching it.
+
+    Args:
+        ip: Device IP address
+        port: Device port
+        xml_data: Raw device description XML
+    """
+    _description_cache[(ip, port)] = (xml_data, time.monotonic())
+
+
+def _cached_device_description(ip: str, port: int) -> Optional[bytes]:
+    """Get a cached device description, or None if absent or expired."""
+    entry = _description_cache.get((ip, port))
+    if entry is None:
+        return None
+    xml_data, cached_at = entry
+    if time.monotonic() - cached_at > DESCRIPTION_CACHE_TTL_SECONDS:
+        del _description_cache[(ip, port)]
+        return None
+    return xml_data
+
+
+@lru_cache(maxsize=None)
+def _envelope_parts(service: str, action: str) -> tuple[bytes, bytes]:
+    """
+    Get the encoded SOAP envelope before and after the arguments of an action.
+
+    Single-line format matching the SoCo library, for Sonos compatibility.
+    Cached, as a client only ever sends a handful of distinct actions.
+    """
+    prefix = (
+        '<?xml version="1.0"?>'
+        f'<s:Envelope xmlns:s="{SOAP_ENVELOPE_NS}" '
+        's:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">'
+        "<s:Body>"
+        f'<u:{action} xmlns:u="{service}">'
+    )
+    suffix = f"</u:{action}></s:Body></s:Envelope>"
+    return prefix.encode(), suffix.encode()
+
+
+def parse_transport_event(body: bytes) -> Optional[str]:
+    """
+    Get the transport state from an AVTransport event NOTIFY body.
+
+    The state is carried in the LastChange property, itself an escaped XML
+    document of the form <Event><InstanceID><TransportState val="..."/>.
+
+    Args:
+        body: NOTIFY request body
+
+    Returns:
+        UPnP transport state (e.g. "PLAYING"), or None if the event has none
+    """
+    try:
+        last_change = find_text(parse_xml(body), "LastChange")
+        if last_change:
+            for _, elem in iter_elements(last_change, ("TransportState",)):
+                state: Optional[str] = elem.get("val")
+                return state
+    except XML_PARSE_ERRORS as e:
+        logger.debug(f"Malformed AVTransport event: {e}")
+    return None
 
 
 @dataclass
@@ -40,6 +209,7 @@ class DLNADeviceInfo:
     model_name: str = ""
     udn: str = ""  # Unique Device Name
     av_transport_url: str = ""
+    av_transport_event_url: str = ""  # GENA eventSubURL
     rendering_control_url: str = ""
     connection_manager_url: str = ""
 
@@ -61,6 +231,15 @@ class DLNAClient:
     - Retry logic for transient failures
     """
 
+    # Device description element -> DLNADeviceInfo attribute
+    _DEVICE_FIELDS = {
+        "friendlyName": "friendly_name",
+        "manufacturer": "manufacturer",
+        "modelName": "model_name",
+        "UDN": "udn",
+    }
+    _DESCRIPTION_ELEMENTS = frozenset(_DEVICE_FIELDS) | {"service"}
+
     def __init__(self, ip: str, port: int = 1400):
         """
         Initialize DLNA client.
@@ -73,7 +252,8 @@ class DLNAClient:
         self.port = port
         self.device_info: Optional[DLNADeviceInfo] = None
         self._session: Optional[aiohttp.ClientSession] = None
-        self._last_volume_time_ms: float = 0
+        # Event loop (monotonic) time of the last SetVolume sent
+        self._last_volume_time: float = float("-inf")
         self._pending_volume: Optional[int] = None
         self._volume_debounce_task: Optional[asyncio.Task] = None
         self._volume_lock = asyncio.Lock()
@@ -88,7 +268,14 @@ class DLNAClient:
         Raises:
             DLNAClientError: If connection fails
         """
-        self._session = aiohttp.ClientSession(timeout=ClientTimeout(total=REQUEST_TIMEOUT_SECONDS))
+        if self._session:
+            await self._session.close()
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=MAX_CONNECTIONS, keepalive_timeout=KEEPALIVE_TIMEOUT_SECONDS
+            ),
+            timeout=ClientTimeout(total=REQUEST_TIMEOUT_SECONDS),
+        )
 
         # Try to fetch device description
         self.device_info = await self._fetch_device_description()
@@ -301,18 +488,17 @@ class DLNAClient:
             return False
 
         async with self._volume_lock:
-            now_ms = time.time() * 1000
-            elapsed = now_ms - self._last_volume_time_ms
+            elapsed = asyncio.get_running_loop().time() - self._last_volume_time
 
-            if elapsed < VOLUME_MIN_INTERVAL_MS:
+            if elapsed < VOLUME_MIN_INTERVAL_SECONDS:
                 # Too soon - store pending value and schedule delayed send
                 self._pending_volume = volume
+                delay = VOLUME_MIN_INTERVAL_SECONDS - elapsed
                 if self._volume_debounce_task is None or self._volume_debounce_task.done():
-                    delay_ms = VOLUME_MIN_INTERVAL_MS - elapsed
                     self._volume_debounce_task = asyncio.create_task(
-                        self._send_pending_volume(delay_ms / 1000.0)
+                        self._send_pending_volume(delay)
                     )
-                logger.debug(f"Debouncing SetVolume({volume}), will send in {delay_ms:.0f}ms")
+                logger.debug(f"Debouncing SetVolume({volume}), will send in {delay * 1000:.0f}ms")
                 return True
 
             # Clear any pending volume since we're sending now
@@ -332,7 +518,7 @@ class DLNAClient:
         """Actually send the volume command."""
         if not self.device_info or not self.device_info.rendering_control_url:
             return False
-        self._last_volume_time_ms = time.time() * 1000
+        self._last_volume_time = asyncio.get_running_loop().time()
         logger.debug(f"SetVolume({volume}) to {self.device_info.rendering_control_url}")
 
         result = await self._soap_action(
@@ -379,6 +565,83 @@ class DLNAClient:
                 return sink
         return None
 
+    # =========================================================================
+    # AVTransport Events (GENA)
+    # =========================================================================
+
+    async def subscribe_transport_events(
+        self, callback_url: str, sid: Optional[str] = None
+    ) -> Optional[tuple[str, int]]:
+        """
+        Subscribe to AVTransport state change events, or renew a subscription.
+
+        The device sends NOTIFY requests to callback_url until the subscription
+        expires, so it must be renewed before the granted timeout runs out.
+
+        Args:
+            callback_url: URL the device should send events to
+            sid: Subscription ID to renew instead of creating a new subscription
+
+        Returns:
+            Tuple of (subscription ID, granted timeout in seconds), or None on failure
+        """
+        if not self._session or not self.device_info or not self.device_info.av_transport_event_url:
+            return None
+
+        headers = {"TIMEOUT": f"Second-{EVENT_SUBSCRIPTION_TIMEOUT_SECONDS}"}
+        if sid:
+            headers["SID"] = sid
+        else:
+            headers["CALLBACK"] = f"<{callback_url}>"
+            headers["NT"] = "upnp:event"
+
+        try:
+            async with self._session.request(
+                "SUBSCRIBE", self.device_info.av_transport_event_url, headers=headers
+            ) as response:
+                if response.status != 200:
+                    logger.debug(f"SUBSCRIBE failed ({response.status})")
+                    return None
+                new_sid = response.headers.get("SID", "")
+                timeout = self._parse_subscription_timeout(response.headers.get("TIMEOUT", ""))
+        except Exception as e:
+            logger.debug(f"SUBSCRIBE error: {e}")
+            return None
+
+        if not new_sid:
+            return None
+        return new_sid, timeout
+
+    async def unsubscribe_transport_events(self, sid: str) -> bool:
+        """
+        Cancel an AVTransport event subscription.
+
+        Args:
+            sid: Subscription ID
+
+        Returns:
+            True if the device accepted the request
+        """
+        if not self._session or not self.device_info or not self.device_info.av_transport_event_url:
+            return False
+        try:
+            async with self._session.request(
+                "UNSUBSCRIBE", self.device_info.av_transport_event_url, headers={"SID": sid}
+            ) as response:
+                return response.status == 200
+        except Exception as e:
+            logger.debug(f"UNSUBSCRIBE error: {e}")
+            return False
+
+    @staticmethod
+    def _parse_subscription_timeout(value: str) -> int:
+        """Parse a GENA TIMEOUT header ("Second-N" or "Second-infinite")."""
+        _, _, seconds = value.partition("-")
+        try:
+            return int(seconds)
+        except ValueError:
+            return EVENT_SUBSCRIPTION_TIMEOUT_SECONDS
+
     # =========================================================================
     # Internal Methods
     # =========================================================================
@@ -388,77 +651,89 @@ class DLNAClient:
         if not self._session:
             raise DLNAClientError("Session not initialized")
 
-        # Common paths to try
-        paths = [
-            "/xml/device_description.xml",  # Sonos
-            "/description.xml",
-            "/DeviceDescription.xml",
-            "/upnp/desc/aios_device/aios_device.xml",  # Denon/Marantz
-            "/dmr/SamsungMRDesc.xml",  # Samsung
-            "/rootDesc.xml",
-        ]
-
-        xml_text = None
-        base_url = None
-
-        for path in paths:
-            url = f"http://{self.ip}:{self.port}{path}"
+        base_url = f"http://{self.ip}:{self.port}"
+        cached = _cached_device_description(self.ip, self.port)
+        if cached is not None:
+            logger.debug(f"Using cached device description for {self.ip}:{self.port}")
+            return self._parse_device_description(cached, base_url)
+
+        session = self._session
+        device = f"{self.ip}:{self.port}"
+        xml_data = None
+
+        # Try the path this device answered on last time before probing
+        known_path = _known_description_paths().get(device)
+        if known_path:
+            xml_data = await self._probe_description(session, known_path)
+
+        if not xml_data:
+            # Probe all candidate paths at once and take the first to answer,
+            # so unknown devices cost one timeout rather than one per path
+            tasks = {
+                asyncio.ensure_future(self._probe_description(session, path)): path
+                for path in DESCRIPTION_PATHS
+                if path != known_path
+            }
             try:
-                async with self._session.get(url) as response:
-                    if response.status == 200:
-                        xml_text = await response.text()
-                        base_url = f"http://{self.ip}:{self.port}"
-                        logger.debug(f"Found device description at {url}")
-                        break
-            except Exception as e:
-                logger.debug(f"Path {path} failed: {e}")
-                continue
-
-        if not xml_text:
+                pending = set(tasks)
+                while pending and not xml_data:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.result():
+                            xml_data = task.result()
+                            _remember_description_path(device, tasks[task])
+                            break
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        if not xml_data:
             raise DLNAClientError(f"Could not find device description for {self.ip}:{self.port}")
 
-        return self._parse_device_description(xml_text, base_url or "")
+        return self._parse_device_description(xml_data, base_url)
 
-    def _parse_device_description(self, xml_text: str, base_url: str) -> DLNADeviceInfo:
+    async def _probe_description(
+        self, session: aiohttp.ClientSession, path: str
+    ) -> Optional[bytes]:
+        """Fetch a candidate device description path, returning None if it fails."""
+        url = f"http://{self.ip}:{self.port}{path}"
+        try:
+            async with session.get(url) as response:
+                if response.status == 200:
+                    xml_data = await response.read()
+                    logger.debug(f"Found device description at {url}")
+                    return xml_data
+        except Exception as e:
+            logger.debug(f"Path {path} failed: {e}")
+        return None
+
+    def _parse_device_description(
+        self, xml_data: Union[bytes, str], base_url: str
+    ) -> DLNADeviceInfo:
         """Parse device description XML."""
         info = DLNADeviceInfo()
 
         try:
-            root = ET.fromstring(xml_text)
-
-            # Find device element (handle namespaces)
-            for elem in root.iter():
-                tag = elem.tag.split("}")[-1]  # Remove namespace
-
-                if tag == "friendlyName":
-                    info.friendly_name = elem.text or ""
-                elif tag == "manufacturer":
-                    info.manufacturer = elem.text or ""
-                elif tag == "modelName":
-                    info.model_name = elem.text or ""
-                elif tag == "UDN":
-                    info.udn = elem.text or ""
-
-            # Find service URLs
-            for service in root.iter():
-                if not service.tag.endswith("service"):
+            for name, elem in iter_elements(xml_data, self._DESCRIPTION_ELEMENTS):
+                if name != "service":
+                    # Later matches win, so an embedded device's values take precedence
+                    setattr(info, self._DEVICE_FIELDS[name], elem.text or "")
                     continue
 
-                service_type = ""
-                control_url = ""
-
-                for child in service:
-                    tag = child.tag.split("}")[-1]
-                    if tag == "serviceType":
-                        service_type = child.text or ""
-                    elif tag == "controlURL":
-                        control_url = child.text or ""
+                service_type = child_text(elem, "serviceType") or ""
+                control_url = child_text(elem, "controlURL") or ""
 
                 if "AVTransport" in service_type and control_url:
                     if control_url.startswith("/"):
                         info.av_transport_url = base_url + control_url
                     else:
                         info.av_transport_url = control_url
+                    event_url = child_text(elem, "eventSubURL") or ""
+                    if event_url.startswith("/"):
+                        info.av_transport_event_url = base_url + event_url
+                    else:
+                        info.av_transport_event_url = event_url
 
                 elif "RenderingControl" in service_type and control_url:
                     # Prefer standard RenderingControl over GroupRenderingControl
@@ -476,8 +751,9 @@ class DLNAClient:
                     else:
                         info.connection_manager_url = control_url
 
-        except ET.ParseError as e:
+        except XML_PARSE_ERRORS as e:
             logger.error(f"Failed to parse device description: {e}")
+            info = DLNADeviceInfo()  # Discard values read before the error
 
         logger.debug(
             f"Parsed device info: friendly_name={info.friendly_name}, "
@@ -496,7 +772,7 @@ class DLNAClient:
         action: str,
         args: Dict[str, str],
         max_retries: Optional[int] = None,
-    ) -> Optional[str]:
+    ) -> Optional[bytes]:
         """
         Send SOAP action with retry logic.
 
@@ -508,7 +784,7 @@ class DLNAClient:
             max_retries: Override default retry count (default: MAX_RETRIES)
 
         Returns:
-            Response body or None on failure
+            Raw response body or None on failure
         """
         if not url or not self._session:
             logger.warning(f"No URL for service {service}")
@@ -521,33 +797,59 @@ class DLNAClient:
             "SOAPAction": f'"{service}#{action}"',
         }
 
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SOAP_TIME_BUDGET_SECONDS
         last_error = None
+        attempts = 0
         for attempt in range(retries):
+            attempts += 1
+            timeout = ClientTimeout(total=min(REQUEST_TIMEOUT_SECONDS, deadline - loop.time()))
             try:
-                async with self._session.post(url, data=envelope, headers=headers) as response:
+                async with self._session.post(
+                    url, data=envelope, headers=headers, timeout=timeout
+                ) as response:
                     if response.status == 200:
-                        return await response.text()
+                        return await response.read()
                     else:
-                        text = await response.text()
-                        logger.warning(f"SOAP {action} failed ({response.status}): {text[:500]}")
+                        body = await response.read()
+                        logger.warning(
+                            f"SOAP {action} failed ({response.status}): "
+                            f"{body[:500].decode('utf-8', errors='replace')}"
+                        )
                         # Try to extract UPnP error details
-                        error_code = self._parse_xml_value(text, "errorCode")
-                        error_desc = self._parse_xml_value(text, "errorDescription")
+                        code_match = _ERROR_CODE_RE.search(body)
+                        desc_match = _ERROR_DESC_RE.search(body)
+                        error_code = code_match.group(1).decode() if code_match else None
+                        error_desc = (
+                            desc_match.group(1).decode("utf-8", errors="replace")
+                            if desc_match
+                            else None
+                        )
                         if error_code or error_desc:
                             logger.warning(
                                 f"UPnP error: code={error_code}, description={error_desc}"
                             )
                         last_error = f"HTTP {response.status}"
+                        if error_code in NON_RETRYABLE_UPNP_ERRORS:
+                            # Permanent failure: retrying would only add delay
+                            logger.debug(f"Not retrying SOAP {action}: UPnP error {error_code}")
+                            return None
 
             except Exception as e:
                 logger.warning(f"SOAP {action} error (attempt {attempt + 1}): {e}")
                 last_error = str(e)
 
             if attempt < retries - 1:
-                await asyncio.sleep(RETRY_DELAY_SECONDS)
-
-        if retries > 1:
-            logger.error(f"SOAP {action} failed after {retries} attempts: {last_error}")
+                delay = min(
+                    RETRY_DELAY_SECONDS * 2**attempt * (0.5 + random.random()),
+                    RETRY_MAX_DELAY_SECONDS,
+                )
+                if loop.time() + delay >= deadline:
+                    break  # No time left in the budget for another attempt
+                await asyncio.sleep(delay)
+
+        if attempts > 1:
+            logger.error(f"SOAP {action} failed after {attempts} attempts: {last_error}")
         else:
             logger.warning(f"SOAP {action} failed: {last_error}")
         return None
@@ -557,63 +859,35 @@ class DLNAClient:
         service: str,
         action: str,
         args: Dict[str, str],
-    ) -> str:
-        """Build SOAP envelope XML.
+    ) -> bytes:
+        """Build UTF-8 encoded SOAP envelope XML."""
+        prefix, suffix = _envelope_parts(service, action)
+        args_xml = "".join(f"<{k}>{escape(v, _QUOTE_ENTITIES)}</{k}>" for k, v in args.items())
+        return prefix + args_xml.encode() + suffix
 
-        Uses single-line format matching SoCo library for Sonos compatibility.
-        """
-
-        def escape(s: str) -> str:
-            return (
-                s.replace("&", "&amp;")
-                .replace("<", "&lt;")
-                .replace(">", "&gt;")
-                .replace('"', "&quot;")
-                .replace("'", "&apos;")
-            )
-
-        args_xml = "".join(f"<{k}>{escape(v)}</{k}>" for k, v in args.items())
-
-        # Single-line format for Sonos compatibility (matches SoCo library)
-        return (
-            '<?xml version="1.0"?>'
-            f'<s:Envelope xmlns:s="{SOAP_ENVELOPE_NS}" '
-            's:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">'
-            "<s:Body>"
-            f'<u:{action} xmlns:u="{service}">'
-            f"{args_xml}"
-            f"</u:{action}>"
-            "</s:Body>"
-            "</s:Envelope>"
-        )
-
-    def _parse_xml_value(self, xml_text: str, tag_name: str) -> Optional[str]:
+    def _parse_xml_value(self, xml_data: Union[bytes, str], tag_name: str) -> Optional[str]:
         """Extract value from XML response by tag name."""
         try:
-            root = ET.fromstring(xml_text)
-            for elem in root.iter():
-                if tag_name in elem.tag:
-                    return elem.text
-        except ET.ParseError:
+            return find_text(parse_xml(xml_data), tag_name)
+        except XML_PARSE_ERRORS:
             pass
         return None
 
-    def _ms_to_time_string(self, ms: int) -> str:
+    @staticmethod
+    def _ms_to_time_string(ms: int) -> str:
         """Convert milliseconds to HH:MM:SS format."""
-        seconds = ms // 1000
-        hours = seconds // 3600
-        minutes = (seconds % 3600) // 60
-        secs = seconds % 60
+        minutes, secs = divmod(ms // 1000, 60)
+        hours, minutes = divmod(minutes, 60)
         return f"{hours:02d}:{minutes:02d}:{secs:02d}"
 
-    def _time_string_to_ms(self, time_str: str) -> int:
-        """Convert HH:MM:SS to milliseconds."""
+    @staticmethod
+    def _time_string_to_ms(time_str: str) -> int:
+        """Convert HH:MM:SS (optionally with fractional seconds) to milliseconds."""
         try:
-            parts = time_str.split(":")
-            if len(parts) == 3:
-                hours, minutes, seconds = parts
-                total = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
-                return int(total * 1000)
-        except (ValueError, IndexError):
-            pass
-        return 0
+            hours, minutes, seconds = time_str.split(":", 2)
+            whole = int(hours) * 3600 + int(minutes) * 60
+            if "." not in seconds:
+                return (whole + int(seconds)) * 1000
+            return int((whole + float(seconds)) * 1000)
+        except ValueError:
+            return 0
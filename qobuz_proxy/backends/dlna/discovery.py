@@ -6,14 +6,16 @@ SSDP-based discovery for DLNA renderers (Sonos, HEOS, etc.)
 
 import asyncio
 import logging
+import re
 import socket
-import xml.etree.ElementTree as ET
 from dataclasses import dataclass
-from typing import Callable
-from urllib.parse import urlparse
+from typing import Any, Callable
 
 import aiohttp
 
+from .client import KEEPALIVE_TIMEOUT_SECONDS, MAX_CONNECTIONS, cache_device_description
+from .xml_parser import XML_PARSE_ERRORS, parse_xml
+
 logger = logging.getLogger(__name__)
 
 # SSDP constants
@@ -21,6 +23,17 @@ SSDP_ADDR = "239.255.255.250"
 SSDP_PORT = 1900
 SSDP_MX = 3  # Maximum wait time in seconds
 
+DESCRIPTION_TIMEOUT_SECONDS = 10
+
+# The only SSDP response headers discovery needs; matched on the raw packet
+_SSDP_HEADER_RE = re.compile(rb"^(LOCATION|USN)[ \t]*:[ \t]*(.*?)[ \t]*\r?$", re.I | re.M)
+
+# Host and port of a LOCATION URL (http://host[:port]/path), where host may
+# be a bracketed IPv6 literal (http://[fe80::1]:49152/path)
+_LOCATION_RE = re.compile(
+    r"https?://(?:\[(?P<ipv6>[^\]/]+)\]|(?P<host>[^:/?#\[\]]+))(?::(?P<port>\d+))?", re.I
+)
+
 # UPnP device type we're looking for
 MEDIA_RENDERER_TYPE = "urn:schemas-upnp-org:device:MediaRenderer:1"
 
@@ -47,11 +60,31 @@ class DLNADiscovery:
         devices = await discovery.discover(timeout=5.0)
         for device in devices:
             print(f"Found: {device.friendly_name} at {device.ip}:{device.port}")
+        await discovery.close()
     """
 
     def __init__(self) -> None:
         self._devices: dict[str, _RawDevice] = {}
         self._on_device_found: Callable[[DiscoveredDevice], None] | None = None
+        self._session: aiohttp.ClientSession | None = None
+
+    async def close(self) -> None:
+        """Close the HTTP session used to fetch device descriptions."""
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the description session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            # Kept across discover() calls so repeated scans reuse connections
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=MAX_CONNECTIONS, keepalive_timeout=KEEPALIVE_TIMEOUT_SECONDS
+                ),
+                timeout=aiohttp.ClientTimeout(total=DESCRIPTION_TIMEOUT_SECONDS),
+            )
+        return self._session
 
     async def discover(
         self,
@@ -80,38 +113,21 @@ class DLNADiscovery:
             "\r\n"
         ).encode("utf-8")
 
-        # Create UDP socket
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        sock.setblocking(False)
+        # Responses are handled by the event loop as they arrive
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _SSDPProtocol(self._parse_ssdp_response),
+            family=socket.AF_INET,
+            local_addr=("0.0.0.0", 0),
+        )
 
         try:
-            # Send M-SEARCH to multicast address
-            sock.sendto(search_message, (SSDP_ADDR, SSDP_PORT))
+            # Send M-SEARCH to multicast address and collect responses
+            transport.sendto(search_message, (SSDP_ADDR, SSDP_PORT))
             logger.debug(f"Sent SSDP M-SEARCH for {search_target}")
-
-            # Collect responses
-            loop = asyncio.get_event_loop()
-            end_time = loop.time() + timeout
-
-            while loop.time() < end_time:
-                remaining = end_time - loop.time()
-                if remaining <= 0:
-                    break
-
-                try:
-                    await asyncio.wait_for(
-                        self._receive_response(sock),
-                        timeout=min(remaining, 1.0),
-                    )
-                except asyncio.TimeoutError:
-                    continue
-                except Exception as e:
-                    logger.debug(f"Error receiving SSDP response: {e}")
-                    continue
-
+            await asyncio.sleep(timeout)
         finally:
-            sock.close()
+            transport.close()
 
         # Fetch device descriptions
         raw_devices = list(self._devices.values())
@@ -120,51 +136,35 @@ class DLNADiscovery:
         logger.debug(f"Discovered {len(result)} DLNA device(s)")
         return result
 
-    async def _receive_response(self, sock: socket.socket) -> None:
-        """Receive and parse a single SSDP response."""
-        loop = asyncio.get_event_loop()
-
-        # Use run_in_executor for non-blocking recv
-        data, addr = await loop.run_in_executor(None, lambda: sock.recvfrom(4096))
-
-        response = data.decode("utf-8", errors="ignore")
-        self._parse_ssdp_response(response, addr[0])
-
-    def _parse_ssdp_response(self, response: str, source_ip: str) -> None:
+    def _parse_ssdp_response(self, response: bytes, source_ip: str) -> None:
         """Parse SSDP response headers."""
-        headers: dict[str, str] = {}
-        lines = response.split("\r\n")
+        headers = {
+            key.upper(): value.decode("utf-8", errors="ignore")
+            for key, value in _SSDP_HEADER_RE.findall(response)
+        }
 
-        for line in lines[1:]:  # Skip first line (HTTP status)
-            if ":" in line:
-                key, value = line.split(":", 1)
-                headers[key.upper().strip()] = value.strip()
-
-        location = headers.get("LOCATION", "")
-        usn = headers.get("USN", "")
+        location = headers.get(b"LOCATION", "")
+        usn = headers.get(b"USN", "")
 
         if not location or not usn:
             return
 
-        # Extract port from location URL
-        try:
-            parsed = urlparse(location)
-            port = parsed.port or 80
-            ip = parsed.hostname or source_ip
-        except Exception:
-            port = 80
-            ip = source_ip
-
-        # Use USN as unique key (avoid duplicates)
-        if usn not in self._devices:
-            device = _RawDevice(
-                location=location,
-                usn=usn,
-                ip=ip,
-                port=port,
-            )
-            self._devices[usn] = device
-            logger.debug(f"Found device: {location}")
+        # Use USN as unique key (avoid duplicates); devices repeat their response
+        if usn in self._devices:
+            return
+
+        # Extract host and port from location URL
+        match = _LOCATION_RE.match(location)
+        ip = (match.group("ipv6") or match.group("host")) if match else source_ip
+        port = int(match.group("port")) if match and match.group("port") else 80
+
+        self._devices[usn] = _RawDevice(
+            location=location,
+            usn=usn,
+            ip=ip,
+            port=port,
+        )
+        logger.debug(f"Found device: {location}")
 
     async def _fetch_device_descriptions(
         self, raw_devices: list["_RawDevice"]
@@ -173,12 +173,12 @@ class DLNADiscovery:
         result: list[DiscoveredDevice] = []
 
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
-                tasks = [self._fetch_device_description(session, device) for device in raw_devices]
-                fetched = await asyncio.gather(*tasks, return_exceptions=True)
-                for item in fetched:
-                    if isinstance(item, DiscoveredDevice):
-                        result.append(item)
+            session = self._get_session()
+            tasks = [self._fetch_device_description(session, device) for device in raw_devices]
+            fetched = await asyncio.gather(*tasks, return_exceptions=True)
+            for item in fetched:
+                if isinstance(item, DiscoveredDevice):
+                    result.append(item)
 
         except Exception as e:
             logger.error(f"Error fetching device descriptions: {e}")
@@ -194,22 +194,27 @@ class DLNADiscovery:
                 if response.status != 200:
                     return None
 
-                xml_text = await response.text()
-                return self._parse_device_description(raw_device, xml_text)
+                xml_data = await response.read()
+
+            device = self._parse_device_description(raw_device, xml_data)
+            if device is not None:
+                # Let a client connecting to this device skip fetching it again
+                cache_device_description(raw_device.ip, raw_device.port, xml_data)
+            return device
 
         except Exception as e:
             logger.debug(f"Error fetching description for {raw_device.location}: {e}")
             return None
 
     def _parse_device_description(
-        self, raw_device: "_RawDevice", xml_text: str
+        self, raw_device: "_RawDevice", xml_data: bytes | str
     ) -> DiscoveredDevice | None:
         """Parse device description XML."""
         try:
             # Define namespace
             ns = {"upnp": "urn:schemas-upnp-org:device-1-0"}
 
-            root = ET.fromstring(xml_text)
+            root = parse_xml(xml_data)
 
             # Find root device element
             device_elem = root.find(".//upnp:device", ns)
@@ -221,7 +226,7 @@ class DLNADiscovery:
                 return None
 
             # Extract device info from root device
-            def get_text(parent: ET.Element, elem_name: str) -> str:
+            def get_text(parent: Any, elem_name: str) -> str:
                 # Try with namespace
                 elem = parent.find(f"upnp:{elem_name}", ns)
                 if elem is None:
@@ -251,7 +256,7 @@ class DLNADiscovery:
 
             return device
 
-        except ET.ParseError as e:
+        except XML_PARSE_ERRORS as e:
             logger.debug(f"Error parsing device XML: {e}")
             return None
         except Exception as e:
@@ -263,6 +268,22 @@ class DLNADiscovery:
         self._on_device_found = callback
 
 
+class _SSDPProtocol(asyncio.DatagramProtocol):
+    """Datagram protocol passing each SSDP response to a handler."""
+
+    def __init__(self, on_response: Callable[[bytes, str], None]) -> None:
+        self._on_response = on_response
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        try:
+            self._on_response(data, addr[0])
+        except Exception as e:
+            logger.debug(f"Error handling SSDP response: {e}")
+
+    def error_received(self, exc: Exception) -> None:
+        logger.debug(f"Error receiving SSDP response: {exc}")
+
+
 @dataclass
 class _RawDevice:
     """Internal raw device from SSDP response (before XML fetch)."""
@@ -284,7 +305,10 @@ async def discover_dlna_devices(timeout: float = 5.0) -> list[DiscoveredDevice]:
         List of DiscoveredDevice objects
     """
     discovery = DLNADiscovery()
-    return await discovery.discover(timeout=timeout)
+    try:
+        return await discovery.discover(timeout=timeout)
+    finally:
+        await discovery.close()
 
 
 __all__ = ["DLNADiscovery", "DiscoveredDevice", "discover_dlna_devices"]
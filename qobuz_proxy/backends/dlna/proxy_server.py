@@ -10,7 +10,7 @@ import logging
 import socket
 import time
 from dataclasses import dataclass, field
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 
 from aiohttp import web, ClientSession, ClientTimeout
 
@@ -23,6 +23,9 @@ DEFAULT_URL_MAX_AGE_SECONDS = 240  # Refresh before 5-minute TTL
 STREAM_CHUNK_SIZE = 64 * 1024  # 64KB chunks
 REQUEST_TIMEOUT_SECONDS = 30
 
+# Path DLNA devices send UPnP event NOTIFY requests to
+UPNP_EVENT_PATH = "/upnp/event"
+
 
 @dataclass
 class RegisteredTrack:
@@ -93,6 +96,9 @@ class AudioProxyServer:
         # Will be set after start() to actual bound address
         self._actual_host: Optional[str] = None
 
+        # Receives UPnP event NOTIFY requests (subscription ID, body)
+        self._event_handler: Optional[Callable[[str, bytes], None]] = None
+
     @property
     def base_url(self) -> str:
         """Get the base URL for this proxy server."""
@@ -102,6 +108,11 @@ class AudioProxyServer:
             host = self._get_local_ip()
         return f"http://{host}:{self._port}"
 
+    @property
+    def event_callback_url(self) -> str:
+        """Get the URL DLNA devices should send UPnP events to."""
+        return f"{self.base_url}{UPNP_EVENT_PATH}"
+
     @property
     def is_running(self) -> bool:
         """Check if the server is running."""
@@ -113,6 +124,7 @@ class AudioProxyServer:
         self._app.router.add_get("/audio/{track_id}", self._handle_audio)
         self._app.router.add_get("/audio/{track_id}.flac", self._handle_audio)
         self._app.router.add_get("/audio/{track_id}.mp3", self._handle_audio)
+        self._app.router.add_route("NOTIFY", UPNP_EVENT_PATH, self._handle_event)
 
         self._runner = web.AppRunner(self._app)
         await self._runner.setup()
@@ -179,6 +191,25 @@ class AudioProxyServer:
             track.url_fetched_at = time.time()
             logger.debug(f"Updated URL for track {track_id}")
 
+    def set_event_handler(self, handler: Optional[Callable[[str, bytes], None]]) -> None:
+        """
+        Set the handler for UPnP event notifications sent to event_callback_url.
+
+        Args:
+            handler: Called with the subscription ID and raw body, or None to clear
+        """
+        self._event_handler = handler
+
+    async def _handle_event(self, request: web.Request) -> web.Response:
+        """Handle a UPnP event NOTIFY request from a DLNA device."""
+        body = await request.read()
+        if self._event_handler:
+            try:
+                self._event_handler(request.headers.get("SID", ""), body)
+            except Exception as e:
+                logger.error(f"Error handling UPnP event: {e}")
+        return web.Response(status=200)
+
     async def _handle_audio(self, request: web.Request) -> web.StreamResponse:
         """Handle audio stream requests from DLNA devices."""
         # Extract track ID (remove extension if present)
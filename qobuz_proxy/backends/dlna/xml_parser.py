@@ -0,0 +1,144 @@
+"""
+XML parsing for UPnP documents.
+
+Device descriptions and SOAP responses are parsed with lxml when it is
+installed (the ``speedups`` extra), falling back to the stdlib ElementTree.
+Both return elements with the ElementTree API (find/iter/tag/text) used by
+the DLNA client and discovery.
+"""
+
+import io
+import xml.etree.ElementTree as ElementTree
+from typing import Any, Collection, Iterator, Optional, Union
+
+try:
+    from lxml import etree
+except ImportError:  # lxml not installed, fall back to the stdlib parser
+    etree = None
+
+if etree is not None:
+    # Drop comments and processing instructions so every node has a string tag,
+    # as with ElementTree; never resolve entities or fetch external resources
+    _LXML_PARSER = etree.XMLParser(
+        remove_comments=True, remove_pis=True, resolve_entities=False, no_network=True
+    )
+    XML_PARSE_ERRORS: tuple[type[Exception], ...] = (etree.XMLSyntaxError, ElementTree.ParseError)
+
+    # Compiled once; the element name is bound per call through an XPath variable
+    _XP_CHILD_TEXT = etree.XPath("(*[local-name()=$name])[1]/text()")
+    _XP_FIRST_TEXT = etree.XPath("(//*[local-name()=$name])[1]/text()")
+else:
+    XML_PARSE_ERRORS = (ElementTree.ParseError,)
+
+
+def parse_xml(data: Union[bytes, str]) -> Any:
+    """
+    Parse an XML document and return its root element.
+
+    Pass the raw response bytes where possible so the document's declared
+    encoding is honoured.
+
+    Args:
+        data: XML document
+
+    Returns:
+        Root element
+
+    Raises:
+        One of XML_PARSE_ERRORS if the document is malformed
+    """
+    if etree is None:
+        return ElementTree.fromstring(data)
+    if isinstance(data, str):
+        data = data.encode()
+    return etree.fromstring(data, _LXML_PARSER)
+
+
+def _local_name(tag: str) -> str:
+    """Strip the ``{namespace}`` prefix from an ElementTree tag."""
+    return tag.rpartition("}")[2]
+
+
+def iter_elements(data: Union[bytes, str], names: Collection[str]) -> Iterator[tuple[str, Any]]:
+    """
+    Stream the elements with the given local names, ignoring namespaces.
+
+    Each element is yielded once it is complete, children included, and
+    released when iteration resumes, so the whole tree is never held.
+
+    Args:
+        data: XML document
+        names: Element names without namespace prefix
+
+    Yields:
+        Tuples of (local name, element) in document order of element end
+
+    Raises:
+        One of XML_PARSE_ERRORS if the document is malformed
+    """
+    if isinstance(data, str):
+        data = data.encode()
+    if etree is None:
+        for _, elem in ElementTree.iterparse(io.BytesIO(data), events=("end",)):
+            name = _local_name(elem.tag)
+            if name in names:
+                yield name, elem
+                elem.clear()
+        return
+
+    for _, elem in etree.iterparse(
+        io.BytesIO(data),
+        events=("end",),
+        tag=[f"{{*}}{name}" for name in names],
+        remove_comments=True,
+        remove_pis=True,
+        resolve_entities=False,
+        no_network=True,
+    ):
+        yield etree.QName(elem).localname, elem
+        # Drop the element and the already-processed siblings before it
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+
+def find_text(root: Any, name: str) -> Optional[str]:
+    """
+    Get the text of the first element with the given local name, ignoring namespaces.
+
+    Args:
+        root: Root element returned by parse_xml
+        name: Element name without namespace prefix
+
+    Returns:
+        Element text, or None if there is no such element or it is empty
+    """
+    if etree is None:
+        for elem in root.iter():
+            if _local_name(elem.tag) == name:
+                text: Optional[str] = elem.text
+                return text
+        return None
+    texts = _XP_FIRST_TEXT(root, name=name)
+    return str(texts[0]) if texts else None
+
+
+def child_text(parent: Any, name: str) -> Optional[str]:
+    """
+    Get the text of the first direct child with the given local name.
+
+    Args:
+        parent: Parent element
+        name: Child element name without namespace prefix
+
+    Returns:
+        Child text, or None if there is no such child or it is empty
+    """
+    if etree is None:
+        for child in parent:
+            if _local_name(child.tag) == name:
+                text: Optional[str] = child.text
+                return text
+        return None
+    texts = _XP_CHILD_TEXT(parent, name=name)
+    return str(texts[0]) if texts else None
@@ -49,6 +49,7 @@ class BackendTrackMetadata:
     album: str = ""
     duration_ms: int = 0
     artwork_url: str = ""
+    content_type: Optional[str] = None  # MIME type of the stream, if known
 
     def to_dict(self) -> dict[str, Any]:
         """Convert to dictionary."""
@@ -59,6 +60,7 @@ class BackendTrackMetadata:
             "album": self.album,
             "duration_ms": self.duration_ms,
             "artwork_url": self.artwork_url,
+            "content_type": self.content_type,
         }
 
 
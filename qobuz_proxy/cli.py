@@ -294,7 +294,10 @@ async def run_discovery(timeout: float, json_output: bool) -> int:
         print(f"Scanning for DLNA renderers ({timeout}s timeout)...")
 
     discovery = DLNADiscovery()
-    devices = await discovery.discover(timeout=timeout)
+    try:
+        devices = await discovery.discover(timeout=timeout)
+    finally:
+        await discovery.close()
 
     if json_output:
         output = {
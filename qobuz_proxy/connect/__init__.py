@@ -4,7 +4,7 @@ Qobuz Connect protocol module.
 Handles device discovery (mDNS/HTTP) and WebSocket communication.
 """
 
-from .discovery import DiscoveryService
+from .discovery import DiscoveryService, close_shared_zeroconf, get_shared_zeroconf
 from .protocol import DecodedMessage, MessageType, ProtocolCodec, QConnectMessageType
 from .types import ConnectTokens, JWTApiToken, JWTConnectToken
 from .ws_manager import WsManager
@@ -14,6 +14,8 @@ __all__ = [
     "JWTConnectToken",
     "JWTApiToken",
     "DiscoveryService",
+    "get_shared_zeroconf",
+    "close_shared_zeroconf",
     "WsManager",
     "ProtocolCodec",
     "MessageType",
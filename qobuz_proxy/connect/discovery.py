@@ -4,14 +4,21 @@ mDNS registration and HTTP discovery endpoints.
 Handles device discovery via mDNS and connection handshake via HTTP.
 """
 
-import asyncio
+import ipaddress
 import json
 import logging
+import re
 import socket
+from functools import lru_cache
 from typing import Any, Callable, Optional
 
 from aiohttp import web
-from zeroconf import ServiceInfo, Zeroconf
+from zeroconf.asyncio import AsyncServiceInfo, AsyncZeroconf
+
+try:
+    import orjson
+except ImportError:  # orjson not installed, fall back to the stdlib json module
+    orjson = None  # type: ignore[assignment]
 
 from qobuz_proxy.config import Config
 
@@ -23,6 +30,11 @@ logger = logging.getLogger(__name__)
 MDNS_SERVICE_TYPE = "_qobuz-connect._tcp.local."
 SDK_VERSION = "py-1.0.0"
 
+# HTTP server tuning: the Qobuz app polls the info endpoints while
+# connecting, so keep its connections open between polls
+HTTP_KEEPALIVE_TIMEOUT_SECONDS = 75.0
+HTTP_BACKLOG = 256
+
 # Quality ID to HTTP display string mapping
 QUALITY_TO_HTTP = {
     5: "MP3",
@@ -30,10 +42,21 @@ QUALITY_TO_HTTP = {
     7: "HIRES_L1",
     27: "HIRES_L3",
 }
+DEFAULT_HTTP_QUALITY = "HIRES_L3"
+
+# QUALITY_TO_HTTP as a table indexed by quality ID, unknown IDs mapping to the default
+_QUALITY_TABLE = tuple(
+    QUALITY_TO_HTTP.get(quality_id, DEFAULT_HTTP_QUALITY)
+    for quality_id in range(max(QUALITY_TO_HTTP) + 1)
+)
 
 # Quality getter callback type
 QualityGetter = Callable[[], int]
 
+# Runs of characters not allowed in the mDNS service name, and of hyphens
+_UNSAFE_NAME_CHARS_RE = re.compile(r"[^\w-]+")
+_HYPHENS_RE = re.compile(r"-{2,}")
+
 
 def _sanitize_service_name(name: str) -> str:
     """
@@ -48,18 +71,120 @@ def _sanitize_service_name(name: str) -> str:
     Returns:
         Sanitized name safe for mDNS service registration
     """
-    # Replace spaces with hyphens
-    sanitized = name.replace(" ", "-")
-    # Remove any other potentially problematic characters
-    # Keep only alphanumeric, hyphens, and underscores
-    sanitized = "".join(c if c.isalnum() or c in "-_" else "-" for c in sanitized)
-    # Collapse multiple hyphens
-    while "--" in sanitized:
-        sanitized = sanitized.replace("--", "-")
+    # Keep only alphanumeric, hyphens, and underscores; anything else
+    # (spaces included) becomes a hyphen, then collapse repeated hyphens
+    sanitized = _HYPHENS_RE.sub("-", _UNSAFE_NAME_CHARS_RE.sub("-", name))
     # Strip leading/trailing hyphens
     return sanitized.strip("-")
 
 
+# Process-wide zeroconf instance, see get_shared_zeroconf()
+_shared_zeroconf: Optional[AsyncZeroconf] = None
+
+
+def get_shared_zeroconf() -> AsyncZeroconf:
+    """
+    Get the AsyncZeroconf instance shared across the application.
+
+    One instance means one set of multicast sockets and one mDNS cache for
+    every service that registers or browses. Created on first use.
+    """
+    global _shared_zeroconf
+    if _shared_zeroconf is None:
+        _shared_zeroconf = AsyncZeroconf()
+    return _shared_zeroconf
+
+
+async def close_shared_zeroconf() -> None:
+    """Close the shared AsyncZeroconf instance, if it was created."""
+    global _shared_zeroconf
+    if _shared_zeroconf is not None:
+        zeroconf, _shared_zeroconf = _shared_zeroconf, None
+        await zeroconf.async_close()
+
+
+def _json_dumps(data: dict[str, Any]) -> bytes:
+    """Serialize to JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode()
+
+
+def _json_loads(raw: bytes) -> Any:
+    """Parse JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _json_body_response(body: bytes, status: int = 200) -> web.Response:
+    """Build a JSON response from an already serialized body."""
+    return web.Response(
+        body=body,
+        status=status,
+        content_type="application/json",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+def _json_response(data: dict[str, Any], status: int = 200) -> web.Response:
+    """Build a JSON response."""
+    return _json_body_response(_json_dumps(data), status)
+
+
+@lru_cache(maxsize=1)
+def _detect_local_ip() -> Optional[str]:
+    """
+    Detect the local IP address used for outbound traffic.
+
+    Connecting a UDP socket only selects a route in the kernel, no packet is
+    sent. If there is no default route, fall back to the non-loopback
+    addresses the host name resolves to. Cached for the process lifetime
+    (see DiscoveryService.invalidate_local_ip).
+    """
+    try:
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.settimeout(0)
+        try:
+            # Doesn't actually connect, just determines route
+            s.connect(("8.8.8.8", 80))
+            return str(s.getsockname()[0])
+        finally:
+            s.close()
+    except OSError as e:
+        logger.debug("No default route for local IP detection: %s", e)
+
+    try:
+        for *_, sockaddr in socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET):
+            ip = str(sockaddr[0])
+            if not ip.startswith("127."):
+                return ip
+    except OSError as e:
+        logger.error("Failed to determine local IP: %s", e)
+    return None
+
+
+@lru_cache(maxsize=1)
+def _detect_local_ipv6() -> Optional[str]:
+    """
+    Detect the local IPv6 address used for outbound traffic.
+
+    Same route lookup as _detect_local_ip; None when the host has no IPv6
+    default route. Cached for the process lifetime.
+    """
+    try:
+        s = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        s.settimeout(0)
+        try:
+            s.connect(("2001:4860:4860::8888", 80))
+            return str(s.getsockname()[0])
+        finally:
+            s.close()
+    except OSError as e:
+        logger.debug("No IPv6 route for local IP detection: %s", e)
+    return None
+
+
 class DiscoveryService:
     """
     Manages mDNS registration and HTTP discovery endpoints.
@@ -74,6 +199,7 @@ class DiscoveryService:
         app_id: str,
         on_connect: Optional[Callable[[ConnectTokens], None]] = None,
         quality_getter: Optional[QualityGetter] = None,
+        zeroconf: Optional[AsyncZeroconf] = None,
     ):
         """
         Initialize discovery service.
@@ -83,6 +209,8 @@ class DiscoveryService:
             app_id: Qobuz app ID (from credential scraper)
             on_connect: Callback when app connects with tokens
             quality_getter: Callback to get current max quality setting
+            zeroconf: Shared zeroconf instance to register on (one is created
+                and closed by this service if not provided)
         """
         self.config = config
         self.app_id = app_id
@@ -95,18 +223,25 @@ class DiscoveryService:
         self._site: Optional[web.TCPSite] = None
 
         # mDNS components
-        self._zeroconf: Optional[Zeroconf] = None
-        self._service_info: Optional[ServiceInfo] = None
+        self._zeroconf: Optional[AsyncZeroconf] = zeroconf
+        self._owns_zeroconf = zeroconf is None
+        self._service_info: Optional[AsyncServiceInfo] = None
+        self._service_info_key: Optional[tuple[str, str, str, Optional[str], int]] = None
+        self._mdns_registered = False
 
         # State
         self._current_session_id: str = ""
         self._received_tokens: Optional[ConnectTokens] = None
 
+        # Serialized info responses, rebuilt when quality or session changes
+        self._display_info_cache: Optional[tuple[int, bytes]] = None
+        self._connect_info_body: Optional[bytes] = None
+
     async def start(self) -> None:
         """Start HTTP server and register mDNS service."""
         await self._start_http_server()
         await self._register_mdns()
-        logger.info(f"Discovery service started on port {self.config.server.http_port}")
+        logger.info("Discovery service started on port %d", self.config.server.http_port)
 
     async def stop(self) -> None:
         """Stop HTTP server and unregister mDNS service."""
@@ -130,13 +265,17 @@ class DiscoveryService:
         self._app.router.add_get("/streamcore/get-connect-info", self._handle_connect_info)
         self._app.router.add_post("/streamcore/connect-to-qconnect", self._handle_connect)
 
-        self._runner = web.AppRunner(self._app)
+        # No access log: it would format a line for every poll
+        self._runner = web.AppRunner(
+            self._app, keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT_SECONDS, access_log=None
+        )
         await self._runner.setup()
 
         self._site = web.TCPSite(
             self._runner,
             self.config.server.bind_address,
             self.config.server.http_port,
+            backlog=HTTP_BACKLOG,
         )
         await self._site.start()
 
@@ -164,17 +303,22 @@ class DiscoveryService:
         quality_id = 27
         if self._quality_getter:
             quality_id = self._quality_getter()
-        quality_str = QUALITY_TO_HTTP.get(quality_id, "HIRES_L3")
-
-        response = {
-            "type": "SPEAKER",
-            "friendly_name": self.config.device.name,
-            "model_display_name": "QobuzProxy",
-            "brand_display_name": "QobuzProxy",
-            "serial_number": self.config.device.uuid,
-            "max_audio_quality": quality_str,
-        }
-        return web.json_response(response)
+
+        if self._display_info_cache is None or self._display_info_cache[0] != quality_id:
+            response = {
+                "type": "SPEAKER",
+                "friendly_name": self.config.device.name,
+                "model_display_name": "QobuzProxy",
+                "brand_display_name": "QobuzProxy",
+                "serial_number": self.config.device.uuid,
+                "max_audio_quality": (
+                    _QUALITY_TABLE[quality_id]
+                    if 0 <= quality_id < len(_QUALITY_TABLE)
+                    else DEFAULT_HTTP_QUALITY
+                ),
+            }
+            self._display_info_cache = (quality_id, _json_dumps(response))
+        return _json_body_response(self._display_info_cache[1])
 
     async def _handle_connect_info(self, request: web.Request) -> web.Response:
         """
@@ -182,11 +326,13 @@ class DiscoveryService:
 
         Returns app ID and session information.
         """
-        response = {
-            "current_session_id": self._current_session_id,
-            "app_id": self.app_id,
-        }
-        return web.json_response(response)
+        if self._connect_info_body is None:
+            response = {
+                "current_session_id": self._current_session_id,
+                "app_id": self.app_id,
+            }
+            self._connect_info_body = _json_dumps(response)
+        return _json_body_response(self._connect_info_body)
 
     async def _handle_connect(self, request: web.Request) -> web.Response:
         """
@@ -195,56 +341,60 @@ class DiscoveryService:
         Receives JWT tokens from the Qobuz app.
         """
         try:
-            data = await request.json()
-            logger.debug(f"Received connect request: {list(data.keys())}")
+            data = _json_loads(await request.read())
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Received connect request: %s", list(data.keys()))
 
             # Parse tokens
             tokens = self._parse_connect_request(data)
 
             if not tokens.is_valid():
                 logger.error("Invalid tokens in connect request")
-                return web.json_response({"error": "Invalid tokens"}, status=400)
+                return _json_response({"error": "Invalid tokens"}, status=400)
 
             # Store tokens
             self._received_tokens = tokens
             self._current_session_id = tokens.session_id
+            self._connect_info_body = None
 
-            logger.info(f"Received connection from app (session: {tokens.session_id[:8]}...)")
+            logger.info("Received connection from app (session: %.8s...)", tokens.session_id)
 
             # Notify callback
             if self.on_connect:
                 self.on_connect(tokens)
 
-            return web.json_response({})
+            return _json_response({})
 
-        except json.JSONDecodeError:
+        except json.JSONDecodeError:  # also raised by orjson
             logger.error("Invalid JSON in connect request")
-            return web.json_response({"error": "Invalid JSON"}, status=400)
+            return _json_response({"error": "Invalid JSON"}, status=400)
         except Exception as e:
-            logger.exception(f"Error handling connect request: {e}")
-            return web.json_response({"error": str(e)}, status=500)
+            logger.exception("Error handling connect request: %s", e)
+            return _json_response({"error": str(e)}, status=500)
 
     def _parse_connect_request(self, data: dict[str, Any]) -> ConnectTokens:
         """Parse connect request JSON into ConnectTokens."""
-        tokens = ConnectTokens()
-        tokens.session_id = data.get("session_id", "")
-
-        jwt_qconnect = data.get("jwt_qconnect", {})
-        if jwt_qconnect:
-            tokens.ws_token = JWTConnectToken(
-                jwt=jwt_qconnect.get("jwt", ""),
-                exp=jwt_qconnect.get("exp", 0),
-                endpoint=jwt_qconnect.get("endpoint", ""),
-            )
-
-        jwt_api = data.get("jwt_api", {})
-        if jwt_api:
-            tokens.api_token = JWTApiToken(
-                jwt=jwt_api.get("jwt", ""),
-                exp=jwt_api.get("exp", 0),
-            )
-
-        return tokens
+        get = data.get
+        jwt_qconnect = get("jwt_qconnect") or {}
+        jwt_api = get("jwt_api") or {}
+
+        return ConnectTokens(
+            session_id=get("session_id", ""),
+            ws_token=(
+                JWTConnectToken(
+                    jwt=jwt_qconnect.get("jwt", ""),
+                    exp=jwt_qconnect.get("exp", 0),
+                    endpoint=jwt_qconnect.get("endpoint", ""),
+                )
+                if jwt_qconnect
+                else None
+            ),
+            api_token=(
+                JWTApiToken(jwt=jwt_api.get("jwt", ""), exp=jwt_api.get("exp", 0))
+                if jwt_api
+                else None
+            ),
+        )
 
     # -------------------------------------------------------------------------
     # mDNS Registration
@@ -260,57 +410,69 @@ class DiscoveryService:
         # Sanitize device name for mDNS service name (no spaces allowed)
         # The display name in properties["Name"] keeps the original formatting
         sanitized_name = _sanitize_service_name(self.config.device.name)
-        service_name = f"{sanitized_name}.{MDNS_SERVICE_TYPE}"
-
-        properties = {
-            "path": "/streamcore",
-            "type": "SPEAKER",
-            "sdk_version": SDK_VERSION,
-            "Name": self.config.device.name,  # Original name for display
-            "device_uuid": self.config.device.uuid,
-        }
-
-        self._service_info = ServiceInfo(
-            MDNS_SERVICE_TYPE,
-            service_name,
-            addresses=[socket.inet_aton(local_ip)],
-            port=self.config.server.http_port,
-            properties=properties,
-        )
 
-        self._zeroconf = Zeroconf()
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, self._zeroconf.register_service, self._service_info)
+        # Also advertise an AAAA record when the host has IPv6 connectivity
+        local_ipv6 = self._get_local_ipv6()
+
+        # Rebuild the ServiceInfo only if what it advertises has changed
+        port = self.config.server.http_port
+        key = (self.config.device.name, self.config.device.uuid, local_ip, local_ipv6, port)
+        if self._service_info is None or key != self._service_info_key:
+            # Encoded up front so zeroconf stores the TXT values as-is
+            properties = {
+                b"path": b"/streamcore",
+                b"type": b"SPEAKER",
+                b"sdk_version": SDK_VERSION.encode(),
+                b"Name": self.config.device.name.encode(),  # Original name for display
+                b"device_uuid": self.config.device.uuid.encode(),
+            }
+            self._service_info = AsyncServiceInfo(
+                MDNS_SERVICE_TYPE,
+                f"{sanitized_name}.{MDNS_SERVICE_TYPE}",
+                addresses=[ipaddress.ip_address(ip).packed for ip in (local_ip, local_ipv6) if ip],
+                port=port,
+                properties=properties,
+            )
+            self._service_info_key = key
+
+        if self._zeroconf is None:
+            self._zeroconf = AsyncZeroconf()
+        await self._zeroconf.async_register_service(self._service_info)
+        self._mdns_registered = True
 
         logger.info(
-            f"Registered mDNS service: {self.config.device.name} "
-            f"(as {sanitized_name}) at {local_ip}:{self.config.server.http_port}"
+            "Registered mDNS service: %s (as %s) at %s:%d",
+            self.config.device.name,
+            sanitized_name,
+            local_ip,
+            port,
         )
 
     async def _unregister_mdns(self) -> None:
         """Unregister mDNS service."""
-        if self._zeroconf and self._service_info:
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self._zeroconf.unregister_service, self._service_info)
-            await loop.run_in_executor(None, self._zeroconf.close)
+        if self._zeroconf and self._service_info and self._mdns_registered:
+            # Wait for the goodbye broadcast before a shared instance moves on
+            await (await self._zeroconf.async_unregister_service(self._service_info))
+            # Keep the ServiceInfo: a restart with the same settings reuses it
+            self._mdns_registered = False
             logger.debug("Unregistered mDNS service")
+        if self._zeroconf and self._owns_zeroconf:
+            await self._zeroconf.async_close()
+            self._zeroconf = None
 
     def _get_local_ip(self) -> Optional[str]:
-        """
-        Get the local IP address.
-
-        Uses a dummy socket connection to determine the outbound IP.
-        """
-        try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.settimeout(0)
-            try:
-                # Doesn't actually connect, just determines route
-                s.connect(("8.8.8.8", 80))
-                ip = s.getsockname()[0]
-            finally:
-                s.close()
-            return str(ip)
-        except Exception as e:
-            logger.error(f"Failed to determine local IP: {e}")
-            return None
+        """Get the local IP address (detected once, then cached)."""
+        ip = _detect_local_ip()
+        if ip is None:
+            # Don't cache a failure: the network may just not be up yet
+            _detect_local_ip.cache_clear()
+        return ip
+
+    def _get_local_ipv6(self) -> Optional[str]:
+        """Get the local IPv6 address, if any (detected once, then cached)."""
+        return _detect_local_ipv6()
+
+    def invalidate_local_ip(self) -> None:
+        """Forget the detected local IPs, e.g. after a network change."""
+        _detect_local_ip.cache_clear()
+        _detect_local_ipv6.cache_clear()
@@ -6,7 +6,7 @@ from dataclasses import dataclass
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class JWTConnectToken:
     """WebSocket JWT token received from Qobuz app."""
 
@@ -19,7 +19,7 @@ class JWTConnectToken:
         return bool(self.jwt and self.exp and self.endpoint)
 
 
-@dataclass
+@dataclass(slots=True)
 class JWTApiToken:
     """API JWT token received from Qobuz app."""
 
@@ -31,7 +31,7 @@ class JWTApiToken:
         return bool(self.jwt and self.exp)
 
 
-@dataclass
+@dataclass(slots=True)
 class ConnectTokens:
     """Tokens received from POST /connect-to-qconnect."""
 
@@ -5,9 +5,10 @@ Handles connection lifecycle, authentication, and message routing.
 """
 
 import asyncio
+import concurrent.futures
 import logging
 import uuid
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Optional, Set, Union
 
 import websockets
 from websockets import ClientConnection
@@ -28,9 +29,11 @@ TOKEN_REFRESH_BUFFER = 60  # seconds before expiry
 INITIAL_RECONNECT_DELAY = 1.0  # seconds
 MAX_RECONNECT_DELAY = 60.0  # seconds
 RECONNECT_BACKOFF_MULTIPLIER = 2.0
+HANDLER_POOL_WORKERS = 2  # threads for sync message handlers
 
-# Message handler callback type
+# Message handler callback types
 MessageHandler = Callable[[int, Any], None]
+AsyncMessageHandler = Callable[[int, Any], Awaitable[None]]
 
 
 class WsManager:
@@ -66,7 +69,13 @@ class WsManager:
         self._reconnect_delay = INITIAL_RECONNECT_DELAY
 
         # Message handlers: message_type -> handler
-        self._handlers: Dict[int, MessageHandler] = {}
+        # Async handlers run as tasks on the event loop; sync handlers run in
+        # a small thread pool (created on first use, shut down on stop) so they
+        # never stall the receive loop.
+        self._async_handlers: Dict[int, AsyncMessageHandler] = {}
+        self._sync_handlers: Dict[int, MessageHandler] = {}
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._handler_tasks: Set[asyncio.Task[None]] = set()
 
         # Outgoing message queue (for messages during disconnect)
         self._pending_messages: list[bytes] = []
@@ -114,15 +123,32 @@ class WsManager:
         """Register callback for disconnection."""
         self._on_disconnected = callback
 
-    def register_handler(self, message_type: int, handler: MessageHandler) -> None:
+    def register_handler(
+        self,
+        message_type: int,
+        handler: Union[MessageHandler, AsyncMessageHandler],
+        *,
+        is_async: bool = False,
+    ) -> None:
         """
         Register a handler for a specific QConnect message type.
 
+        Async handlers are scheduled as tasks on the event loop. Sync handlers
+        are dispatched to a bounded thread pool, so they must not touch the
+        event loop directly.
+
         Args:
             message_type: QConnectMessage type code (e.g., 41 for SET_STATE)
             handler: Callback function(message_type, message_data)
+            is_async: True if handler is a coroutine function
         """
-        self._handlers[message_type] = handler
+        # A message type has exactly one handler, whichever table it lives in
+        self._async_handlers.pop(message_type, None)
+        self._sync_handlers.pop(message_type, None)
+        if is_async:
+            self._async_handlers[message_type] = handler  # type: ignore[assignment]
+        else:
+            self._sync_handlers[message_type] = handler  # type: ignore[assignment]
         logger.debug(f"Registered handler for message type {message_type}")
 
     async def start(self) -> None:
@@ -146,6 +172,11 @@ class WsManager:
                 await self._receive_task
             except asyncio.CancelledError:
                 pass
+        for task in list(self._handler_tasks):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
         logger.info("WebSocket manager stopped")
 
     @property
@@ -454,15 +485,48 @@ class WsManager:
 
         for msg in batch.messages:
             msg_type = msg.messageType
-            handler = self._handlers.get(msg_type)
-            if handler:
-                try:
-                    handler(msg_type, msg)
-                except Exception as e:
-                    logger.error(f"Handler error for type {msg_type}: {e}")
+            async_handler = self._async_handlers.get(msg_type)
+            if async_handler:
+                self._spawn_handler_task(self._run_async_handler(async_handler, msg_type, msg))
+                continue
+
+            sync_handler = self._sync_handlers.get(msg_type)
+            if sync_handler:
+                self._spawn_handler_task(self._run_sync_handler(sync_handler, msg_type, msg))
             else:
                 logger.debug(f"No handler for message type {msg_type}")
 
+    def _spawn_handler_task(self, coro: Coroutine[Any, Any, None]) -> None:
+        """Run a handler without blocking the receive loop, keeping a task reference."""
+        task = asyncio.create_task(coro)
+        self._handler_tasks.add(task)
+        task.add_done_callback(self._handler_tasks.discard)
+
+    async def _run_async_handler(
+        self, handler: AsyncMessageHandler, msg_type: int, msg: Any
+    ) -> None:
+        """Await an async handler, logging any error."""
+        try:
+            await handler(msg_type, msg)
+        except Exception as e:
+            logger.error(f"Handler error for type {msg_type}: {e}")
+
+    def _get_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """Get the sync handler thread pool, creating it if not running."""
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=HANDLER_POOL_WORKERS, thread_name_prefix="ws-handler"
+            )
+        return self._executor
+
+    async def _run_sync_handler(self, handler: MessageHandler, msg_type: int, msg: Any) -> None:
+        """Run a sync handler in the handler thread pool, logging any error."""
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._get_executor(), handler, msg_type, msg)
+        except Exception as e:
+            logger.error(f"Handler error for type {msg_type}: {e}")
+
     async def _flush_pending_messages(self) -> None:
         """Send any messages queued during disconnect."""
         if not self._pending_messages:
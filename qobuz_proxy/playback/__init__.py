@@ -15,7 +15,7 @@ from .queue import (
 )
 from .queue_handler import QueueHandler
 from .player import QobuzPlayer
-from .command_handler import PlaybackCommandHandler
+from .command_handler import NextTrackInfo, PlaybackCommandHandler
 from .volume_handler import VolumeCommandHandler
 from .state_reporter import StateReporter, PlaybackStateReport
 
@@ -34,6 +34,7 @@ __all__ = [
     "RepeatMode",
     # Player
     "QobuzPlayer",
+    "NextTrackInfo",
     "PlaybackCommandHandler",
     "VolumeCommandHandler",
     # State reporting
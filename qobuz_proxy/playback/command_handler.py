@@ -5,6 +5,7 @@ Processes playback commands from the Qobuz app via WsManager.
 """
 
 import logging
+from dataclasses import dataclass
 from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional
 
 if TYPE_CHECKING:
@@ -25,6 +26,22 @@ MSG_TYPE_SET_SHUFFLE_MODE = 46  # SrvrRndrSetShuffleMode
 MSG_TYPE_SET_AUTOPLAY_MODE = 47  # SrvrRndrSetAutoplayMode
 
 
+@dataclass(slots=True)
+class NextTrackInfo:
+    """
+    Next queue item announced by SET_STATE, used for auto-advance.
+
+    Attributes:
+        queue_item_id: Queue entry ID (from server)
+        track_id: Qobuz track ID
+        context_uuid: Optional context (album, playlist) UUID
+    """
+
+    queue_item_id: int
+    track_id: str
+    context_uuid: Optional[bytes] = None
+
+
 class PlaybackCommandHandler:
     """
     Handles playback commands from WebSocket.
@@ -51,7 +68,7 @@ class PlaybackCommandHandler:
         self._on_quality_change = on_quality_change
 
         # Store next track info for auto-advance (from SET_STATE nextQueueItem)
-        self._next_track_info: Optional[dict] = None
+        self._next_track_info: Optional[NextTrackInfo] = None
 
     def get_message_types(self) -> list[int]:
         """Get list of message types this handler processes."""
@@ -109,10 +126,12 @@ class PlaybackCommandHandler:
         current_item = None
         current_queue_item_id = None
         current_track_id = None
+        current_track_id_str: Optional[str] = None
         if state.HasField("currentQueueItem"):
             current_item = state.currentQueueItem
             current_queue_item_id = current_item.queueItemId
             current_track_id = current_item.trackId
+            current_track_id_str = str(current_track_id)
             logger.debug(
                 f"Current queue item: queueItemId={current_queue_item_id}, trackId={current_track_id}"
             )
@@ -120,11 +139,11 @@ class PlaybackCommandHandler:
         # Extract and store next queue item for auto-advance
         if state.HasField("nextQueueItem"):
             next_item = state.nextQueueItem
-            self._next_track_info = {
-                "queueItemId": next_item.queueItemId,
-                "trackId": str(next_item.trackId),
-                "contextUuid": next_item.contextUuid if next_item.contextUuid else None,
-            }
+            self._next_track_info = NextTrackInfo(
+                next_item.queueItemId,
+                str(next_item.trackId),
+                next_item.contextUuid or None,
+            )
             logger.debug(
                 f"Next track stored: queueItemId={next_item.queueItemId}, trackId={next_item.trackId}"
             )
@@ -133,12 +152,12 @@ class PlaybackCommandHandler:
         player_track = self.player.current_track
         player_track_id = player_track.track_id if player_track else None
 
-        if current_item and str(current_track_id) != player_track_id:
+        if current_track_id_str is not None and current_track_id_str != player_track_id:
             # App wants us to play a different track - load it
             logger.info(f"Loading new track: {current_track_id}")
             await self.player.load_track(
                 queue_item_id=current_queue_item_id,
-                track_id=str(current_track_id),
+                track_id=current_track_id_str,
             )
 
         # Extract position
@@ -160,7 +179,7 @@ class PlaybackCommandHandler:
             elif proto_state == 1:  # STOPPED
                 await self.player.stop_playback()
 
-    def get_next_track_info(self) -> Optional[dict]:
+    def get_next_track_info(self) -> Optional[NextTrackInfo]:
         """Get the stored next track info for auto-advance."""
         return self._next_track_info
 
@@ -2,10 +2,13 @@
 Track metadata retrieval and caching.
 """
 
+import asyncio
 import logging
 import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import TYPE_CHECKING, Any, Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional, TypeVar
 
 if TYPE_CHECKING:
     from qobuz_proxy.auth.api_client import QobuzAPIClient
@@ -13,6 +16,8 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class AudioQuality:
     """Qobuz audio quality format IDs."""
@@ -29,13 +34,19 @@ class AudioQuality:
         27: "FLAC Hi-Res (24-bit/192kHz)",
     }
 
-    @classmethod
-    def get_name(cls, quality_id: int) -> str:
+    @staticmethod
+    def get_content_type(quality_id: int) -> str:
+        """Get the stream MIME type for quality ID."""
+        return "audio/mpeg" if quality_id == AudioQuality.MP3_320 else "audio/flac"
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def get_name(quality_id: int) -> str:
         """Get human-readable name for quality ID."""
-        return cls.NAMES.get(quality_id, f"Unknown ({quality_id})")
+        return AudioQuality.NAMES.get(quality_id, f"Unknown ({quality_id})")
 
 
-@dataclass
+@dataclass(slots=True)
 class TrackMetadata:
     """Track metadata."""
 
@@ -48,7 +59,7 @@ class TrackMetadata:
 
     # Streaming info (fetched separately)
     streaming_url: str = ""
-    streaming_url_expires_at: int = 0  # Timestamp in seconds
+    streaming_url_expires_at: float = 0  # time.monotonic() seconds
     actual_quality: int = 0  # Quality ID of the streaming URL
 
     def to_dict(self) -> dict[str, Any]:
@@ -64,12 +75,19 @@ class TrackMetadata:
             "quality_name": AudioQuality.get_name(self.actual_quality),
         }
 
-    def is_url_expired(self, buffer_s: int = 30) -> bool:
-        """Check if streaming URL is expired or will expire soon."""
+    def is_url_expired(self, buffer_s: int = 30, now: Optional[float] = None) -> bool:
+        """
+        Check if streaming URL is expired or will expire soon.
+
+        Args:
+            buffer_s: Treat the URL as expired this many seconds early
+            now: Current time.monotonic() value, if the caller already has one
+        """
         if not self.streaming_url or not self.streaming_url_expires_at:
             return True
-        now_s = int(time.time())
-        return now_s + buffer_s >= self.streaming_url_expires_at
+        if now is None:
+            now = time.monotonic()
+        return now + buffer_s >= self.streaming_url_expires_at
 
     @property
     def duration_s(self) -> float:
@@ -77,24 +95,26 @@ class TrackMetadata:
         return self.duration_ms / 1000.0
 
 
-@dataclass
+@dataclass(slots=True)
 class MetadataCache:
-    """In-memory cache for track metadata."""
+    """In-memory LRU cache for track metadata."""
 
-    _cache: dict[str, TrackMetadata] = field(default_factory=dict)
+    _cache: "OrderedDict[str, TrackMetadata]" = field(default_factory=OrderedDict)
     _max_size: int = 100
 
     def get(self, track_id: str) -> Optional[TrackMetadata]:
-        """Get cached metadata for track."""
-        return self._cache.get(track_id)
+        """Get cached metadata for track, marking it most recently used."""
+        metadata = self._cache.get(track_id)
+        if metadata is not None:
+            self._cache.move_to_end(track_id)
+        return metadata
 
     def set(self, track_id: str, metadata: TrackMetadata) -> None:
-        """Cache metadata for track."""
-        # Simple LRU: remove oldest if at capacity
-        if len(self._cache) >= self._max_size and track_id not in self._cache:
-            oldest = next(iter(self._cache))
-            del self._cache[oldest]
+        """Cache metadata for track, evicting the least recently used if full."""
         self._cache[track_id] = metadata
+        self._cache.move_to_end(track_id)
+        if len(self._cache) > self._max_size:
+            self._cache.popitem(last=False)
 
     def clear(self) -> None:
         """Clear all cached metadata."""
@@ -106,6 +126,12 @@ class MetadataCache:
             self._cache[track_id].streaming_url = ""
             self._cache[track_id].streaming_url_expires_at = 0
 
+    def invalidate_all_urls(self) -> None:
+        """Invalidate streaming URLs for all cached tracks (keep metadata)."""
+        for metadata in self._cache.values():
+            metadata.streaming_url = ""
+            metadata.streaming_url_expires_at = 0
+
 
 class MetadataService:
     """
@@ -117,6 +143,20 @@ class MetadataService:
     # URL TTL estimate (Qobuz URLs expire after ~5 minutes)
     URL_TTL_SECONDS = 5 * 60
 
+    # Max concurrent API requests when preloading a queue
+    PRELOAD_CONCURRENCY = 6
+
+    # Number of upcoming tracks whose streaming URLs are warmed ahead of time
+    PREFETCH_DEPTH = 2
+
+    # Quality IDs to try for each max_quality, highest to lowest
+    _QUALITY_FALLBACK: dict[int, tuple[int, ...]] = {
+        27: (27, 7, 6, 5),
+        7: (7, 6, 5),
+        6: (6, 5),
+        5: (5,),
+    }
+
     def __init__(self, api_client: "QobuzAPIClient", max_quality: int = 27):
         """
         Initialize metadata service.
@@ -129,6 +169,10 @@ class MetadataService:
         self._max_quality = max_quality
         self._cache = MetadataCache()
 
+        # In-flight API fetches per track ID, shared by concurrent callers
+        self._inflight: dict[str, asyncio.Future[Optional[TrackMetadata]]] = {}
+        self._inflight_urls: dict[str, asyncio.Future[None]] = {}
+
     @property
     def max_quality(self) -> int:
         """Get current max quality setting."""
@@ -143,13 +187,13 @@ class MetadataService:
         """
         if quality != self._max_quality:
             logger.info(
-                f"Quality changed: {AudioQuality.get_name(self._max_quality)} -> "
-                f"{AudioQuality.get_name(quality)}"
+                "Quality changed: %s -> %s",
+                AudioQuality.get_name(self._max_quality),
+                AudioQuality.get_name(quality),
             )
             self._max_quality = quality
             # Invalidate all cached streaming URLs (keep metadata)
-            for track_id in list(self._cache._cache.keys()):
-                self._cache.invalidate_url(track_id)
+            self._cache.invalidate_all_urls()
 
     async def get_metadata(self, track_id: str, fetch_url: bool = False) -> Optional[TrackMetadata]:
         """
@@ -162,24 +206,30 @@ class MetadataService:
         Returns:
             TrackMetadata or None if not found
         """
+        now = time.monotonic()
+
         # Check cache
         cached = self._cache.get(track_id)
         if cached:
             # If URL requested and cached URL valid, return cached
-            if not fetch_url or not cached.is_url_expired():
+            if not fetch_url or not cached.is_url_expired(now=now):
                 return cached
             # Otherwise fall through to refresh URL
             metadata: TrackMetadata = cached
         else:
             # Fetch from API
-            fetched = await self._fetch_metadata(track_id)
+            fetched = await self._single_flight(
+                self._inflight, track_id, lambda: self._fetch_metadata(track_id)
+            )
             if not fetched:
                 return None
             metadata = fetched
 
-        # Fetch URL if requested
-        if fetch_url:
-            await self._fetch_streaming_url(metadata)
+        # Fetch URL if requested (a concurrent caller may have just fetched it)
+        if fetch_url and metadata.is_url_expired(now=now):
+            await self._single_flight(
+                self._inflight_urls, track_id, lambda: self._fetch_streaming_url(metadata, now)
+            )
 
         # Cache and return
         self._cache.set(track_id, metadata)
@@ -233,19 +283,76 @@ class MetadataService:
         """
         Preload metadata for multiple tracks.
 
+        Fetches run concurrently, at most PRELOAD_CONCURRENCY at a time.
+
         Args:
             track_ids: List of track IDs to preload
         """
-        for track_id in track_ids:
-            if not self._cache.get(track_id):
-                await self.get_metadata(track_id, fetch_url=False)
+        semaphore = asyncio.Semaphore(self.PRELOAD_CONCURRENCY)
+
+        async def preload(track_id: str) -> None:
+            async with semaphore:
+                if not self._cache.get(track_id):
+                    await self.get_metadata(track_id, fetch_url=False)
+
+        await asyncio.gather(*(preload(t) for t in track_ids), return_exceptions=True)
+
+    async def prefetch_next(self, track_ids: list[str], depth: int = PREFETCH_DEPTH) -> None:
+        """
+        Warm streaming URLs for the next few tracks in the background.
+
+        Only the first `depth` tracks are fetched, so skipping around a long
+        queue doesn't burn API quota. Fetches share the per-track single-flight
+        path, so a track started while its prefetch is running waits for it
+        instead of fetching twice.
+
+        Args:
+            track_ids: Upcoming track IDs, next track first
+            depth: Max number of tracks to prefetch
+        """
+        await asyncio.gather(
+            *(self.get_streaming_url(t) for t in track_ids[:depth]), return_exceptions=True
+        )
+
+    @staticmethod
+    async def _single_flight(
+        inflight: dict[str, "asyncio.Future[T]"],
+        track_id: str,
+        fetch: Callable[[], Awaitable[T]],
+    ) -> T:
+        """
+        Run fetch() once per track ID at a time.
+
+        Concurrent callers for the same track await the in-flight fetch
+        instead of issuing a duplicate API request.
+        """
+        pending = inflight.get(track_id)
+        if pending is not None:
+            # Shield so a cancelled waiter doesn't cancel the shared fetch
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        inflight[track_id] = future
+        try:
+            result = await fetch()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del inflight[track_id]
 
     async def _fetch_metadata(self, track_id: str) -> Optional[TrackMetadata]:
         """Fetch metadata from Qobuz API."""
         try:
             data = await self._api.get_track_metadata(track_id)
             if not data:
-                logger.warning(f"No metadata found for track {track_id}")
+                logger.warning("No metadata found for track %s", track_id)
                 return None
 
             metadata = TrackMetadata(
@@ -257,15 +364,25 @@ class MetadataService:
                 artwork_url=data.get("album_art_url", ""),
             )
 
-            logger.debug(f"Fetched metadata: {metadata.artist} - {metadata.title}")
+            logger.debug("Fetched metadata: %s - %s", metadata.artist, metadata.title)
             return metadata
 
         except Exception as e:
-            logger.error(f"Failed to fetch metadata for {track_id}: {e}")
+            logger.error("Failed to fetch metadata for %s: %s", track_id, e)
             return None
 
-    async def _fetch_streaming_url(self, metadata: TrackMetadata) -> None:
-        """Fetch streaming URL for track."""
+    async def _fetch_streaming_url(
+        self, metadata: TrackMetadata, now: Optional[float] = None
+    ) -> None:
+        """
+        Fetch streaming URL for track.
+
+        Args:
+            metadata: Track to fetch the URL for (updated in place)
+            now: time.monotonic() snapshot the URL TTL is counted from
+        """
+        if now is None:
+            now = time.monotonic()
         try:
             # Try preferred quality, fall back to lower qualities
             qualities = self._get_quality_fallback_order()
@@ -274,32 +391,28 @@ class MetadataService:
                 result = await self._api.get_track_url(metadata.track_id, quality)
                 if result:
                     metadata.streaming_url = result["url"]
-                    metadata.streaming_url_expires_at = int(time.time()) + self.URL_TTL_SECONDS
+                    metadata.streaming_url_expires_at = now + self.URL_TTL_SECONDS
                     # Use the actual format_id from API response (may differ from requested)
                     actual_quality = result.get("format_id", quality)
                     metadata.actual_quality = actual_quality
 
                     if actual_quality != self._max_quality:
                         logger.info(
-                            f"Track {metadata.track_id}: actual quality "
-                            f"{AudioQuality.get_name(actual_quality)} "
-                            f"(requested {AudioQuality.get_name(self._max_quality)})"
+                            "Track %s: actual quality %s (requested %s)",
+                            metadata.track_id,
+                            AudioQuality.get_name(actual_quality),
+                            AudioQuality.get_name(self._max_quality),
                         )
                     return
 
-            logger.error(f"No streaming URL available for {metadata.track_id}")
+            logger.error("No streaming URL available for %s", metadata.track_id)
 
         except Exception as e:
-            logger.error(f"Failed to fetch URL for {metadata.track_id}: {e}")
+            logger.error("Failed to fetch URL for %s: %s", metadata.track_id, e)
 
-    def _get_quality_fallback_order(self) -> list[int]:
+    def _get_quality_fallback_order(self) -> tuple[int, ...]:
         """Get quality IDs in fallback order from max_quality."""
-        all_qualities = [27, 7, 6, 5]  # Highest to lowest
-        try:
-            start_idx = all_qualities.index(self._max_quality)
-            return all_qualities[start_idx:]
-        except ValueError:
-            return all_qualities
+        return self._QUALITY_FALLBACK.get(self._max_quality, self._QUALITY_FALLBACK[27])
 
     def log_now_playing(self, metadata: TrackMetadata) -> None:
         """
@@ -310,8 +423,11 @@ class MetadataService:
         """
         quality_name = AudioQuality.get_name(metadata.actual_quality)
         logger.info(
-            f"Now playing: {metadata.artist} - {metadata.title} "
-            f"[{metadata.album}] ({quality_name})"
+            "Now playing: %s - %s [%s] (%s)",
+            metadata.artist,
+            metadata.title,
+            metadata.album,
+            quality_name,
         )
 
     def log_now_playing_info(
@@ -328,6 +444,9 @@ class MetadataService:
             actual_quality if actual_quality is not None else self._max_quality
         )
         logger.info(
-            f"Now playing: {metadata.artist} - {metadata.title} "
-            f"[{metadata.album}] ({quality_name})"
+            "Now playing: %s - %s [%s] (%s)",
+            metadata.artist,
+            metadata.title,
+            metadata.album,
+            quality_name,
         )
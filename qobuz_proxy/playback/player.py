@@ -16,9 +16,10 @@ from qobuz_proxy.backends import (
     BufferStatus,
 )
 from .queue import QobuzQueue, QueueTrack, RepeatMode
-from .metadata import MetadataService
+from .metadata import AudioQuality, MetadataService
 
 if TYPE_CHECKING:
+    from .command_handler import NextTrackInfo
     from .state_reporter import StateReporter
 
 logger = logging.getLogger(__name__)
@@ -82,12 +83,13 @@ class QobuzPlayer:
         self._file_quality_report_callback: Optional[Callable[[int], asyncio.Future]] = None
 
         # Next track callback - used when track ends to get the next track from SET_STATE
-        self._get_next_track_callback: Optional[Callable[[], Optional[dict]]] = None
+        self._get_next_track_callback: Optional[Callable[[], Optional["NextTrackInfo"]]] = None
         self._clear_next_track_callback: Optional[Callable[[], None]] = None
 
         # Background tasks
         self._playback_monitor_task: Optional[asyncio.Task] = None
         self._state_update_task: Optional[asyncio.Task] = None
+        self._prefetch_tasks: set[asyncio.Task] = set()
         self._is_running: bool = False
 
         # Wire up queue callbacks to metadata service
@@ -137,6 +139,8 @@ class QobuzPlayer:
                     await task
                 except asyncio.CancelledError:
                     pass
+        for task in list(self._prefetch_tasks):
+            task.cancel()
 
         # Stop queue
         await self.queue.stop()
@@ -174,14 +178,14 @@ class QobuzPlayer:
 
     def set_next_track_callbacks(
         self,
-        get_callback: Callable[[], Optional[dict]],
+        get_callback: Callable[[], Optional["NextTrackInfo"]],
         clear_callback: Callable[[], None],
     ) -> None:
         """
         Set callbacks for getting next track info from command handler.
 
         This is used for auto-advance when the current track ends.
-        The get_callback should return track info dict with queueItemId and trackId,
+        The get_callback should return a NextTrackInfo with queue_item_id and track_id,
         or None if no next track is available.
         """
         self._get_next_track_callback = get_callback
@@ -716,6 +720,8 @@ class QobuzPlayer:
 
             # Get actual quality from cache (set during URL fetch)
             actual_quality = self.metadata.get_track_actual_quality(track.track_id)
+            if actual_quality:
+                backend_meta.content_type = AudioQuality.get_content_type(actual_quality)
 
             # Log now playing with actual quality
             self.metadata.log_now_playing_info(backend_meta, actual_quality)
@@ -738,6 +744,7 @@ class QobuzPlayer:
             self._position_timestamp_ms = int(time.time() * 1000)
 
             await self._send_state_update()
+            self._schedule_prefetch()
             return True
 
         except Exception as e:
@@ -746,6 +753,27 @@ class QobuzPlayer:
             await self._send_state_update()
             return False
 
+    def _schedule_prefetch(self) -> None:
+        """Warm streaming URLs for the upcoming tracks in the background."""
+        task = asyncio.create_task(self._prefetch_upcoming())
+        self._prefetch_tasks.add(task)
+        task.add_done_callback(self._prefetch_tasks.discard)
+
+    async def _prefetch_upcoming(self) -> None:
+        """Prefetch URLs for the server's next track, then the local queue's."""
+        depth = self.metadata.PREFETCH_DEPTH
+        track_ids: list[str] = []
+        if self._get_next_track_callback:
+            next_track_info = self._get_next_track_callback()
+            if next_track_info:
+                track_ids.append(next_track_info.track_id)
+        track_ids.extend(await self.queue.get_upcoming_track_ids(depth))
+
+        upcoming = list(dict.fromkeys(track_ids))  # Remove duplicates
+        if upcoming:
+            logger.debug(f"Prefetching streaming URLs for {upcoming[:depth]}")
+            await self.metadata.prefetch_next(upcoming, depth)
+
     # =========================================================================
     # Position Tracking
     # =========================================================================
@@ -804,15 +832,15 @@ class QobuzPlayer:
         if self._get_next_track_callback:
             next_track_info = self._get_next_track_callback()
             if next_track_info:
-                logger.info(f"Auto-advancing to next track: {next_track_info['trackId']}")
+                logger.info(f"Auto-advancing to next track: {next_track_info.track_id}")
                 # Clear the stored next track info since we're using it
                 if self._clear_next_track_callback:
                     self._clear_next_track_callback()
 
                 # Load and play the next track
                 await self.play_track(
-                    queue_item_id=next_track_info["queueItemId"],
-                    track_id=next_track_info["trackId"],
+                    queue_item_id=next_track_info.queue_item_id,
+                    track_id=next_track_info.track_id,
                     position_ms=0,
                 )
                 return
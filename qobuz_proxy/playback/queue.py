@@ -382,6 +382,15 @@ class QobuzQueue:
             return None
         return self._shuffled_indexes[self._current_index]
 
+    async def get_upcoming_track_ids(self, count: int) -> list[str]:
+        """Get track IDs of up to `count` tracks after the current one, in play order."""
+        async with self._lock:
+            start = self._current_index + 1
+            return [
+                self._tracks[track_index].track_id
+                for track_index in self._shuffled_indexes[start : start + count]
+            ]
+
     async def advance_to_next(self) -> Optional[QueueTrack]:
         """
         Advance to next track respecting repeat mode.
@@ -5,7 +5,7 @@ Processes volume commands from the Qobuz app via WsManager.
 """
 
 import logging
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
 
 if TYPE_CHECKING:
     from .player import QobuzPlayer
@@ -16,6 +16,8 @@ logger = logging.getLogger(__name__)
 MSG_TYPE_SRVR_RNDR_SET_VOLUME = 42  # Server -> Renderer: set volume
 MSG_TYPE_SRVR_CTRL_VOLUME_CHANGED = 87  # Server broadcast: volume changed
 
+VolumeMessageHandler = Callable[[Any], Awaitable[None]]
+
 
 class VolumeCommandHandler:
     """
@@ -28,24 +30,26 @@ class VolumeCommandHandler:
         """Initialize handler."""
         self.player = player
 
+        # Message type -> handler
+        self._handlers: dict[int, VolumeMessageHandler] = {
+            MSG_TYPE_SRVR_RNDR_SET_VOLUME: self._handle_set_volume,
+            MSG_TYPE_SRVR_CTRL_VOLUME_CHANGED: self._handle_volume_changed,
+        }
+
     def get_message_types(self) -> list[int]:
         """Get list of message types this handler processes."""
-        return [
-            MSG_TYPE_SRVR_RNDR_SET_VOLUME,
-            MSG_TYPE_SRVR_CTRL_VOLUME_CHANGED,
-        ]
+        return list(self._handlers)
 
     async def handle_message(self, msg_type: int, message: Any) -> None:
         """Handle a volume command message."""
+        handler = self._handlers.get(msg_type)
+        if handler is None:
+            logger.warning("Unhandled volume message type: %s", msg_type)
+            return
         try:
-            if msg_type == MSG_TYPE_SRVR_RNDR_SET_VOLUME:
-                await self._handle_set_volume(message)
-            elif msg_type == MSG_TYPE_SRVR_CTRL_VOLUME_CHANGED:
-                await self._handle_volume_changed(message)
-            else:
-                logger.warning(f"Unhandled volume message type: {msg_type}")
+            await handler(message)
         except Exception as e:
-            logger.error(f"Error handling volume command {msg_type}: {e}", exc_info=True)
+            logger.error("Error handling volume command %s: %s", msg_type, e, exc_info=True)
 
     async def _handle_set_volume(self, message: Any) -> None:
         """
@@ -61,13 +65,13 @@ class VolumeCommandHandler:
         # Check for absolute volume first
         if vol_msg.HasField("volume"):
             volume = vol_msg.volume
-            logger.debug(f"Received set volume: {volume}")
+            logger.debug("Received set volume: %s", volume)
             await self.player.set_volume(volume)
 
         # Check for volume delta
         elif vol_msg.HasField("volumeDelta"):
             delta = vol_msg.volumeDelta
-            logger.debug(f"Received volume delta: {delta}")
+            logger.debug("Received volume delta: %s", delta)
             await self.player.set_volume_delta(delta)
 
     async def _handle_volume_changed(self, message: Any) -> None:
@@ -86,5 +90,5 @@ class VolumeCommandHandler:
         # For single-instance, we assume it's for us
         if vol_msg.HasField("volume"):
             volume = vol_msg.volume
-            logger.debug(f"Received volume changed broadcast: {volume}")
+            logger.debug("Received volume changed broadcast: %s", volume)
             await self.player.set_volume(volume)
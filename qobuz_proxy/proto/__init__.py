@@ -3,17 +3,34 @@ Compiled Protocol Buffer modules for Qobuz Connect protocol.
 
 Compile protos with:
     protoc --python_out=qobuz_proxy/proto -I protos protos/*.proto
+
+Submodules are imported lazily on first access, so code that only needs
+e.g. `envelope` doesn't register every other descriptor at import time.
 """
 
-try:
+import importlib
+from types import ModuleType
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
     from . import qconnect_common_pb2 as common
     from . import qconnect_envelope_pb2 as envelope
     from . import qconnect_payload_pb2 as payload
     from . import qconnect_queue_pb2 as queue
-except ImportError as e:
-    raise ImportError(
-        "Protocol buffer modules not compiled. Run: "
-        "protoc --python_out=qobuz_proxy/proto -I protos protos/*.proto"
-    ) from e
 
 __all__ = ["common", "envelope", "payload", "queue"]
+
+
+def __getattr__(name: str) -> ModuleType:
+    """Import a compiled proto module on first access (PEP 562)."""
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    try:
+        module = importlib.import_module(f".qconnect_{name}_pb2", __name__)
+    except ImportError as e:
+        raise ImportError(
+            "Protocol buffer modules not compiled. Run: "
+            "protoc --python_out=qobuz_proxy/proto -I protos protos/*.proto"
+        ) from e
+    globals()[name] = module
+    return module
@@ -0,0 +1 @@
+"""Tests for auth module."""
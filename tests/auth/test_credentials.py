@@ -0,0 +1,322 @@
+"""Tests for Qobuz credential scraping."""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+import aiohttp
+import pytest
+
+from qobuz_proxy.auth import credentials
+from qobuz_proxy.auth.credentials import CredentialScraper
+
+# Secret "abc123secret" base64url-encoded, split across seed/info/extras and
+# followed by the 44 trailing characters the scraper discards.
+SEED = "YWJjMTIz"
+INFO = "c2VjcmV0" + "X" * 20
+EXTRAS = "Y" * 24
+
+BUNDLE = (
+    'var config={production:{api:{appId:"123456789",appSecret:"x"}}};'
+    f'a.initialSeed("{SEED}",window.utimezone.berlin);'
+    f'var tz={{name:"Europe/Berlin",info:"{INFO}",extras:"{EXTRAS}"}};'
+)
+
+
+@pytest.fixture
+def scraper() -> CredentialScraper:
+    """Create a credential scraper."""
+    return CredentialScraper()
+
+
+class TestBundleScanning:
+    """Tests for JavaScript bundle scanning."""
+
+    def test_scan_bundle(self, scraper: CredentialScraper) -> None:
+        """Test app_id and seeds come out of one scan, timezone capitalized."""
+        assert scraper._scan_bundle(BUNDLE) == ("123456789", {"Berlin": SEED})
+
+    def test_scan_bundle_no_match(self, scraper: CredentialScraper) -> None:
+        """Test scanning JavaScript without app_id or seeds."""
+        assert scraper._scan_bundle("var x = 1;") == (None, {})
+
+    def test_scan_bundle_seeds_only(self, scraper: CredentialScraper) -> None:
+        """Test a bundle with seeds for several timezones but no app_id."""
+        js = (
+            'a.initialSeed("one",window.utimezone.berlin);'
+            'b.initialSeed("two",window.utimezone.london);'
+        )
+        assert scraper._scan_bundle(js) == (None, {"Berlin": "one", "London": "two"})
+
+    def test_derive_secrets(self, scraper: CredentialScraper) -> None:
+        """Test secret derivation from seed + info + extras."""
+        secrets = scraper._derive_secrets(BUNDLE, {"Berlin": SEED})
+        assert secrets == {"Berlin": "abc123secret"}
+
+    def test_derive_secrets_no_match(self, scraper: CredentialScraper) -> None:
+        """Test secret derivation for a timezone without info/extras."""
+        assert scraper._derive_secrets(BUNDLE, {"London": SEED}) == {}
+
+
+ENTRY_HTML = """
+<html><head>
+<link rel="preload" as="script" href="/resources/main.js">
+<link rel="preload" as="style" href="/resources/main.css">
+<script src="https://play.qobuz.com/resources/vendor.js"></script>
+<script src="https://cdn.example.com/analytics.js"></script>
+<script src="/resources/main.js"></script>
+<script>inline()</script>
+</head></html>
+"""
+
+
+class TestExtractScripts:
+    """Tests for entry-page script extraction."""
+
+    EXPECTED = [
+        "https://play.qobuz.com/resources/vendor.js",
+        "https://play.qobuz.com/resources/main.js",
+    ]
+
+    def test_extract_scripts(self, scraper: CredentialScraper) -> None:
+        """Test player bundles are extracted, absolutized and deduplicated."""
+        scripts = scraper._extract_scripts(ENTRY_HTML, "https://play.qobuz.com/login")
+        assert sorted(scripts) == sorted(self.EXPECTED)
+
+    def test_extract_scripts_ignores_other_attributes(self, scraper: CredentialScraper) -> None:
+        """Test only quoted src/href values are picked up, whatever the attribute order."""
+        html = (
+            '<script type="module" crossorigin SRC="/resources/app.js?v=2"></script>'
+            '<meta content="/resources/not-a-script.js">'
+        )
+        scripts = scraper._extract_scripts(html, "https://play.qobuz.com/")
+        assert scripts == ["https://play.qobuz.com/resources/app.js?v=2"]
+
+
+class FakeResponse:
+    """Minimal aiohttp response stand-in that serves a body in chunks."""
+
+    def __init__(self, body: bytes, status: int = 200) -> None:
+        self.status = status
+        self.closed = False
+        self.chunks_read = 0
+        self._body = body
+        self.content = self
+
+    async def iter_chunked(self, size: int) -> AsyncIterator[bytes]:
+        for i in range(0, len(self._body), size):
+            self.chunks_read += 1
+            yield self._body[i : i + size]
+
+    def close(self) -> None:
+        self.closed = True
+
+    async def __aenter__(self) -> "FakeResponse":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        pass
+
+
+class FakeSession:
+    """Session stand-in returning canned responses by URL."""
+
+    def __init__(self, responses: dict[str, FakeResponse]) -> None:
+        self.responses = responses
+
+    def get(self, url: str, **kwargs: Any) -> FakeResponse:
+        return self.responses[url]
+
+
+class TestBundleStreaming:
+    """Tests for chunked bundle scanning."""
+
+    async def _scan(self, scraper: CredentialScraper, response: FakeResponse) -> dict[str, Any]:
+        result: dict[str, Any] = {"app_id": "", "seeds": {}, "secrets": {}}
+        await scraper._scan_bundle_stream(
+            FakeSession({"bundle.js": response}),  # type: ignore[arg-type]
+            "bundle.js",
+            aiohttp.ClientTimeout(total=1),
+            asyncio.Semaphore(1),
+            result,
+        )
+        return result
+
+    async def test_matches_across_chunk_boundaries(self, scraper: CredentialScraper) -> None:
+        """Test patterns split across small chunks are still found."""
+        scraper.CHUNK_SIZE = 7
+        result = await self._scan(scraper, FakeResponse(BUNDLE.encode()))
+
+        assert result["app_id"] == "123456789"
+        assert result["secrets"] == {"Berlin": "abc123secret"}
+
+    async def test_stops_reading_once_complete(self, scraper: CredentialScraper) -> None:
+        """Test the download is closed as soon as credentials are found."""
+        scraper.CHUNK_SIZE = len(BUNDLE)
+        response = FakeResponse((BUNDLE + "x" * 10 * len(BUNDLE)).encode())
+
+        result = await self._scan(scraper, response)
+
+        assert result["secrets"] == {"Berlin": "abc123secret"}
+        assert response.closed is True
+        assert response.chunks_read < 3
+
+    async def test_seed_after_secret_strings(self, scraper: CredentialScraper) -> None:
+        """Test secrets are found when the seed appears after info/extras."""
+        scraper.CHUNK_SIZE = 16
+        scraper.CHUNK_OVERLAP = 128
+        padding = "z" * 400
+        body = (
+            f'var tz={{name:"Europe/Berlin",info:"{INFO}",extras:"{EXTRAS}"}};{padding}'
+            f'a.initialSeed("{SEED}",window.utimezone.berlin);'
+        )
+
+        result = await self._scan(scraper, FakeResponse(body.encode()))
+
+        assert result["secrets"] == {"Berlin": "abc123secret"}
+
+    async def test_reads_on_until_every_seed_has_a_secret(self, scraper: CredentialScraper) -> None:
+        """Test one derived secret does not end the download while other seeds lack theirs."""
+        scraper.CHUNK_SIZE = 64
+        scraper.CHUNK_OVERLAP = 256
+        body = (
+            'var config={production:{api:{appId:"123456789"}}};'
+            f'a.initialSeed("{SEED}",window.utimezone.berlin);'
+            f'b.initialSeed("{SEED}",window.utimezone.london);'
+            f'var tz={{name:"Europe/Berlin",info:"{INFO}",extras:"{EXTRAS}"}};'
+            + "z" * 400
+            + f'var tz2={{name:"Europe/London",info:"{INFO}",extras:"{EXTRAS}"}};'
+        )
+
+        result = await self._scan(scraper, FakeResponse(body.encode()))
+
+        assert result["secrets"] == {"Berlin": "abc123secret", "London": "abc123secret"}
+
+    async def test_non_200_is_skipped(self, scraper: CredentialScraper) -> None:
+        """Test failed bundle downloads leave the result untouched."""
+        result = await self._scan(scraper, FakeResponse(BUNDLE.encode(), status=404))
+        assert result == {"app_id": "", "seeds": {}, "secrets": {}}
+
+
+class TestCredentialCache:
+    """Tests for the on-disk credential cache."""
+
+    @pytest.fixture(autouse=True)
+    def cache_path(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+        """Point the cache at a temporary directory."""
+        cache_dir = tmp_path / "cache"
+        monkeypatch.setattr(credentials, "CACHE_DIR", cache_dir)
+        monkeypatch.setattr(credentials, "CACHE_FILE", cache_dir / "credentials.json")
+        return cache_dir
+
+    def test_save_and_load_roundtrip(self, cache_path: Path) -> None:
+        """Test saved credentials load back and no temp file is left over."""
+        creds = {"app_id": "123456789", "app_secret": "abc123secret"}
+
+        assert credentials.save_credentials_to_cache(creds) is True
+
+        assert credentials.load_cached_credentials() == creds
+        assert [p.name for p in cache_path.iterdir()] == ["credentials.json"]
+
+    def test_roundtrip_without_orjson(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test the stdlib json fallback reads and writes the same cache."""
+        monkeypatch.setattr(credentials, "orjson", None)
+        creds = {"app_id": "123456789", "app_secret": "abc123secret"}
+
+        assert credentials.save_credentials_to_cache(creds) is True
+
+        assert credentials.load_cached_credentials() == creds
+
+    def test_save_replaces_existing_file(self) -> None:
+        """Test saving over an existing cache replaces it."""
+        credentials.save_credentials_to_cache({"app_id": "1", "app_secret": "old"})
+        credentials.save_credentials_to_cache({"app_id": "2", "app_secret": "new"})
+
+        assert credentials.load_cached_credentials() == {"app_id": "2", "app_secret": "new"}
+
+    def _write_cache(self, cache_path: Path, cached_at: float) -> None:
+        """Write a cache file with the given timestamp."""
+        cache_path.mkdir(parents=True, exist_ok=True)
+        data = {"app_id": "123456789", "app_secret": "old", "cached_at": cached_at}
+        (cache_path / "credentials.json").write_text(json.dumps(data))
+
+    @pytest.mark.asyncio
+    async def test_fresh_cache_skips_refresh(
+        self, cache_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test cached credentials within the TTL are returned without refreshing."""
+        self._write_cache(cache_path, time.time())
+        monkeypatch.setattr(credentials, "_refresh_task", None)
+
+        creds = await credentials.auto_fetch_credentials()
+
+        assert creds == {"app_id": "123456789", "app_secret": "old"}
+        assert credentials._refresh_task is None
+
+    @pytest.mark.asyncio
+    async def test_stale_cache_refreshes_in_background(
+        self, cache_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test stale credentials are returned immediately and refreshed behind."""
+        self._write_cache(cache_path, time.time() - credentials.CACHE_TTL_SECONDS - 1)
+        monkeypatch.setattr(credentials, "_refresh_task", None)
+        original = credentials.auto_fetch_credentials
+
+        async def fake_fetch(use_cache: bool = True) -> dict[str, str]:
+            if use_cache:
+                return await original(use_cache)
+            fresh = {"app_id": "123456789", "app_secret": "new"}
+            credentials.save_credentials_to_cache(fresh)
+            return fresh
+
+        monkeypatch.setattr(credentials, "auto_fetch_credentials", fake_fetch)
+
+        creds = await credentials.auto_fetch_credentials()
+
+        assert creds == {"app_id": "123456789", "app_secret": "old"}
+        assert credentials._refresh_task is not None
+        await credentials._refresh_task
+        assert credentials.load_cached_credentials() == {"app_id": "123456789", "app_secret": "new"}
+
+
+class AnyURLSession:
+    """Session stand-in answering every GET with the same status."""
+
+    def __init__(self, status: int) -> None:
+        self.status = status
+        self.urls: list[str] = []
+
+    def get(self, url: str, **kwargs: Any) -> FakeResponse:
+        self.urls.append(url)
+        return FakeResponse(b"", status=self.status)
+
+
+class TestSecretProbe:
+    """Tests for probing candidate secrets against the API."""
+
+    async def test_non_ascii_secret_is_probed(self) -> None:
+        """Test a secret decoded with replacement characters is tested, not fatal."""
+        session = AnyURLSession(status=400)
+
+        ok = await credentials.test_secret("123456789", "bad�secret", session)  # type: ignore[arg-type]
+
+        assert ok is False
+        assert len(session.urls) == 1
+
+    async def test_winner_follows_seed_order(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test the first working secret in seed order wins, whichever answers first."""
+        delays = {"first": 0.02, "second": 0.0, "third": 0.0}
+        valid = {"first", "second"}
+
+        async def fake_test_secret(app_id: str, secret: str, session: Any) -> bool:
+            await asyncio.sleep(delays[secret])
+            return secret in valid
+
+        monkeypatch.setattr(credentials, "test_secret", fake_test_secret)
+        secrets = {"Berlin": "first", "London": "second", "Abidjan": "third"}
+
+        working = await credentials._find_working_secret("123456789", secrets, None)  # type: ignore[arg-type]
+
+        assert working == ("Berlin", "first")
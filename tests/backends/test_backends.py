@@ -210,3 +210,25 @@ class TestAudioBackendInterface:
         """Test interface defines disconnect method."""
         assert hasattr(AudioBackend, "disconnect")
         assert callable(getattr(AudioBackend, "disconnect"))
+
+
+class TestCallbackDispatch:
+    """Tests for the shared listener callback helper."""
+
+    def test_safe_call_invokes_callback(self) -> None:
+        """Test callback receives the given arguments."""
+        received: list[int] = []
+        AudioBackend._safe_call(received.append, 42, name="Test")
+        assert received == [42]
+
+    def test_safe_call_ignores_missing_callback(self) -> None:
+        """Test a None callback is a no-op."""
+        AudioBackend._safe_call(None, 42, name="Test")
+
+    def test_safe_call_swallows_callback_errors(self) -> None:
+        """Test a failing callback is logged rather than raised."""
+
+        def failing(_: int) -> None:
+            raise RuntimeError("boom")
+
+        AudioBackend._safe_call(failing, 42, name="Test")
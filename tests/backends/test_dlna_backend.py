@@ -0,0 +1,484 @@
+"""Tests for DLNABackend state polling and playback control."""
+
+import asyncio
+import time
+from typing import AsyncIterator
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from qobuz_proxy.backends.dlna import backend as backend_module
+from qobuz_proxy.backends.dlna.backend import POSITION_RESYNC_INTERVAL_SECONDS, DLNABackend
+from qobuz_proxy.backends.dlna.capabilities import DLNACapabilities
+from qobuz_proxy.backends.dlna.client import DLNADeviceInfo
+from qobuz_proxy.backends.types import BackendTrackMetadata, PlaybackState
+
+
+def _make_metadata() -> BackendTrackMetadata:
+    return BackendTrackMetadata(
+        track_id="123",
+        title="Test Track",
+        artist="Test Artist",
+        album="Test Album",
+        duration_ms=180000,
+    )
+
+
+def _mock_client() -> MagicMock:
+    """Create a mock DLNAClient whose SOAP calls all succeed."""
+    client = MagicMock()
+    client.set_av_transport_uri = AsyncMock(return_value=True)
+    client.play = AsyncMock(return_value=True)
+    client.pause = AsyncMock(return_value=True)
+    client.stop = AsyncMock(return_value=True)
+    client.seek = AsyncMock(return_value=True)
+    client.get_transport_info = AsyncMock(return_value="STOPPED")
+    client.get_position_info = AsyncMock(return_value=0)
+    return client
+
+
+@pytest.fixture
+async def backend() -> AsyncIterator[DLNABackend]:
+    """Create a connected DLNA backend around a mock client."""
+    backend = DLNABackend(ip="192.168.1.100")
+    backend._client = _mock_client()
+    backend._is_connected = True
+    backend._dispatcher_task = asyncio.create_task(backend._dispatch_events_loop())
+    yield backend
+    backend._dispatcher_task.cancel()
+    await asyncio.gather(backend._dispatcher_task, return_exceptions=True)
+
+
+async def _poll_once(backend: DLNABackend) -> None:
+    """Run the poll loop for a single immediate tick."""
+    backend._poll_wakeup.set()
+    poll_task = asyncio.create_task(backend._poll_state_loop())
+    await asyncio.sleep(0.05)
+    backend._is_connected = False
+    poll_task.cancel()
+    await asyncio.gather(poll_task, return_exceptions=True)
+
+
+class TestParseState:
+    """Tests for transport state mapping."""
+
+    @pytest.mark.parametrize(
+        ("state_str", "expected"),
+        [
+            ("PLAYING", PlaybackState.PLAYING),
+            ("PAUSED_PLAYBACK", PlaybackState.PAUSED),
+            ("TRANSITIONING", PlaybackState.LOADING),
+            ("STOPPED", PlaybackState.STOPPED),
+            ("NO_MEDIA_PRESENT", PlaybackState.STOPPED),
+            (None, PlaybackState.STOPPED),
+        ],
+    )
+    def test_parse_state(self, state_str: str, expected: PlaybackState) -> None:
+        """Test UPnP transport states map to playback states."""
+        assert DLNABackend._parse_state(state_str) == expected
+
+
+class TestPollLoop:
+    """Tests for the state polling loop."""
+
+    @pytest.mark.asyncio
+    async def test_playing_tick_reports_position(self, backend: DLNABackend) -> None:
+        """Test a playing tick fetches state and position and reports the position."""
+        assert backend._client is not None
+        backend._state = PlaybackState.PLAYING
+        backend._client.get_transport_info.return_value = "PLAYING"
+        backend._client.get_position_info.return_value = 42000
+        positions: list[int] = []
+        backend.on_position_update(positions.append)
+
+        await _poll_once(backend)
+
+        backend._client.get_transport_info.assert_awaited_once()
+        backend._client.get_position_info.assert_awaited_once()
+        assert positions == [42000]
+        assert backend._position_ms == 42000
+
+    @pytest.mark.asyncio
+    async def test_playing_tick_without_listener_skips_position(self, backend: DLNABackend) -> None:
+        """Test position is not polled when no position callback is registered."""
+        assert backend._client is not None
+        backend._state = PlaybackState.PLAYING
+        backend._client.get_transport_info.return_value = "PLAYING"
+
+        await _poll_once(backend)
+
+        backend._client.get_transport_info.assert_awaited_once()
+        backend._client.get_position_info.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_stopped_tick_skips_position(self, backend: DLNABackend) -> None:
+        """Test an idle tick only asks for the transport state."""
+        assert backend._client is not None
+
+        await _poll_once(backend)
+
+        backend._client.get_transport_info.assert_awaited_once()
+        backend._client.get_position_info.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_command_wakes_idle_poll(self, backend: DLNABackend) -> None:
+        """Test a playback command triggers a poll without waiting out the idle interval."""
+        assert backend._client is not None
+        poll_task = asyncio.create_task(backend._poll_state_loop())
+        try:
+            await asyncio.sleep(0.05)
+            # STOPPED polls every 15s, so nothing has been polled yet
+            backend._client.get_transport_info.assert_not_awaited()
+
+            backend._client.get_transport_info.return_value = "PAUSED_PLAYBACK"
+            await backend.pause()
+            await asyncio.sleep(0.05)
+
+            backend._client.get_transport_info.assert_awaited()
+            assert backend._state == PlaybackState.PAUSED
+        finally:
+            backend._is_connected = False
+            poll_task.cancel()
+            await asyncio.gather(poll_task, return_exceptions=True)
+
+
+class TestEventDispatch:
+    """Tests for callback dispatch off the poll loop."""
+
+    @pytest.mark.asyncio
+    async def test_events_delivered_in_order(self, backend: DLNABackend) -> None:
+        """Test queued events reach their callbacks in the order they happened."""
+        events: list[object] = []
+        backend.on_state_change(events.append)
+        backend.on_position_update(events.append)
+        backend.on_track_ended(lambda: events.append("ended"))
+        backend.on_playback_error(events.append)
+
+        backend._notify_state_change(PlaybackState.PLAYING)
+        backend._notify_position_update(1000)
+        backend._notify_track_ended()
+        backend._notify_playback_error("boom")
+        # State is updated immediately, callbacks run later
+        assert backend._state == PlaybackState.PLAYING
+        assert events == []
+
+        await asyncio.sleep(0.01)
+
+        assert events == [PlaybackState.PLAYING, 1000, "ended", "boom"]
+
+    def test_full_queue_drops_positions_and_evicts_oldest(self) -> None:
+        """Test a full queue drops new positions but keeps other events."""
+        backend = DLNABackend(ip="192.168.1.100")
+        for i in range(backend._events.maxsize):
+            backend._notify_position_update(i)
+
+        backend._notify_position_update(999)
+        backend._notify_track_ended()
+
+        queued = [backend._events.get_nowait() for _ in range(backend._events.qsize())]
+        assert ("position", 0) not in queued
+        assert ("position", 999) not in queued
+        assert queued[-1] == ("track_ended", None)
+
+
+class TestStartupPosition:
+    """Tests for position handling while the device ramps up."""
+
+    @pytest.mark.asyncio
+    async def test_zero_position_ignored_after_play(self, backend: DLNABackend) -> None:
+        """Test the spurious zero reported right after play isn't forwarded."""
+        assert backend._client is not None
+        await backend.play("https://streaming.example.com/file", _make_metadata())
+        backend._client.get_transport_info.return_value = "PLAYING"
+        backend._client.get_position_info.return_value = 0
+        positions: list[int] = []
+        backend.on_position_update(positions.append)
+
+        await _poll_once(backend)
+
+        backend._client.get_position_info.assert_awaited()
+        assert positions == []
+
+    @pytest.mark.asyncio
+    async def test_get_position_returns_seek_target_while_buffering(
+        self, backend: DLNABackend
+    ) -> None:
+        """Test get_position reports the seek target while the device still says 0."""
+        assert backend._client is not None
+        await backend.play("https://streaming.example.com/file", _make_metadata())
+        await backend.seek(60000)
+        backend._client.get_position_info.return_value = 0
+
+        assert await backend.get_position() == 60000
+
+        backend._client.get_position_info.return_value = 61000
+        assert await backend.get_position() == 61000
+
+
+class TestSingleFlight:
+    """Tests for sharing in-flight device queries."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_queries_share_one_request(self, backend: DLNABackend) -> None:
+        """Test overlapping get_state calls issue a single GetTransportInfo."""
+        assert backend._client is not None
+        release = asyncio.Event()
+
+        async def slow_transport_info() -> str:
+            await release.wait()
+            return "PLAYING"
+
+        backend._client.get_transport_info = AsyncMock(side_effect=slow_transport_info)
+
+        pending = asyncio.gather(backend.get_state(), backend.get_state())
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await pending == [PlaybackState.PLAYING, PlaybackState.PLAYING]
+        assert backend._client.get_transport_info.await_count == 1
+        assert backend._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_sequential_queries_are_not_shared(self, backend: DLNABackend) -> None:
+        """Test a query issued after the previous one finished hits the device again."""
+        assert backend._client is not None
+
+        await backend.get_state()
+        await backend.get_state()
+
+        assert backend._client.get_transport_info.await_count == 2
+
+
+class TestPositionExtrapolation:
+    """Tests for extrapolating position between GetPositionInfo calls."""
+
+    @pytest.mark.asyncio
+    async def test_get_position_extrapolates_from_anchor(self, backend: DLNABackend) -> None:
+        """Test a fresh anchor is extrapolated without asking the device."""
+        assert backend._client is not None
+        backend._state = PlaybackState.PLAYING
+        backend._set_position_anchor(10000)
+        backend._pos_anchor_ts = time.monotonic() - 2.0
+
+        pos = await backend.get_position()
+
+        assert 12000 <= pos < 12500
+        backend._client.get_position_info.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_get_position_resyncs_stale_anchor(self, backend: DLNABackend) -> None:
+        """Test an old anchor is replaced by a fresh device reading."""
+        assert backend._client is not None
+        backend._state = PlaybackState.PLAYING
+        backend._set_position_anchor(10000)
+        backend._pos_anchor_ts = time.monotonic() - POSITION_RESYNC_INTERVAL_SECONDS
+        backend._client.get_position_info.return_value = 30000
+
+        assert await backend.get_position() == 30000
+        backend._client.get_position_info.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_playing_tick_with_fresh_anchor_skips_position_call(
+        self, backend: DLNABackend
+    ) -> None:
+        """Test the poll loop reports the extrapolated position when no resync is due."""
+        assert backend._client is not None
+        backend._state = PlaybackState.PLAYING
+        backend._set_position_anchor(5000)
+        backend._client.get_transport_info.return_value = "PLAYING"
+        positions: list[int] = []
+        backend.on_position_update(positions.append)
+
+        await _poll_once(backend)
+
+        backend._client.get_transport_info.assert_awaited_once()
+        backend._client.get_position_info.assert_not_awaited()
+        assert len(positions) == 1
+        assert 5000 <= positions[0] < 5500
+
+
+class TestPositionCoalescing:
+    """Tests for suppressing redundant polled position updates."""
+
+    def test_small_quick_moves_are_suppressed(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test positions are reported on a big enough move or after enough time."""
+        backend = DLNABackend(ip="192.168.1.100")
+        now = 100.0
+        monkeypatch.setattr(backend_module.time, "monotonic", lambda: now)
+
+        backend._report_polled_position(1000)  # first report always goes out
+        backend._report_polled_position(1200)  # +200ms, no time passed: suppressed
+        backend._report_polled_position(1600)  # +600ms: reported
+        now += 1.0
+        backend._report_polled_position(1600)  # unchanged, but 1s passed: reported
+
+        queued = [backend._events.get_nowait() for _ in range(backend._events.qsize())]
+        assert queued == [("position", 1000), ("position", 1600), ("position", 1600)]
+
+
+class TestBuildDidl:
+    """Tests for DIDL-Lite metadata generation."""
+
+    def test_escapes_text_and_attributes(self, backend: DLNABackend) -> None:
+        """Test metadata and URL are XML-escaped."""
+        metadata = _make_metadata()
+        metadata.title = 'Rock & "Roll" <Live>'
+
+        didl = backend._build_didl("http://proxy/track?a=1&b=2", metadata)
+
+        assert "<dc:title>Rock &amp; &quot;Roll&quot; &lt;Live&gt;</dc:title>" in didl
+        assert ">http://proxy/track?a=1&amp;b=2</res>" in didl
+        assert 'protocolInfo="http-get:*:audio/flac:*"' in didl
+        assert "albumArtURI" not in didl
+
+    def test_reuses_last_didl_for_same_track(self, backend: DLNABackend) -> None:
+        """Test the last DIDL is reused for the same track and URL, rebuilt otherwise."""
+        metadata = _make_metadata()
+
+        first = backend._build_didl("http://proxy/track", metadata)
+        again = backend._build_didl("http://proxy/track", metadata)
+        other = backend._build_didl("http://proxy/other", metadata)
+
+        assert again is first
+        assert other is not first
+        assert ">http://proxy/other</res>" in other
+
+    def test_protocol_info_built_once_per_content_type(
+        self, backend: DLNABackend, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test protocolInfo is derived from the capabilities only once per content type."""
+        calls: list[str] = []
+
+        def fake_build(caps: DLNACapabilities, content_type: str) -> str:
+            calls.append(content_type)
+            return f"http-get:*:{content_type}:DLNA.ORG_PN=TEST"
+
+        monkeypatch.setattr(backend_module, "build_protocol_info", fake_build)
+        backend._capabilities = DLNACapabilities()
+        metadata = _make_metadata()
+
+        backend._build_didl("http://proxy/one", metadata)
+        didl = backend._build_didl("http://proxy/two", metadata)
+        backend._build_didl("http://proxy/three", metadata, "audio/mpeg")
+
+        assert calls == ["audio/flac", "audio/mpeg"]
+        assert 'protocolInfo="http-get:*:audio/flac:DLNA.ORG_PN=TEST"' in didl
+
+
+class TestPlay:
+    """Tests for starting playback."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("url", "expected"),
+        [
+            ("https://streaming.example.com/file?format=27&eid=1", "audio/flac"),
+            ("https://streaming.example.com/file?eid=1&FORMAT=5", "audio/mpeg"),
+            ("https://streaming.example.com/track.mp3?token=abc", "audio/mpeg"),
+            ("https://streaming.example.com/Track.MP3#t=0", "audio/mpeg"),
+            ("https://streaming.example.com/mp3/track.flac?format=6", "audio/flac"),
+            ("https://streaming.example.com/track.flac?format=50", "audio/flac"),
+        ],
+    )
+    async def test_content_type_from_url(
+        self, backend: DLNABackend, url: str, expected: str
+    ) -> None:
+        """Test the DIDL protocol info reflects the stream's content type."""
+        assert backend._client is not None
+
+        await backend.play(url, _make_metadata())
+
+        didl = backend._client.set_av_transport_uri.await_args.args[1]
+        assert f'protocolInfo="http-get:*:{expected}:*"' in didl
+        assert backend._state == PlaybackState.PLAYING
+
+    @pytest.mark.asyncio
+    async def test_content_type_from_metadata(self, backend: DLNABackend) -> None:
+        """Test a content type known from metadata takes precedence over the URL."""
+        assert backend._client is not None
+        metadata = _make_metadata()
+        metadata.content_type = "audio/mpeg"
+
+        await backend.play("https://streaming.example.com/file?format=27", metadata)
+
+        didl = backend._client.set_av_transport_uri.await_args.args[1]
+        assert 'protocolInfo="http-get:*:audio/mpeg:*"' in didl
+
+
+class TestTransportEvents:
+    """Tests for using pushed AVTransport events instead of polling."""
+
+    @staticmethod
+    def _event(state: str) -> bytes:
+        return (
+            '<e:propertyset xmlns:e="urn:schemas-upnp-org:event-1-0"><e:property>'
+            "<LastChange>&lt;Event&gt;&lt;InstanceID val=&quot;0&quot;&gt;"
+            f"&lt;TransportState val=&quot;{state}&quot;/&gt;"
+            "&lt;/InstanceID&gt;&lt;/Event&gt;</LastChange>"
+            "</e:property></e:propertyset>"
+        ).encode()
+
+    @pytest.mark.asyncio
+    async def test_subscribe_on_connect(self, backend: DLNABackend) -> None:
+        """Test the backend subscribes through the proxy server's callback URL."""
+        assert backend._client is not None
+        backend._client.device_info = DLNADeviceInfo(
+            av_transport_event_url="http://192.168.1.100:1400/MediaRenderer/AVTransport/Event"
+        )
+        backend._client.subscribe_transport_events = AsyncMock(return_value=("uuid:sub-1", 1800))
+        backend._client.unsubscribe_transport_events = AsyncMock(return_value=True)
+        proxy = MagicMock()
+        proxy.event_callback_url = "http://192.168.1.10:7120/upnp/event"
+        backend.set_proxy_server(proxy)
+
+        await backend._subscribe_events()
+
+        backend._client.subscribe_transport_events.assert_awaited_once_with(
+            "http://192.168.1.10:7120/upnp/event"
+        )
+        proxy.set_event_handler.assert_called_with(backend._handle_upnp_event)
+        assert backend._event_sid == "uuid:sub-1"
+
+        await backend._unsubscribe_events()
+        backend._client.unsubscribe_transport_events.assert_awaited_once_with("uuid:sub-1")
+        proxy.set_event_handler.assert_called_with(None)
+        assert backend._event_sid is None
+
+    @pytest.mark.asyncio
+    async def test_pushed_state_replaces_query(self, backend: DLNABackend) -> None:
+        """Test a tick after an event uses the pushed state without a SOAP query."""
+        assert backend._client is not None
+        backend._event_sid = "uuid:sub-1"
+        backend._state_checked_at = time.monotonic()
+
+        backend._handle_upnp_event("uuid:sub-1", self._event("PAUSED_PLAYBACK"))
+        await _poll_once(backend)
+
+        backend._client.get_transport_info.assert_not_awaited()
+        assert backend._state == PlaybackState.PAUSED
+
+    @pytest.mark.asyncio
+    async def test_event_for_other_subscription_ignored(self, backend: DLNABackend) -> None:
+        """Test events with an unknown subscription ID are ignored."""
+        backend._event_sid = "uuid:sub-1"
+
+        backend._handle_upnp_event("uuid:stale", self._event("PLAYING"))
+
+        assert backend._event_state is None
+        assert not backend._poll_wakeup.is_set()
+
+    @pytest.mark.asyncio
+    async def test_command_bypasses_pushed_state(self, backend: DLNABackend) -> None:
+        """Test the tick after a command queries the device, not a stale event."""
+        assert backend._client is not None
+        backend._event_sid = "uuid:sub-1"
+        backend._event_state = "PLAYING"
+        backend._state_checked_at = time.monotonic()
+        backend._client.get_transport_info.return_value = "PAUSED_PLAYBACK"
+
+        await backend.pause()
+        await _poll_once(backend)
+
+        backend._client.get_transport_info.assert_awaited_once()
+        assert backend._event_state == "PAUSED_PLAYBACK"
+        assert backend._state == PlaybackState.PAUSED
@@ -0,0 +1,252 @@
+"""Tests for DLNA capability parsing and caching."""
+
+import json
+import time
+from pathlib import Path
+
+from qobuz_proxy.backends.dlna.capabilities import (
+    CapabilityCache,
+    DLNACapabilities,
+    _parse_additional,
+    apply_device_overrides,
+    build_protocol_info,
+    parse_protocol_info_sink,
+)
+
+SINK = (
+    "http-get:*:audio/flac:DLNA.ORG_PN=FLAC;DLNA.ORG_OP=01,"
+    "http-get:*:audio/mpeg:DLNA.ORG_PN=MP3,"
+    "http-get:*:audio/L16;rate=96000;channels=2:*"
+)
+
+
+class TestParseAdditional:
+    def test_parses_tokens(self) -> None:
+        tokens = _parse_additional("DLNA.ORG_PN=FLAC; DLNA.ORG_OP=01;DLNA.ORG_FLAGS=0170")
+        assert tokens == {"DLNA.ORG_PN": "FLAC", "DLNA.ORG_OP": "01", "DLNA.ORG_FLAGS": "0170"}
+
+    def test_ignores_wildcard_and_empty_tokens(self) -> None:
+        assert _parse_additional("*") == {}
+        assert _parse_additional("DLNA.ORG_PN=MP3;;flag;") == {"DLNA.ORG_PN": "MP3"}
+
+    def test_value_may_contain_equals(self) -> None:
+        assert _parse_additional("=x;key=a=b") == {"key": "a=b"}
+
+
+class TestParseProtocolInfoSink:
+    def test_parses_entries_and_flags(self) -> None:
+        caps = parse_protocol_info_sink(SINK)
+
+        assert [e.mime for e in caps.entries] == ["audio/flac", "audio/mpeg", "audio/l16"]
+        assert caps.entries[0].profile == "FLAC"
+        assert caps.entries[2].sample_rate == 96000
+        assert caps.supports_flac
+        assert caps.supports_mp3
+
+    def test_repeated_parses_are_independent(self) -> None:
+        first = parse_protocol_info_sink(SINK)
+        apply_device_overrides(first, "Sonos", "One")
+        first.entries.clear()
+
+        second = parse_protocol_info_sink(SINK)
+        assert len(second.entries) == 3
+        assert second.max_sample_rate == 44100
+        assert second.max_bit_depth == 16
+
+    def test_by_mime_and_best_entry(self) -> None:
+        caps = parse_protocol_info_sink(SINK)
+
+        assert caps.by_mime("audio/flac") == (caps.entries[0],)
+        assert caps.by_mime("audio/wav") == ()
+        assert caps.best_entry_for_media("audio/l16", sample_rate=48000) is caps.entries[2]
+        assert caps.best_entry_for_media("audio/l16", sample_rate=192000) is None
+
+    def test_max_quality_tracks_device_overrides(self) -> None:
+        caps = parse_protocol_info_sink("http-get:*:audio/flac:DLNA.ORG_PN=FLAC_192")
+        assert caps.max_quality == 27
+
+        apply_device_overrides(caps, "Sonos", "One")
+        assert caps.max_quality == 6
+        assert DLNACapabilities.from_dict(caps.to_dict()).max_quality == 6
+
+    def test_repeated_parses_share_frozen_entries(self) -> None:
+        first = parse_protocol_info_sink(SINK)
+        second = parse_protocol_info_sink(SINK)
+
+        assert first is not second
+        assert first.entries is not second.entries
+        assert first.entries[0] is second.entries[0]
+
+    def test_known_baseline_sink(self) -> None:
+        caps = parse_protocol_info_sink("http-get:*:audio/mpeg:*,http-get:*:audio/flac:*")
+
+        assert caps.supports_flac
+        assert caps.by_mime("audio/flac")[0].additional == {}
+        apply_device_overrides(caps, "Sonos", "One")
+        assert parse_protocol_info_sink("http-get:*:audio/flac:*").max_sample_rate == 44100
+
+    def test_additional_info_may_contain_colons(self) -> None:
+        caps = parse_protocol_info_sink("http-get:*:audio/flac:DLNA.ORG_PN=FLAC;url=http://x:80")
+
+        assert caps.entries[0].additional == {"DLNA.ORG_PN": "FLAC", "url": "http://x:80"}
+
+    def test_l16_params_are_case_insensitive(self) -> None:
+        entry = parse_protocol_info_sink("http-get:*:Audio/L16;Rate=48000;Channels=2:*").entries[0]
+
+        assert entry.mime == "audio/l16"
+        assert (entry.sample_rate, entry.bit_depth, entry.channels) == (48000, 16, 2)
+
+    def test_best_entry_prefers_profile_then_sample_rate(self) -> None:
+        caps = parse_protocol_info_sink(
+            "http-get:*:audio/flac:*,"
+            "http-get:*:audio/flac:DLNA.ORG_PN=FLAC,"
+            "http-get:*:audio/flac:DLNA.ORG_PN=FLAC_96,"
+            "http-get:*:audio/flac:DLNA.ORG_PN=FLAC_24"
+        )
+
+        assert caps.best_entry_for_media("audio/flac") is caps.entries[2]
+        assert caps.best_entry_for_media("audio/flac", bit_depth=24) is caps.entries[2]
+
+    def test_format_hints_from_additional_tokens(self) -> None:
+        caps = parse_protocol_info_sink(
+            "http-get:*:audio/flac:sampleRate=192000;bitsPerSample=24,"
+            "http-get:*:audio/L16:*,"
+            "http-get:*:audio/wav:*"
+        )
+
+        assert (caps.entries[0].sample_rate, caps.entries[0].bit_depth) == (192000, 24)
+        assert caps.entries[1].bit_depth == 16
+        assert (caps.entries[2].sample_rate, caps.entries[2].bit_depth) == (None, None)
+        assert caps.max_quality == 27
+
+    def test_empty_sink(self) -> None:
+        assert parse_protocol_info_sink("") == DLNACapabilities()
+
+
+class TestDeviceOverrides:
+    def test_matches_manufacturer_case_insensitively(self) -> None:
+        caps = parse_protocol_info_sink("http-get:*:audio/flac:DLNA.ORG_PN=FLAC_192")
+        apply_device_overrides(caps, "SONOS, Inc.", "Play:5")
+
+        assert caps.max_sample_rate == 48000
+        assert caps.max_bit_depth == 16
+
+    def test_unknown_device_is_untouched(self) -> None:
+        caps = parse_protocol_info_sink("http-get:*:audio/flac:DLNA.ORG_PN=FLAC_192")
+        apply_device_overrides(caps, "WiiM", "Pro")
+
+        assert caps.max_sample_rate == 192000
+        assert caps.max_bit_depth == 24
+
+
+class TestBuildProtocolInfo:
+    def test_reemits_sink_entry_verbatim(self) -> None:
+        caps = parse_protocol_info_sink(SINK)
+
+        assert (
+            build_protocol_info(caps, "audio/flac")
+            == "http-get:*:audio/flac:DLNA.ORG_PN=FLAC;DLNA.ORG_OP=01"
+        )
+        assert (
+            build_protocol_info(caps, "audio/l16") == "http-get:*:audio/L16;rate=96000;channels=2:*"
+        )
+
+    def test_entry_without_raw_field_is_rejoined(self) -> None:
+        data = parse_protocol_info_sink(SINK).to_dict()
+        for entry in data["entries"]:
+            del entry["raw_additional"]
+        caps = DLNACapabilities.from_dict(data)
+
+        assert (
+            build_protocol_info(caps, "audio/flac")
+            == "http-get:*:audio/flac:DLNA.ORG_PN=FLAC;DLNA.ORG_OP=01"
+        )
+
+    def test_unknown_mime_falls_back(self) -> None:
+        caps = parse_protocol_info_sink(SINK)
+
+        assert build_protocol_info(caps, "audio/wav") == "http-get:*:audio/wav:DLNA.ORG_OP=01"
+
+
+class TestCapabilitiesSerialization:
+    def test_roundtrip(self) -> None:
+        caps = parse_protocol_info_sink(SINK)
+        restored = DLNACapabilities.from_dict(json.loads(json.dumps(caps.to_dict())))
+        assert restored == caps
+
+    def test_to_dict_omits_derived_fields(self) -> None:
+        data = parse_protocol_info_sink(SINK).to_dict()
+
+        assert "max_quality" not in data
+        assert "_by_mime" not in data
+        assert data["entries"][0]["profile"] == "FLAC"
+
+
+class TestCapabilityCachePersistence:
+    def test_entries_survive_restart(self, tmp_path: Path) -> None:
+        path = tmp_path / "caps.json"
+        caps = parse_protocol_info_sink(SINK)
+        CapabilityCache(path=path).set("uuid:renderer", caps)
+
+        assert not path.with_suffix(".json.tmp").exists()
+        assert CapabilityCache(path=path).get("uuid:renderer") == caps
+
+    def test_stale_entries_are_not_loaded(self, tmp_path: Path) -> None:
+        path = tmp_path / "caps.json"
+        caps = parse_protocol_info_sink(SINK)
+        saved_at = time.time() - 3601
+        path.write_text(
+            json.dumps({"uuid:old": {"saved_at": saved_at, "capabilities": caps.to_dict()}})
+        )
+
+        assert CapabilityCache(ttl_seconds=3600, path=path).get("uuid:old") is None
+
+    def test_loaded_entries_keep_remaining_ttl(self, tmp_path: Path) -> None:
+        path = tmp_path / "caps.json"
+        caps = parse_protocol_info_sink(SINK)
+        saved_at = time.time() - 3000
+        path.write_text(
+            json.dumps({"uuid:renderer": {"saved_at": saved_at, "capabilities": caps.to_dict()}})
+        )
+
+        cache = CapabilityCache(ttl_seconds=3600, path=path)
+        assert cache.get("uuid:renderer") == caps
+        remaining = cache._entries["uuid:renderer"].expires_at - time.monotonic()
+        assert 500 < remaining <= 600
+
+    def test_corrupt_file_is_ignored(self, tmp_path: Path) -> None:
+        path = tmp_path / "caps.json"
+        path.write_text("not json")
+
+        cache = CapabilityCache(path=path)
+        assert cache.get("uuid:renderer") is None
+        cache.set("uuid:renderer", DLNACapabilities())
+        assert CapabilityCache(path=path).get("uuid:renderer") == DLNACapabilities()
+
+
+class TestCapabilityCacheExpiry:
+    def test_expired_entry_is_not_returned(self) -> None:
+        cache = CapabilityCache(ttl_seconds=0)
+        cache.set("uuid:renderer", DLNACapabilities())
+
+        time.sleep(0.01)
+        assert cache.get("uuid:renderer") is None
+
+    def test_set_sweeps_expired_entries(self) -> None:
+        cache = CapabilityCache(ttl_seconds=0)
+        cache.set("uuid:old", DLNACapabilities())
+        time.sleep(0.01)
+
+        cache.set("uuid:new", DLNACapabilities())
+
+        assert "uuid:old" not in cache._entries
+        assert "uuid:new" in cache._entries
+
+    def test_replaced_entry_survives_stale_heap_item(self) -> None:
+        cache = CapabilityCache(ttl_seconds=3600)
+        cache.set("uuid:renderer", DLNACapabilities())
+        cache._expiry[0] = (0.0, "uuid:renderer")
+
+        cache.set("uuid:other", DLNACapabilities())
+
+        assert cache.get("uuid:renderer") == DLNACapabilities()
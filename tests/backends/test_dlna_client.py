@@ -0,0 +1,575 @@
+"""Tests for the low-level DLNA SOAP client."""
+
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Iterator
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from qobuz_proxy.backends.dlna import client as client_module
+from qobuz_proxy.backends.dlna import xml_parser
+from qobuz_proxy.backends.dlna.client import (
+    DESCRIPTION_CACHE_TTL_SECONDS,
+    DESCRIPTION_PATHS,
+    MAX_CONNECTIONS,
+    UPNP_AV_TRANSPORT,
+    DLNAClient,
+    DLNAClientError,
+    DLNADeviceInfo,
+    cache_device_description,
+    parse_transport_event,
+)
+
+DEVICE_DESCRIPTION = b"""<?xml version="1.0" encoding="utf-8"?>
+<!-- renderer description -->
+<root xmlns="urn:schemas-upnp-org:device-1-0">
+  <device>
+    <friendlyName>Living Room \xc3\xa9</friendlyName>
+    <manufacturer>Sonos, Inc.</manufacturer>
+    <modelName>Sonos One</modelName>
+    <UDN>uuid:RINCON_1234</UDN>
+    <serviceList>
+      <service>
+        <serviceType>urn:schemas-upnp-org:service:AVTransport:1</serviceType>
+        <controlURL>/MediaRenderer/AVTransport/Control</controlURL>
+      </service>
+      <service>
+        <serviceType>urn:schemas-sonos-com:service:GroupRenderingControl:1</serviceType>
+        <controlURL>/MediaRenderer/GroupRenderingControl/Control</controlURL>
+      </service>
+      <service>
+        <serviceType>urn:schemas-upnp-org:service:RenderingControl:1</serviceType>
+        <controlURL>/MediaRenderer/RenderingControl/Control</controlURL>
+      </service>
+      <service>
+        <serviceType>urn:schemas-upnp-org:service:ConnectionManager:1</serviceType>
+        <controlURL>http://192.168.1.100:1400/MediaRenderer/ConnectionManager/Control</controlURL>
+      </service>
+    </serviceList>
+  </device>
+</root>
+"""
+
+TRANSPORT_INFO_RESPONSE = (
+    '<?xml version="1.0"?>'
+    '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">'
+    "<s:Body><u:GetTransportInfoResponse "
+    'xmlns:u="urn:schemas-upnp-org:service:AVTransport:1">'
+    "<CurrentTransportState>PLAYING</CurrentTransportState>"
+    "<CurrentTransportStatus>OK</CurrentTransportStatus>"
+    "</u:GetTransportInfoResponse></s:Body></s:Envelope>"
+)
+
+
+@pytest.fixture(autouse=True)
+def description_path_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keep learned description paths in a temporary file, starting empty."""
+    path = tmp_path / "dlna_description_paths.json"
+    monkeypatch.setattr(client_module, "DESCRIPTION_PATH_CACHE_FILE", path)
+    monkeypatch.setattr(client_module, "_description_paths", None)
+    return path
+
+
+@pytest.fixture(params=["lxml", "stdlib"])
+def xml_backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Run a test with lxml and with the stdlib ElementTree fallback."""
+    if request.param == "stdlib":
+        monkeypatch.setattr(xml_parser, "etree", None)
+    elif xml_parser.etree is None:
+        pytest.skip("lxml not installed")
+    return str(request.param)
+
+
+def _device_info() -> DLNADeviceInfo:
+    return DLNADeviceInfo(
+        friendly_name="Living Room",
+        av_transport_url="http://192.168.1.100:1400/MediaRenderer/AVTransport/Control",
+    )
+
+
+class TestSession:
+    """Tests for the client's HTTP session lifecycle."""
+
+    @pytest.mark.asyncio
+    async def test_connect_opens_keepalive_session(self) -> None:
+        """Test connect opens one pooled keep-alive session that disconnect closes."""
+        client = DLNAClient("192.168.1.100")
+        client._fetch_device_description = AsyncMock(return_value=_device_info())
+
+        await client.connect()
+        session = client._session
+        assert session is not None
+        assert session.connector is not None
+        assert session.connector.limit == MAX_CONNECTIONS
+
+        await client.disconnect()
+        assert session.closed
+        assert client._session is None
+
+    @pytest.mark.asyncio
+    async def test_reconnect_closes_previous_session(self) -> None:
+        """Test connecting again does not leak the previous session."""
+        client = DLNAClient("192.168.1.100")
+        client._fetch_device_description = AsyncMock(return_value=_device_info())
+
+        await client.connect()
+        first = client._session
+        await client.connect()
+
+        assert first is not None and first.closed
+        assert client._session is not first
+        await client.disconnect()
+
+
+class TestXmlParsing:
+    """Tests for device description and SOAP response parsing."""
+
+    def test_parse_device_description(self, xml_backend: str) -> None:
+        """Test device fields and service URLs are extracted."""
+        client = DLNAClient("192.168.1.100")
+
+        info = client._parse_device_description(DEVICE_DESCRIPTION, "http://192.168.1.100:1400")
+
+        assert info.friendly_name == "Living Room \u00e9"
+        assert info.manufacturer == "Sonos, Inc."
+        assert info.model_name == "Sonos One"
+        assert info.udn == "uuid:RINCON_1234"
+        assert (
+            info.av_transport_url == "http://192.168.1.100:1400/MediaRenderer/AVTransport/Control"
+        )
+        assert (
+            info.rendering_control_url
+            == "http://192.168.1.100:1400/MediaRenderer/RenderingControl/Control"
+        )
+        assert (
+            info.connection_manager_url
+            == "http://192.168.1.100:1400/MediaRenderer/ConnectionManager/Control"
+        )
+
+    def test_parse_malformed_description(self, xml_backend: str) -> None:
+        """Test malformed XML yields empty device info rather than raising."""
+        client = DLNAClient("192.168.1.100")
+
+        info = client._parse_device_description(b"<root><device>", "http://192.168.1.100")
+
+        assert info == DLNADeviceInfo()
+
+    def test_parse_embedded_device(self, xml_backend: str) -> None:
+        """Test an embedded device's fields take precedence over the root device's."""
+        client = DLNAClient("192.168.1.100")
+        xml_data = (
+            b'<root xmlns="urn:schemas-upnp-org:device-1-0"><device>'
+            b"<friendlyName>Bridge</friendlyName><deviceList><device>"
+            b"<friendlyName>Renderer</friendlyName></device></deviceList>"
+            b"</device></root>"
+        )
+
+        info = client._parse_device_description(xml_data, "http://192.168.1.100")
+
+        assert info.friendly_name == "Renderer"
+
+    def test_parse_truncated_description(self, xml_backend: str) -> None:
+        """Test values read before a parse error are discarded."""
+        client = DLNAClient("192.168.1.100")
+
+        info = client._parse_device_description(
+            DEVICE_DESCRIPTION[: DEVICE_DESCRIPTION.index(b"<serviceList>")],
+            "http://192.168.1.100",
+        )
+
+        assert info == DLNADeviceInfo()
+
+    def test_parse_xml_value(self, xml_backend: str) -> None:
+        """Test a value is extracted from a SOAP response."""
+        client = DLNAClient("192.168.1.100")
+
+        assert (
+            client._parse_xml_value(TRANSPORT_INFO_RESPONSE, "CurrentTransportState") == "PLAYING"
+        )
+        assert client._parse_xml_value(TRANSPORT_INFO_RESPONSE, "RelTime") is None
+        assert client._parse_xml_value("not xml", "RelTime") is None
+
+    def test_parse_xml_value_matches_whole_name(self, xml_backend: str) -> None:
+        """Test a tag name does not match longer element names containing it."""
+        client = DLNAClient("192.168.1.100")
+
+        assert client._parse_xml_value(TRANSPORT_INFO_RESPONSE, "Transport") is None
+        assert client._parse_xml_value(TRANSPORT_INFO_RESPONSE, "CurrentTransportStatus") == "OK"
+
+
+class TestSoapEnvelope:
+    """Tests for SOAP envelope construction."""
+
+    def test_envelope_format(self) -> None:
+        """Test the single-line envelope format with escaped arguments."""
+        client = DLNAClient("192.168.1.100")
+
+        envelope = client._build_soap_envelope(
+            "urn:schemas-upnp-org:service:AVTransport:1",
+            "Seek",
+            {"InstanceID": "0", "Target": "<a & 'b'>"},
+        )
+
+        assert envelope == (
+            b'<?xml version="1.0"?>'
+            b'<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" '
+            b's:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">'
+            b"<s:Body>"
+            b'<u:Seek xmlns:u="urn:schemas-upnp-org:service:AVTransport:1">'
+            b"<InstanceID>0</InstanceID>"
+            b"<Target>&lt;a &amp; &apos;b&apos;&gt;</Target>"
+            b"</u:Seek>"
+            b"</s:Body>"
+            b"</s:Envelope>"
+        )
+
+
+class TestDescriptionProbe:
+    """Tests for locating the device description."""
+
+    @pytest.mark.asyncio
+    async def test_first_successful_path_wins(self) -> None:
+        """Test a slow path does not delay a path that answers, and is cancelled."""
+        client = DLNAClient("192.168.1.100")
+        client._session = MagicMock()
+        cancelled: list[str] = []
+
+        async def probe(session: object, path: str) -> bytes | None:
+            if path == DESCRIPTION_PATHS[0]:
+                try:
+                    await asyncio.sleep(10)
+                except asyncio.CancelledError:
+                    cancelled.append(path)
+                    raise
+            if path == "/rootDesc.xml":
+                return DEVICE_DESCRIPTION
+            return None
+
+        client._probe_description = probe
+
+        info = await asyncio.wait_for(client._fetch_device_description(), timeout=1.0)
+
+        assert info.udn == "uuid:RINCON_1234"
+        assert (
+            info.av_transport_url == "http://192.168.1.100:1400/MediaRenderer/AVTransport/Control"
+        )
+        assert cancelled == [DESCRIPTION_PATHS[0]]
+
+    @pytest.mark.asyncio
+    async def test_answering_path_is_remembered(self, description_path_file: Path) -> None:
+        """Test the path that answered is persisted and tried alone next time."""
+        client = DLNAClient("192.168.1.100")
+        client._session = MagicMock()
+        client._probe_description = AsyncMock(
+            side_effect=lambda session, path: (
+                DEVICE_DESCRIPTION if path == "/rootDesc.xml" else None
+            )
+        )
+
+        await client._fetch_device_description()
+        assert json.loads(description_path_file.read_text()) == {
+            "192.168.1.100:1400": "/rootDesc.xml"
+        }
+
+        # A fresh process loads the path from disk and needs a single request
+        client_module._description_paths = None
+        client._probe_description.reset_mock()
+        info = await client._fetch_device_description()
+
+        assert info.udn == "uuid:RINCON_1234"
+        client._probe_description.assert_awaited_once_with(client._session, "/rootDesc.xml")
+
+    @pytest.mark.asyncio
+    async def test_stale_known_path_falls_back_to_probe(self) -> None:
+        """Test a remembered path that no longer answers triggers a full probe."""
+        client_module._description_paths = {"192.168.1.100:1400": "/rootDesc.xml"}
+        client = DLNAClient("192.168.1.100")
+        client._session = MagicMock()
+        client._probe_description = AsyncMock(
+            side_effect=lambda session, path: (
+                DEVICE_DESCRIPTION if path == "/description.xml" else None
+            )
+        )
+
+        await client._fetch_device_description()
+
+        assert client._probe_description.await_count == len(DESCRIPTION_PATHS)
+        assert client_module._description_paths == {"192.168.1.100:1400": "/description.xml"}
+
+    @pytest.mark.asyncio
+    async def test_no_path_answers(self) -> None:
+        """Test an error is raised when no candidate path answers."""
+        client = DLNAClient("192.168.1.100")
+        client._session = MagicMock()
+        client._probe_description = AsyncMock(return_value=None)
+
+        with pytest.raises(DLNAClientError):
+            await client._fetch_device_description()
+        assert client._probe_description.await_count == len(DESCRIPTION_PATHS)
+
+
+class TestDescriptionCache:
+    """Tests for reusing device descriptions fetched by discovery."""
+
+    @pytest.fixture(autouse=True)
+    def _clear_cache(self) -> Iterator[None]:
+        client_module._description_cache.clear()
+        yield
+        client_module._description_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_cached_description_skips_probe(self) -> None:
+        """Test a cached description is parsed without any HTTP request."""
+        cache_device_description("192.168.1.100", 1400, DEVICE_DESCRIPTION)
+        client = DLNAClient("192.168.1.100")
+        client._session = MagicMock()
+        client._probe_description = AsyncMock(return_value=None)
+
+        info = await client._fetch_device_description()
+
+        assert info.udn == "uuid:RINCON_1234"
+        client._probe_description.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_expired_description_is_refetched(self) -> None:
+        """Test an expired cache entry is dropped and the device probed again."""
+        cached_at = time.monotonic() - DESCRIPTION_CACHE_TTL_SECONDS - 1
+        client_module._description_cache[("192.168.1.100", 1400)] = (DEVICE_DESCRIPTION, cached_at)
+        client = DLNAClient("192.168.1.100")
+        client._session = MagicMock()
+        client._probe_description = AsyncMock(return_value=DEVICE_DESCRIPTION)
+
+        await client._fetch_device_description()
+
+        assert client._probe_description.await_count == len(DESCRIPTION_PATHS)
+        assert client_module._description_cache == {}
+
+
+class TestTimeStrings:
+    """Tests for UPnP time string conversion."""
+
+    @pytest.mark.parametrize(
+        ("ms", "expected"),
+        [(0, "00:00:00"), (61999, "00:01:01"), (3723000, "01:02:03"), (360000000, "100:00:00")],
+    )
+    def test_ms_to_time_string(self, ms: int, expected: str) -> None:
+        """Test milliseconds are formatted as HH:MM:SS, truncating to whole seconds."""
+        assert DLNAClient._ms_to_time_string(ms) == expected
+
+    @pytest.mark.parametrize(
+        ("time_str", "expected"),
+        [
+            ("01:02:03", 3723000),
+            ("0:00:05", 5000),
+            ("00:00:01.5", 1500),
+            ("NOT_IMPLEMENTED", 0),
+            ("00:05", 0),
+            ("", 0),
+        ],
+    )
+    def test_time_string_to_ms(self, time_str: str, expected: int) -> None:
+        """Test HH:MM:SS strings are parsed, with 0 for unparseable values."""
+        assert DLNAClient._time_string_to_ms(time_str) == expected
+
+
+class TestVolumeDebounce:
+    """Tests for rate limiting SetVolume commands."""
+
+    @pytest.mark.asyncio
+    async def test_burst_sends_first_and_last(self) -> None:
+        """Test a burst sends the first value at once and only the last value later."""
+        client = DLNAClient("192.168.1.100")
+        client.device_info = DLNADeviceInfo(
+            rendering_control_url="http://192.168.1.100:1400/MediaRenderer/RenderingControl/Control"
+        )
+        sent: list[str] = []
+
+        async def soap_action(
+            url: str, service: str, action: str, args: dict[str, str], **kwargs: object
+        ) -> bytes:
+            sent.append(args["DesiredVolume"])
+            return b""
+
+        client._soap_action = soap_action
+
+        for volume in (10, 20, 30, 40):
+            assert await client.set_volume(volume)
+        assert sent == ["10"]
+
+        assert client._volume_debounce_task is not None
+        await client._volume_debounce_task
+        assert sent == ["10", "40"]
+
+
+def _upnp_fault(error_code: str) -> bytes:
+    return (
+        '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>'
+        "<s:Fault><detail>"
+        '<UPnPError xmlns="urn:schemas-upnp-org:control-1-0">'
+        f"<errorCode>{error_code}</errorCode>"
+        "</UPnPError></detail></s:Fault></s:Body></s:Envelope>"
+    ).encode()
+
+
+class _FakeResponse:
+    def __init__(self, status: int, body: bytes) -> None:
+        self.status = status
+        self._body = body
+
+    async def __aenter__(self) -> "_FakeResponse":
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        return None
+
+    async def read(self) -> bytes:
+        return self._body
+
+
+class TestSoapRetry:
+    """Tests for SOAP retry behaviour."""
+
+    @pytest.fixture(autouse=True)
+    def _no_retry_delay(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(client_module, "RETRY_DELAY_SECONDS", 0)
+
+    def _client(self, status: int, body: bytes) -> DLNAClient:
+        client = DLNAClient("192.168.1.100")
+        client._session = MagicMock()
+        client._session.post = MagicMock(return_value=_FakeResponse(status, body))
+        return client
+
+    @pytest.mark.asyncio
+    async def test_permanent_upnp_error_not_retried(self) -> None:
+        """Test a permanent UPnP error fails after a single attempt."""
+        client = self._client(500, _upnp_fault("714"))
+
+        result = await client._soap_action("http://x/ctl", UPNP_AV_TRANSPORT, "Play", {})
+
+        assert result is None
+        assert client._session.post.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_transient_upnp_error_retried(self) -> None:
+        """Test a transient UPnP error is retried."""
+        client = self._client(500, _upnp_fault("701"))
+
+        result = await client._soap_action("http://x/ctl", UPNP_AV_TRANSPORT, "Play", {})
+
+        assert result is None
+        assert client._session.post.call_count == client_module.MAX_RETRIES
+
+    @pytest.mark.parametrize(
+        ("jitter", "expected"),
+        [
+            # 2s, 4s, 8s halved by the minimum jitter
+            (0.0, [1.0, 2.0, 4.0]),
+            # Scaled up by the maximum jitter, never past the 5s cap
+            (0.99, [2.98, 5.0, 5.0]),
+        ],
+    )
+    @pytest.mark.asyncio
+    async def test_backoff_grows_with_jitter(
+        self, monkeypatch: pytest.MonkeyPatch, jitter: float, expected: list[float]
+    ) -> None:
+        """Test retry delays back off exponentially, scaled by jitter and then capped."""
+        monkeypatch.setattr(client_module, "RETRY_DELAY_SECONDS", 2.0)
+        monkeypatch.setattr(client_module, "MAX_RETRIES", 4)
+        monkeypatch.setattr(client_module.random, "random", lambda: jitter)
+        sleep = AsyncMock()
+        monkeypatch.setattr(client_module.asyncio, "sleep", sleep)
+        client = self._client(500, b"")
+
+        await client._soap_action("http://x/ctl", UPNP_AV_TRANSPORT, "Play", {})
+
+        delays = [call.args[0] for call in sleep.await_args_list]
+        assert delays == pytest.approx(expected)
+
+    @pytest.mark.asyncio
+    async def test_retries_stop_at_time_budget(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test no retry is attempted once the next delay would exceed the budget."""
+        monkeypatch.setattr(client_module, "RETRY_DELAY_SECONDS", 2.0)
+        monkeypatch.setattr(client_module, "SOAP_TIME_BUDGET_SECONDS", 1.5)
+        monkeypatch.setattr(client_module.random, "random", lambda: 0.5)
+        client = self._client(500, b"")
+
+        result = await client._soap_action("http://x/ctl", UPNP_AV_TRANSPORT, "Play", {})
+
+        assert result is None
+        assert client._session.post.call_count == 1
+
+
+class TestUPnPErrorRegex:
+    """Tests for extracting UPnP fault details."""
+
+    def test_fault_details(self) -> None:
+        """Test the error code and description are found, with or without a prefix."""
+        body = (
+            b"<UPnPError><errorCode> 714 </errorCode>"
+            b"<errorDescription>Illegal MIME-type</errorDescription></UPnPError>"
+        )
+        prefixed = b'<e:UPnPError><e:errorCode xmlns:e="x">402</e:errorCode></e:UPnPError>'
+
+        assert client_module._ERROR_CODE_RE.search(body).group(1) == b"714"
+        assert client_module._ERROR_DESC_RE.search(body).group(1) == b"Illegal MIME-type"
+        assert client_module._ERROR_CODE_RE.search(prefixed).group(1) == b"402"
+        assert client_module._ERROR_CODE_RE.search(b"<html>Bad Request</html>") is None
+
+
+def _transport_event(state: str) -> bytes:
+    last_change = (
+        '<Event xmlns="urn:schemas-upnp-org:metadata-1-0/AVT/">'
+        f'<InstanceID val="0"><TransportState val="{state}"/>'
+        '<CurrentPlayMode val="NORMAL"/></InstanceID></Event>'
+    )
+    escaped = last_change.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return (
+        '<?xml version="1.0"?>'
+        '<e:propertyset xmlns:e="urn:schemas-upnp-org:event-1-0">'
+        f"<e:property><LastChange>{escaped}</LastChange></e:property>"
+        "</e:propertyset>"
+    ).encode()
+
+
+class TestTransportEvents:
+    """Tests for AVTransport event subscriptions."""
+
+    def test_parse_transport_event(self, xml_backend: str) -> None:
+        """Test the transport state is read from the LastChange document."""
+        assert parse_transport_event(_transport_event("PAUSED_PLAYBACK")) == "PAUSED_PLAYBACK"
+
+    def test_parse_event_without_state(self, xml_backend: str) -> None:
+        """Test events without a transport state or malformed bodies yield None."""
+        body = (
+            b'<e:propertyset xmlns:e="urn:schemas-upnp-org:event-1-0">'
+            b"<e:property><LastChange>&lt;Event/&gt;</LastChange></e:property>"
+            b"</e:propertyset>"
+        )
+        assert parse_transport_event(body) is None
+        assert parse_transport_event(b"<propertyset>") is None
+
+    def test_event_url_parsed(self, xml_backend: str) -> None:
+        """Test the AVTransport eventSubURL is resolved against the base URL."""
+        client = DLNAClient("192.168.1.100")
+        xml_data = DEVICE_DESCRIPTION.replace(
+            b"<controlURL>/MediaRenderer/AVTransport/Control</controlURL>",
+            b"<controlURL>/MediaRenderer/AVTransport/Control</controlURL>"
+            b"<eventSubURL>/MediaRenderer/AVTransport/Event</eventSubURL>",
+        )
+
+        info = client._parse_device_description(xml_data, "http://192.168.1.100:1400")
+
+        assert info.av_transport_event_url == (
+            "http://192.168.1.100:1400/MediaRenderer/AVTransport/Event"
+        )
+
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [("Second-1800", 1800), ("Second-300", 300), ("Second-infinite", 1800), ("", 1800)],
+    )
+    def test_parse_subscription_timeout(self, value: str, expected: int) -> None:
+        """Test GENA TIMEOUT headers are parsed, defaulting to the requested lifetime."""
+        assert DLNAClient._parse_subscription_timeout(value) == expected
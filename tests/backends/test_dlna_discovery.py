@@ -0,0 +1,117 @@
+"""Tests for SSDP-based DLNA discovery."""
+
+from unittest.mock import AsyncMock
+
+import pytest
+
+from qobuz_proxy.backends.dlna.discovery import DLNADiscovery, _RawDevice, _SSDPProtocol
+
+SSDP_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"CACHE-CONTROL: max-age = 1800\r\n"
+    b"LOCATION: http://192.168.1.100:1400/xml/device_description.xml\r\n"
+    b"ST: urn:schemas-upnp-org:device:MediaRenderer:1\r\n"
+    b"USN: uuid:RINCON_1234::urn:schemas-upnp-org:device:MediaRenderer:1\r\n"
+    b"\r\n"
+)
+
+
+def _raw_device() -> _RawDevice:
+    return _RawDevice(
+        location="http://192.168.1.100:1400/xml/device_description.xml",
+        usn="uuid:RINCON_1234::urn:schemas-upnp-org:device:MediaRenderer:1",
+        ip="192.168.1.100",
+        port=1400,
+    )
+
+
+class TestDescriptionSession:
+    """Tests for the description-fetching HTTP session."""
+
+    @pytest.mark.asyncio
+    async def test_session_reused_across_scans(self) -> None:
+        """Test repeated description fetches share one session until closed."""
+        discovery = DLNADiscovery()
+        fetch = AsyncMock(return_value=None)
+        discovery._fetch_device_description = fetch
+
+        await discovery._fetch_device_descriptions([_raw_device()])
+        await discovery._fetch_device_descriptions([_raw_device()])
+
+        first_session = fetch.await_args_list[0].args[0]
+        assert fetch.await_args_list[1].args[0] is first_session
+
+        await discovery.close()
+        assert first_session.closed
+        assert discovery._session is None
+
+
+class TestSSDPProtocol:
+    """Tests for receiving SSDP responses."""
+
+    def test_datagram_records_device(self) -> None:
+        """Test a response datagram is parsed into a raw device."""
+        discovery = DLNADiscovery()
+        protocol = _SSDPProtocol(discovery._parse_ssdp_response)
+
+        protocol.datagram_received(SSDP_RESPONSE, ("192.168.1.100", 1900))
+        protocol.datagram_received(SSDP_RESPONSE, ("192.168.1.100", 1900))
+
+        assert list(discovery._devices.values()) == [_raw_device()]
+
+    def test_handler_error_is_contained(self) -> None:
+        """Test a failing handler does not propagate into the event loop."""
+
+        def fail(response: bytes, source_ip: str) -> None:
+            raise ValueError("bad response")
+
+        _SSDPProtocol(fail).datagram_received(SSDP_RESPONSE, ("192.168.1.100", 1900))
+
+
+class TestParseSSDPResponse:
+    """Tests for SSDP response header parsing."""
+
+    def test_headers_case_and_whitespace_insensitive(self) -> None:
+        """Test LOCATION and USN are found regardless of case and padding."""
+        discovery = DLNADiscovery()
+        response = (
+            b"HTTP/1.1 200 OK\r\n"
+            b"location:  http://192.168.1.100:1400/xml/device_description.xml \r\n"
+            b"Usn:uuid:RINCON_1234::urn:schemas-upnp-org:device:MediaRenderer:1\r\n"
+            b"\r\n"
+        )
+
+        discovery._parse_ssdp_response(response, "192.168.1.100")
+
+        assert list(discovery._devices.values()) == [_raw_device()]
+
+    def test_response_without_location_ignored(self) -> None:
+        """Test a response missing LOCATION is ignored."""
+        discovery = DLNADiscovery()
+
+        discovery._parse_ssdp_response(
+            b"HTTP/1.1 200 OK\r\nUSN: uuid:RINCON_1234\r\n\r\n", "192.168.1.100"
+        )
+
+        assert discovery._devices == {}
+
+    @pytest.mark.parametrize(
+        ("location", "ip", "port"),
+        [
+            ("http://192.168.1.50:49152/description.xml", "192.168.1.50", 49152),
+            ("http://192.168.1.50/description.xml", "192.168.1.50", 80),
+            ("HTTP://renderer.local:8080", "renderer.local", 8080),
+            ("http://[fe80::1]:49152/desc.xml", "fe80::1", 49152),
+            ("http://[2001:db8::5]/desc.xml", "2001:db8::5", 80),
+            ("not a url", "192.168.1.99", 80),
+        ],
+    )
+    def test_location_host_and_port(self, location: str, ip: str, port: int) -> None:
+        """Test the device address comes from LOCATION, or the sender if unparseable."""
+        discovery = DLNADiscovery()
+        response = f"HTTP/1.1 200 OK\r\nLOCATION: {location}\r\nUSN: uuid:x\r\n\r\n"
+
+        discovery._parse_ssdp_response(response.encode(), "192.168.1.99")
+
+        device = discovery._devices["uuid:x"]
+        assert (device.ip, device.port) == (ip, port)
@@ -0,0 +1,287 @@
+"""Tests for mDNS registration and HTTP discovery endpoints."""
+
+import asyncio
+import json
+import uuid
+from typing import Iterator
+from unittest.mock import AsyncMock, MagicMock
+
+import aiohttp
+import pytest
+
+from qobuz_proxy.config import Config
+from qobuz_proxy.connect import discovery as discovery_module
+from qobuz_proxy.connect.discovery import (
+    MDNS_SERVICE_TYPE,
+    DiscoveryService,
+    _sanitize_service_name,
+)
+
+
+@pytest.fixture
+def config() -> Config:
+    """Create a test configuration."""
+    cfg = Config()
+    cfg.device.name = "Living Room"
+    cfg.device.uuid = str(uuid.uuid4())
+    return cfg
+
+
+CONNECT_REQUEST = json.dumps(
+    {
+        "session_id": "session-1",
+        "jwt_qconnect": {"jwt": "ws", "exp": 9999999999, "endpoint": "wss://x"},
+        "jwt_api": {"jwt": "api", "exp": 9999999999},
+    }
+).encode()
+
+
+def _mock_zeroconf() -> MagicMock:
+    """Create a mock AsyncZeroconf whose calls return completed broadcasts."""
+    done: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+    done.set_result(None)
+    zeroconf = MagicMock()
+    zeroconf.async_register_service = AsyncMock(return_value=done)
+    zeroconf.async_unregister_service = AsyncMock(return_value=done)
+    zeroconf.async_close = AsyncMock()
+    return zeroconf
+
+
+class TestSanitizeServiceName:
+    """Tests for mDNS service name sanitization."""
+
+    @pytest.mark.parametrize(
+        ("name", "expected"),
+        [
+            ("Living Room", "Living-Room"),
+            ("  Kid's  Room (2) ", "Kid-s-Room-2"),
+            ("hifi--den_1", "hifi-den_1"),
+            ("Café", "Café"),
+            ("!!!", ""),
+        ],
+    )
+    def test_sanitize(self, name: str, expected: str) -> None:
+        """Test unsafe characters become single hyphens and edges are stripped."""
+        assert _sanitize_service_name(name) == expected
+
+
+class TestMdnsRegistration:
+    """Tests for registering the Qobuz Connect mDNS service."""
+
+    @pytest.mark.asyncio
+    async def test_shared_zeroconf_not_closed(self, config: Config) -> None:
+        """Test a shared zeroconf instance is used for registration but left open."""
+        zeroconf = _mock_zeroconf()
+        service = DiscoveryService(config, app_id="123", zeroconf=zeroconf)
+        service._get_local_ip = MagicMock(return_value="192.168.1.10")
+        service._get_local_ipv6 = MagicMock(return_value=None)
+
+        await service._register_mdns()
+        info = zeroconf.async_register_service.await_args.args[0]
+        assert info.name == f"Living-Room.{MDNS_SERVICE_TYPE}"
+        assert info.port == config.server.http_port
+        assert info.properties[b"Name"] == b"Living Room"
+
+        await service._unregister_mdns()
+        zeroconf.async_unregister_service.assert_awaited_once_with(info)
+        zeroconf.async_close.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_service_info_reused_across_restarts(self, config: Config) -> None:
+        """Test the ServiceInfo is rebuilt only when the advertised settings change."""
+        zeroconf = _mock_zeroconf()
+        service = DiscoveryService(config, app_id="123", zeroconf=zeroconf)
+        service._get_local_ip = MagicMock(return_value="192.168.1.10")
+        service._get_local_ipv6 = MagicMock(return_value=None)
+
+        await service._register_mdns()
+        await service._unregister_mdns()
+        await service._register_mdns()
+        first, second = (c.args[0] for c in zeroconf.async_register_service.await_args_list)
+        assert second is first
+
+        await service._unregister_mdns()
+        await service._unregister_mdns()
+        assert zeroconf.async_unregister_service.await_count == 2
+
+        service._get_local_ip = MagicMock(return_value="192.168.1.20")
+        await service._register_mdns()
+        third = zeroconf.async_register_service.await_args.args[0]
+        assert third is not first
+        assert third.parsed_addresses() == ["192.168.1.20"]
+
+    @pytest.mark.asyncio
+    async def test_ipv6_address_advertised(self, config: Config) -> None:
+        """Test a detected IPv6 address is registered alongside the IPv4 one."""
+        zeroconf = _mock_zeroconf()
+        service = DiscoveryService(config, app_id="123", zeroconf=zeroconf)
+        service._get_local_ip = MagicMock(return_value="192.168.1.10")
+        service._get_local_ipv6 = MagicMock(return_value="2001:db8::10")
+
+        await service._register_mdns()
+
+        info = zeroconf.async_register_service.await_args.args[0]
+        assert info.parsed_addresses() == ["192.168.1.10", "2001:db8::10"]
+
+
+class TestSharedZeroconf:
+    """Tests for the application-wide zeroconf instance."""
+
+    @pytest.mark.asyncio
+    async def test_created_once_until_closed(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test every caller gets the same instance, and a new one after closing."""
+        factory = MagicMock(side_effect=lambda: _mock_zeroconf())
+        monkeypatch.setattr(discovery_module, "AsyncZeroconf", factory)
+        monkeypatch.setattr(discovery_module, "_shared_zeroconf", None)
+
+        first = discovery_module.get_shared_zeroconf()
+        assert discovery_module.get_shared_zeroconf() is first
+
+        await discovery_module.close_shared_zeroconf()
+        first.async_close.assert_awaited_once()
+        assert discovery_module.get_shared_zeroconf() is not first
+        assert factory.call_count == 2
+
+
+class TestLocalIp:
+    """Tests for local IP detection."""
+
+    @pytest.fixture(autouse=True)
+    def _clear_cache(self) -> Iterator[None]:
+        discovery_module._detect_local_ip.cache_clear()
+        discovery_module._detect_local_ipv6.cache_clear()
+        yield
+        discovery_module._detect_local_ip.cache_clear()
+        discovery_module._detect_local_ipv6.cache_clear()
+
+    def test_detected_once(self, config: Config, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test the route lookup runs once and is reused until invalidated."""
+        sock = MagicMock()
+        sock.getsockname.return_value = ("192.168.1.10", 54321)
+        socket_factory = MagicMock(return_value=sock)
+        monkeypatch.setattr(discovery_module.socket, "socket", socket_factory)
+        service = DiscoveryService(config, app_id="123")
+
+        assert service._get_local_ip() == "192.168.1.10"
+        assert service._get_local_ip() == "192.168.1.10"
+        assert socket_factory.call_count == 1
+
+        service.invalidate_local_ip()
+        service._get_local_ip()
+        assert socket_factory.call_count == 2
+
+    def test_failure_not_cached(self, config: Config, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test a failed detection is retried on the next call."""
+        socket_factory = MagicMock(side_effect=OSError("network unreachable"))
+        monkeypatch.setattr(discovery_module.socket, "socket", socket_factory)
+        monkeypatch.setattr(
+            discovery_module.socket, "getaddrinfo", MagicMock(side_effect=OSError("no name"))
+        )
+        service = DiscoveryService(config, app_id="123")
+
+        assert service._get_local_ip() is None
+        assert service._get_local_ip() is None
+        assert socket_factory.call_count == 2
+
+
+class TestInfoEndpoints:
+    """Tests for the display and connect info endpoints."""
+
+    @pytest.mark.asyncio
+    async def test_display_info_rebuilt_on_quality_change(self, config: Config) -> None:
+        """Test the cached display info body follows the current quality."""
+        quality = 27
+        service = DiscoveryService(config, app_id="123", quality_getter=lambda: quality)
+
+        first = await service._handle_display_info(MagicMock())
+        again = await service._handle_display_info(MagicMock())
+        assert again.body is first.body
+        assert json.loads(first.body)["max_audio_quality"] == "HIRES_L3"
+        assert json.loads(first.body)["friendly_name"] == "Living Room"
+
+        quality = 6
+        changed = await service._handle_display_info(MagicMock())
+        assert json.loads(changed.body)["max_audio_quality"] == "LOSSLESS"
+
+    @pytest.mark.parametrize(
+        ("quality_id", "expected"),
+        [
+            (5, "MP3"),
+            (6, "LOSSLESS"),
+            (7, "HIRES_L1"),
+            (27, "HIRES_L3"),
+            (4, "HIRES_L3"),
+            (99, "HIRES_L3"),
+            (-1, "HIRES_L3"),
+        ],
+    )
+    @pytest.mark.asyncio
+    async def test_display_info_quality(
+        self, config: Config, quality_id: int, expected: str
+    ) -> None:
+        """Test quality IDs map to display strings, unknown ones to the Hi-Res default."""
+        service = DiscoveryService(config, app_id="123", quality_getter=lambda: quality_id)
+
+        response = await service._handle_display_info(MagicMock())
+
+        assert json.loads(response.body)["max_audio_quality"] == expected
+
+    @pytest.mark.asyncio
+    async def test_connect_info_rebuilt_on_connect(self, config: Config) -> None:
+        """Test a new session replaces the cached connect info body."""
+        service = DiscoveryService(config, app_id="123")
+        before = await service._handle_connect_info(MagicMock())
+        assert json.loads(before.body) == {"current_session_id": "", "app_id": "123"}
+
+        request = MagicMock()
+        request.read = AsyncMock(return_value=CONNECT_REQUEST)
+        response = await service._handle_connect(request)
+        assert response.status == 200
+
+        after = await service._handle_connect_info(MagicMock())
+        assert json.loads(after.body)["current_session_id"] == "session-1"
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    @pytest.mark.asyncio
+    async def test_connect_request_parsing(
+        self, config: Config, monkeypatch: pytest.MonkeyPatch, use_orjson: bool
+    ) -> None:
+        """Test connect bodies are decoded, and bad JSON rejected, with either parser."""
+        if not use_orjson:
+            monkeypatch.setattr(discovery_module, "orjson", None)
+        received = []
+        service = DiscoveryService(config, app_id="123", on_connect=received.append)
+
+        request = MagicMock()
+        request.read = AsyncMock(return_value=CONNECT_REQUEST)
+        response = await service._handle_connect(request)
+        assert response.status == 200
+        assert received[0].api_token.jwt == "api"
+
+        request.read = AsyncMock(return_value=b"{not json")
+        response = await service._handle_connect(request)
+        assert response.status == 400
+        assert json.loads(response.body) == {"error": "Invalid JSON"}
+
+
+class TestHttpServer:
+    """Tests for the discovery HTTP server."""
+
+    @pytest.mark.asyncio
+    async def test_connection_kept_alive_between_polls(self, config: Config) -> None:
+        """Test repeated info polls are served over one connection."""
+        config.server.bind_address = "127.0.0.1"
+        config.server.http_port = 0
+        service = DiscoveryService(config, app_id="123")
+        await service._start_http_server()
+        try:
+            assert service._runner is not None and service._runner.server is not None
+            port = service._runner.addresses[0][1]
+            url = f"http://127.0.0.1:{port}/streamcore/get-connect-info"
+            async with aiohttp.ClientSession() as session:
+                for _ in range(3):
+                    async with session.get(url) as response:
+                        assert (await response.json())["app_id"] == "123"
+                assert len(service._runner.server.connections) == 1
+        finally:
+            await service._stop_http_server()
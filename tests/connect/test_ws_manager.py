@@ -1,7 +1,9 @@
 """Tests for WebSocket manager."""
 
+import asyncio
+import threading
 import uuid
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
@@ -63,8 +65,9 @@ class TestWsManagerInit:
         assert ws_manager._session_uuid is None
 
     def test_init_empty_handlers(self, ws_manager: WsManager) -> None:
-        """Test that handler dict is empty initially."""
-        assert len(ws_manager._handlers) == 0
+        """Test that handler dicts are empty initially."""
+        assert len(ws_manager._sync_handlers) == 0
+        assert len(ws_manager._async_handlers) == 0
 
     def test_init_empty_pending_messages(self, ws_manager: WsManager) -> None:
         """Test that pending messages queue is empty."""
@@ -104,8 +107,8 @@ class TestHandlerRegistration:
         handler = MagicMock()
         ws_manager.register_handler(41, handler)  # SET_STATE
 
-        assert 41 in ws_manager._handlers
-        assert ws_manager._handlers[41] is handler
+        assert 41 in ws_manager._sync_handlers
+        assert ws_manager._sync_handlers[41] is handler
 
     def test_register_multiple_handlers(self, ws_manager: WsManager) -> None:
         """Test registering multiple handlers."""
@@ -117,7 +120,7 @@ class TestHandlerRegistration:
         ws_manager.register_handler(42, handler2)
         ws_manager.register_handler(43, handler3)
 
-        assert len(ws_manager._handlers) == 3
+        assert len(ws_manager._sync_handlers) == 3
 
     def test_register_handler_overwrites(self, ws_manager: WsManager) -> None:
         """Test that registering same type overwrites."""
@@ -127,7 +130,83 @@ class TestHandlerRegistration:
         ws_manager.register_handler(41, handler1)
         ws_manager.register_handler(41, handler2)
 
-        assert ws_manager._handlers[41] is handler2
+        assert ws_manager._sync_handlers[41] is handler2
+
+    def test_register_async_handler(self, ws_manager: WsManager) -> None:
+        """Test registering an async handler uses the async table."""
+        handler = AsyncMock()
+        ws_manager.register_handler(41, handler, is_async=True)
+
+        assert ws_manager._async_handlers[41] is handler
+        assert 41 not in ws_manager._sync_handlers
+
+    def test_register_async_replaces_sync(self, ws_manager: WsManager) -> None:
+        """Test that a message type only keeps its latest handler."""
+        ws_manager.register_handler(41, MagicMock())
+        ws_manager.register_handler(41, AsyncMock(), is_async=True)
+
+        assert 41 in ws_manager._async_handlers
+        assert 41 not in ws_manager._sync_handlers
+
+
+class TestHandlerDispatch:
+    """Tests for routing decoded messages to handlers."""
+
+    @staticmethod
+    def _batch(msg_type: int) -> MagicMock:
+        msg = MagicMock()
+        msg.messageType = msg_type
+        batch = MagicMock()
+        batch.messages = [msg]
+        return batch
+
+    async def _dispatch(self, ws_manager: WsManager, msg_type: int) -> None:
+        ws_manager._codec.decode_qconnect_batch = MagicMock(return_value=self._batch(msg_type))
+        await ws_manager._handle_payload(MagicMock(payload=b"x"))
+        await asyncio.gather(*ws_manager._handler_tasks)
+
+    @pytest.mark.asyncio
+    async def test_async_handler_awaited(self, ws_manager: WsManager) -> None:
+        """Test that async handlers are awaited on the event loop."""
+        handler = AsyncMock()
+        ws_manager.register_handler(41, handler, is_async=True)
+
+        await self._dispatch(ws_manager, 41)
+
+        handler.assert_awaited_once()
+        assert handler.await_args.args[0] == 41
+
+    @pytest.mark.asyncio
+    async def test_sync_handler_runs_in_pool(self, ws_manager: WsManager) -> None:
+        """Test that sync handlers run off the event loop thread."""
+        threads: list[str] = []
+        ws_manager.register_handler(
+            1, lambda mt, msg: threads.append(threading.current_thread().name)
+        )
+
+        await self._dispatch(ws_manager, 1)
+
+        assert len(threads) == 1
+        assert threads[0].startswith("ws-handler")
+
+    @pytest.mark.asyncio
+    async def test_sync_handler_runs_after_stop(self, ws_manager: WsManager) -> None:
+        """Test the handler pool is recreated after a stop shut it down."""
+        calls: list[int] = []
+        ws_manager.register_handler(1, lambda mt, msg: calls.append(mt))
+        await self._dispatch(ws_manager, 1)
+
+        await ws_manager.stop()
+        await self._dispatch(ws_manager, 1)
+
+        assert calls == [1, 1]
+
+    @pytest.mark.asyncio
+    async def test_handler_error_is_contained(self, ws_manager: WsManager) -> None:
+        """Test that a failing handler doesn't propagate out of dispatch."""
+        ws_manager.register_handler(41, AsyncMock(side_effect=RuntimeError("boom")), is_async=True)
+
+        await self._dispatch(ws_manager, 41)
 
 
 class TestCallbacks:
@@ -1,5 +1,6 @@
 """Tests for track metadata retrieval and caching."""
 
+import asyncio
 import time
 from unittest.mock import AsyncMock
 
@@ -34,6 +35,12 @@ class TestAudioQuality:
         """Test getting name for unknown quality ID."""
         assert AudioQuality.get_name(99) == "Unknown (99)"
 
+    def test_get_content_type(self) -> None:
+        """Test MP3 quality maps to audio/mpeg and the rest to FLAC."""
+        assert AudioQuality.get_content_type(5) == "audio/mpeg"
+        assert AudioQuality.get_content_type(6) == "audio/flac"
+        assert AudioQuality.get_content_type(27) == "audio/flac"
+
 
 class TestTrackMetadata:
     """Tests for TrackMetadata class."""
@@ -94,7 +101,7 @@ class TestTrackMetadata:
 
     def test_is_url_expired_valid(self) -> None:
         """Test URL expiry check with valid URL."""
-        future_time = int(time.time()) + 300  # 5 minutes in future
+        future_time = time.monotonic() + 300  # 5 minutes in future
         metadata = TrackMetadata(
             streaming_url="https://example.com/stream",
             streaming_url_expires_at=future_time,
@@ -103,7 +110,7 @@ class TestTrackMetadata:
 
     def test_is_url_expired_expired(self) -> None:
         """Test URL expiry check with expired URL."""
-        past_time = int(time.time()) - 10  # 10 seconds ago
+        past_time = time.monotonic() - 10  # 10 seconds ago
         metadata = TrackMetadata(
             streaming_url="https://example.com/stream",
             streaming_url_expires_at=past_time,
@@ -113,7 +120,7 @@ class TestTrackMetadata:
     def test_is_url_expired_within_buffer(self) -> None:
         """Test URL expiry check within buffer period."""
         # Expires in 20 seconds, default buffer is 30
-        near_future = int(time.time()) + 20
+        near_future = time.monotonic() + 20
         metadata = TrackMetadata(
             streaming_url="https://example.com/stream",
             streaming_url_expires_at=near_future,
@@ -123,6 +130,15 @@ class TestTrackMetadata:
         # But with smaller buffer, it's not expired
         assert metadata.is_url_expired(buffer_s=10) is False
 
+    def test_is_url_expired_explicit_now(self) -> None:
+        """Test URL expiry check against a caller-supplied clock value."""
+        metadata = TrackMetadata(
+            streaming_url="https://example.com/stream",
+            streaming_url_expires_at=1000.0,
+        )
+        assert metadata.is_url_expired(now=900.0) is False
+        assert metadata.is_url_expired(now=980.0) is True
+
 
 class TestMetadataCache:
     """Tests for MetadataCache class."""
@@ -162,7 +178,7 @@ class TestMetadataCache:
             track_id="12345",
             title="Test",
             streaming_url="https://example.com/stream",
-            streaming_url_expires_at=int(time.time()) + 300,
+            streaming_url_expires_at=time.monotonic() + 300,
         )
         cache.set("12345", metadata)
 
@@ -179,6 +195,28 @@ class TestMetadataCache:
         cache = MetadataCache()
         cache.invalidate_url("nonexistent")  # Should not raise
 
+    def test_invalidate_all_urls(self) -> None:
+        """Test invalidating all URLs keeps every entry's metadata."""
+        cache = MetadataCache()
+        for track_id in ("1", "2"):
+            cache.set(
+                track_id,
+                TrackMetadata(
+                    track_id=track_id,
+                    streaming_url=f"https://example.com/{track_id}",
+                    streaming_url_expires_at=time.monotonic() + 300,
+                ),
+            )
+
+        cache.invalidate_all_urls()
+
+        for track_id in ("1", "2"):
+            result = cache.get(track_id)
+            assert result is not None
+            assert result.track_id == track_id
+            assert result.streaming_url == ""
+            assert result.streaming_url_expires_at == 0
+
     def test_lru_eviction(self) -> None:
         """Test LRU eviction when cache is full."""
         cache = MetadataCache()
@@ -202,6 +240,24 @@ class TestMetadataCache:
         assert cache.get("3") is not None
         assert cache.get("4") is not None
 
+    def test_lru_eviction_respects_access(self) -> None:
+        """Test that reading an entry protects it from eviction."""
+        cache = MetadataCache()
+        cache._max_size = 3
+
+        cache.set("1", TrackMetadata(track_id="1"))
+        cache.set("2", TrackMetadata(track_id="2"))
+        cache.set("3", TrackMetadata(track_id="3"))
+
+        # Touch "1" so "2" becomes least recently used
+        cache.get("1")
+        cache.set("4", TrackMetadata(track_id="4"))
+
+        assert cache.get("1") is not None
+        assert cache.get("2") is None  # Evicted
+        assert cache.get("3") is not None
+        assert cache.get("4") is not None
+
     def test_update_existing_no_eviction(self) -> None:
         """Test updating existing entry doesn't trigger eviction."""
         cache = MetadataCache()
@@ -444,25 +500,101 @@ class TestMetadataService:
         # No new API calls
         assert mock_api.get_track_metadata.call_count == 0
 
+    @pytest.mark.asyncio
+    async def test_concurrent_get_metadata_coalesced(
+        self, metadata_service: MetadataService, mock_api: MockAPIClient
+    ) -> None:
+        """Test concurrent requests for one track share a single API call."""
+        release = asyncio.Event()
+
+        async def slow_metadata(track_id: str) -> dict:
+            await release.wait()
+            return {"title": "Test Track", "duration_ms": 180000}
+
+        async def slow_url(track_id: str, quality: int) -> dict:
+            await release.wait()
+            return {"url": "https://streaming.example.com/track.flac", "format_id": 27}
+
+        mock_api.get_track_metadata.side_effect = slow_metadata
+        mock_api.get_track_url.side_effect = slow_url
+
+        tasks = [
+            asyncio.create_task(metadata_service.get_metadata("12345", fetch_url=True))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+        assert results[0] is not None
+        assert all(r is results[0] for r in results)
+        assert mock_api.get_track_metadata.call_count == 1
+        assert mock_api.get_track_url.call_count == 1
+        assert metadata_service._inflight == {}
+        assert metadata_service._inflight_urls == {}
+
+    @pytest.mark.asyncio
+    async def test_preload_tracks_bounded_concurrency(
+        self, metadata_service: MetadataService, mock_api: MockAPIClient
+    ) -> None:
+        """Test preloading runs concurrently but within the limit."""
+        active = 0
+        peak = 0
+
+        async def slow_metadata(track_id: str) -> dict:
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return {"title": track_id}
+
+        mock_api.get_track_metadata.side_effect = slow_metadata
+
+        await metadata_service.preload_tracks([str(i) for i in range(20)])
+
+        assert mock_api.get_track_metadata.call_count == 20
+        assert 1 < peak <= MetadataService.PRELOAD_CONCURRENCY
+
+    @pytest.mark.asyncio
+    async def test_prefetch_next_warms_urls_up_to_depth(
+        self, metadata_service: MetadataService, mock_api: MockAPIClient
+    ) -> None:
+        """Test prefetching fetches URLs for the first `depth` tracks only."""
+        mock_api.get_track_metadata.return_value = {"title": "Test Track"}
+        mock_api.get_track_url.return_value = {
+            "url": "https://streaming.example.com/track.flac",
+            "format_id": 27,
+        }
+
+        await metadata_service.prefetch_next(["1", "2", "3"], depth=2)
+
+        assert mock_api.get_track_url.call_count == 2
+        for track_id in ("1", "2"):
+            cached = metadata_service._cache.get(track_id)
+            assert cached is not None
+            assert cached.streaming_url == "https://streaming.example.com/track.flac"
+        assert metadata_service._cache.get("3") is None
+
     def test_get_quality_fallback_order(self, metadata_service: MetadataService) -> None:
         """Test quality fallback order generation."""
         # Default max_quality is 27
-        assert metadata_service._get_quality_fallback_order() == [27, 7, 6, 5]
+        assert metadata_service._get_quality_fallback_order() == (27, 7, 6, 5)
 
         # Test with lower max_quality
         service = MetadataService(MockAPIClient(), max_quality=7)  # type: ignore[arg-type]
-        assert service._get_quality_fallback_order() == [7, 6, 5]
+        assert service._get_quality_fallback_order() == (7, 6, 5)
 
         service = MetadataService(MockAPIClient(), max_quality=6)  # type: ignore[arg-type]
-        assert service._get_quality_fallback_order() == [6, 5]
+        assert service._get_quality_fallback_order() == (6, 5)
 
         service = MetadataService(MockAPIClient(), max_quality=5)  # type: ignore[arg-type]
-        assert service._get_quality_fallback_order() == [5]
+        assert service._get_quality_fallback_order() == (5,)
 
     def test_get_quality_fallback_order_invalid(self, metadata_service: MetadataService) -> None:
         """Test quality fallback with invalid max_quality returns full list."""
         service = MetadataService(MockAPIClient(), max_quality=99)  # type: ignore[arg-type]
-        assert service._get_quality_fallback_order() == [27, 7, 6, 5]
+        assert service._get_quality_fallback_order() == (27, 7, 6, 5)
 
     def test_log_now_playing(
         self, metadata_service: MetadataService, caplog: pytest.LogCaptureFixture
@@ -148,6 +148,18 @@ class TestQobuzQueue:
         assert track is not None
         assert track.track_id == "C"
 
+    @pytest.mark.asyncio
+    async def test_get_upcoming_track_ids(
+        self, queue: QobuzQueue, sample_tracks: list[dict[str, Any]]
+    ) -> None:
+        """Test upcoming track IDs follow the current track and stop at the end."""
+        await queue.load_queue(sample_tracks, QueueVersion())
+
+        assert await queue.get_upcoming_track_ids(2) == ["B", "C"]
+
+        await queue.set_current_by_item_id(4)
+        assert await queue.get_upcoming_track_ids(3) == ["E"]
+
     @pytest.mark.asyncio
     async def test_go_to_previous(
         self, queue: QobuzQueue, sample_tracks: list[dict[str, Any]]
@@ -0,0 +1,78 @@
+"""Tests for volume command handling."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from qobuz_proxy.playback.volume_handler import (
+    MSG_TYPE_SRVR_CTRL_VOLUME_CHANGED,
+    MSG_TYPE_SRVR_RNDR_SET_VOLUME,
+    VolumeCommandHandler,
+)
+from qobuz_proxy.proto import payload
+
+
+@pytest.fixture
+def player() -> MagicMock:
+    """Create a mock player."""
+    player = MagicMock()
+    player.set_volume = AsyncMock(return_value=40)
+    player.set_volume_delta = AsyncMock(return_value=45)
+    return player
+
+
+@pytest.fixture
+def handler(player: MagicMock) -> VolumeCommandHandler:
+    """Create a volume handler around the mock player."""
+    return VolumeCommandHandler(player)
+
+
+class TestVolumeCommandHandler:
+    """Tests for VolumeCommandHandler dispatch."""
+
+    def test_get_message_types(self, handler: VolumeCommandHandler) -> None:
+        """Test the handler advertises both volume message types."""
+        assert handler.get_message_types() == [
+            MSG_TYPE_SRVR_RNDR_SET_VOLUME,
+            MSG_TYPE_SRVR_CTRL_VOLUME_CHANGED,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_set_volume(self, handler: VolumeCommandHandler, player: MagicMock) -> None:
+        """Test absolute volume is applied."""
+        message = payload.QConnectMessage()
+        message.srvrRndrSetVolume.volume = 40
+
+        await handler.handle_message(MSG_TYPE_SRVR_RNDR_SET_VOLUME, message)
+
+        player.set_volume.assert_awaited_once_with(40)
+
+    @pytest.mark.asyncio
+    async def test_set_volume_delta(self, handler: VolumeCommandHandler, player: MagicMock) -> None:
+        """Test volume delta is applied."""
+        message = payload.QConnectMessage()
+        message.srvrRndrSetVolume.volumeDelta = 5
+
+        await handler.handle_message(MSG_TYPE_SRVR_RNDR_SET_VOLUME, message)
+
+        player.set_volume_delta.assert_awaited_once_with(5)
+
+    @pytest.mark.asyncio
+    async def test_volume_changed(self, handler: VolumeCommandHandler, player: MagicMock) -> None:
+        """Test volume changed broadcasts are applied."""
+        message = payload.QConnectMessage()
+        message.srvrCtrlVolumeChanged.volume = 30
+
+        await handler.handle_message(MSG_TYPE_SRVR_CTRL_VOLUME_CHANGED, message)
+
+        player.set_volume.assert_awaited_once_with(30)
+
+    @pytest.mark.asyncio
+    async def test_unhandled_type_ignored(
+        self, handler: VolumeCommandHandler, player: MagicMock
+    ) -> None:
+        """Test unknown message types are ignored."""
+        await handler.handle_message(999, payload.QConnectMessage())
+
+        player.set_volume.assert_not_awaited()
+        player.set_volume_delta.assert_not_awaited()